@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Sample pg_stat_activity at a high rate and profile where sessions spend time.
+
+Section 1 of the solutions looks at pg_stat_activity one query at a time.
+This tool polls it 10-100 times a second (--hz) over a single connection,
+with a server-side prepared statement, and keeps the samples in memory:
+
+  • a cumulative count per (user, database, state, wait event, query
+    fingerprint) stack. It is exported as folded stacks
+    (`user;db;state;wait;query count`) for flamegraph.pl, speedscope or
+    inferno.
+  • ring buffers (one Counter per tick, the last --window seconds) for
+    each dimension (state, wait event, user, query fingerprint), which
+    give the rolling "average active sessions" summaries printed every
+    --report-every seconds
+
+Active sessions without a wait event are counted as "CPU". Queries are
+fingerprinted client-side (literals replaced by ?, IN lists collapsed), and
+the fingerprint of a query text is cached, so a busy server costs little
+per tick.
+
+--compare-adhoc N shows what the reuse saves. It times N polls that each
+open a new connection and send the query unprepared, as running psql in
+a loop would, against N polls on the prepared connection.
+
+Usage:
+    python activity_sampler.py --hz 50 --duration 60 --folded activity.folded
+    python activity_sampler.py --compare-adhoc 200
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from pg_local import add_connection_arguments, connect, print_table
+
+SAMPLE_SQL = """
+SELECT usename, datname, state, wait_event_type, wait_event, query
+FROM pg_stat_activity
+WHERE pid <> pg_backend_pid()
+  AND backend_type = 'client backend'
+  AND (%(include_idle)s OR state <> 'idle')
+  AND (%(application_name)s::text IS NULL OR application_name = %(application_name)s)
+"""
+
+DIMENSIONS = ["state", "wait", "user", "query"]
+
+LITERAL_RES = [
+    re.compile(r"'(?:[^']|'')*'"),
+    re.compile(r"\$\d+"),
+    re.compile(r"\b\d+(?:\.\d+)?\b"),
+]
+IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+SPACE_RE = re.compile(r"\s+")
+
+# Query texts remembered by fingerprint(); cleared when full
+FINGERPRINT_CACHE_SIZE = 10_000
+
+_fingerprints = {}
+
+def fingerprint(query, width=80):
+    """Query text with literals replaced by ?, as one line, usable as a flame-graph frame."""
+    cached = _fingerprints.get(query)
+    if cached is not None:
+        return cached
+
+    text = query or ""
+    for literal_re in LITERAL_RES:
+        text = literal_re.sub("?", text)
+    text = IN_LIST_RE.sub("(?...)", text)
+    text = SPACE_RE.sub(" ", text).strip().rstrip(";").replace(";", ",")
+    text = text[:width] or "<empty>"
+
+    if len(_fingerprints) >= FINGERPRINT_CACHE_SIZE:
+        _fingerprints.clear()
+    _fingerprints[query] = text
+    return text
+
+def wait_label(state, wait_event_type, wait_event):
+    if wait_event:
+        return f"{wait_event_type}:{wait_event}"
+    return "CPU" if state == "active" else "-"
+
+class ActivitySampler:
+    """Polls pg_stat_activity on one connection and aggregates the samples."""
+
+    def __init__(self, dsn, hz=50, window=60, include_idle=False, application_name=None):
+        self.dsn = dsn
+        self.hz = hz
+        self.include_idle = include_idle
+        self.application_name = application_name
+        self.ticks = 0
+        self.seconds = 0.0
+        self.missed = 0
+        # Like the ring buffers, only the last window seconds of poll times are kept
+        self.poll_seconds = deque(maxlen=max(1, int(window * hz)))
+        self.stacks = Counter()
+        self.totals = {dimension: Counter() for dimension in DIMENSIONS}
+        self.recent = {dimension: deque(maxlen=max(1, int(window * hz))) for dimension in DIMENSIONS}
+        self._stop = threading.Event()
+        self._conn = None
+        self._cursor = None
+
+    def open(self):
+        self._conn = connect(self.dsn)
+        self._conn.execute("SET application_name = 'activity_sampler'")
+        self._cursor = self._conn.cursor(binary=True)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def sample_once(self):
+        """Run one poll and fold it into the aggregates; returns the rows."""
+        started = time.perf_counter()
+        rows = self._cursor.execute(SAMPLE_SQL, {'include_idle': self.include_idle,
+                                                 'application_name': self.application_name}, prepare=True).fetchall()
+        self.poll_seconds.append(time.perf_counter() - started)
+
+        tick = {dimension: Counter() for dimension in DIMENSIONS}
+        for user, database, state, wait_event_type, wait_event, query in rows:
+            wait = wait_label(state, wait_event_type, wait_event)
+            query_print = fingerprint(query)
+            self.stacks[(user or "-", database or "-", state or "-", wait, query_print)] += 1
+            tick['state'][state or "-"] += 1
+            tick['wait'][wait] += 1
+            tick['user'][user or "-"] += 1
+            tick['query'][query_print] += 1
+
+        for dimension in DIMENSIONS:
+            self.totals[dimension].update(tick[dimension])
+            self.recent[dimension].append(tick[dimension])
+        self.ticks += 1
+        return rows
+
+    def run(self, duration=None, report_every=None):
+        """Sample at hz until duration elapses or stop() is called; returns and keeps the seconds sampled."""
+        interval = 1.0 / self.hz
+        started = time.perf_counter()
+        next_tick = started
+        next_report = started + report_every if report_every else None
+        if self._conn is None:
+            self.open()
+
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if duration is not None and now - started >= duration:
+                break
+            self.sample_once()
+
+            next_tick += interval
+            now = time.perf_counter()
+            if now > next_tick:
+                # Fell behind; skip the ticks we missed instead of bursting
+                skipped = int((now - next_tick) / interval) + 1
+                self.missed += skipped
+                next_tick += skipped * interval
+            if next_report and now >= next_report:
+                self.print_window()
+                next_report += report_every
+            self._stop.wait(max(0.0, next_tick - time.perf_counter()))
+        self.seconds = time.perf_counter() - started
+        return self.seconds
+
+    def start(self, duration=None):
+        """Run in a background thread; returns the thread."""
+        thread = threading.Thread(target=self.run, args=(duration,), daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def window(self, dimension):
+        """Average active sessions per value over the ring buffer."""
+        ticks = self.recent[dimension]
+        summed = Counter()
+        for tick in ticks:
+            summed.update(tick)
+        return {value: count / len(ticks) for value, count in summed.most_common()} if ticks else {}
+
+    def print_window(self, top=5):
+        print("-" * 60)
+        for dimension in DIMENSIONS:
+            values = list(self.window(dimension).items())[:top]
+            print(f"{dimension:>6}: " + ", ".join(f"{value} {load:.2f}" for value, load in values))
+
+    def folded(self):
+        """Folded stacks, one 'frame;frame;... count' line each."""
+        return [";".join(stack) + f" {count}" for stack, count in self.stacks.most_common()]
+
+    def summary(self, top=10):
+        return {
+            'hz': self.hz,
+            'ticks': self.ticks,
+            'missed_ticks': self.missed,
+            'poll_ms_median': statistics.median(self.poll_seconds) * 1000 if self.poll_seconds else None,
+            'average_active_sessions': {
+                dimension: {value: count / self.ticks for value, count in self.totals[dimension].most_common(top)}
+                for dimension in DIMENSIONS
+            } if self.ticks else {},
+        }
+
+def compare_adhoc(dsn, polls):
+    """Median ms per poll: a new connection and unprepared query each time, vs the reused prepared one."""
+    adhoc = []
+    for _ in range(polls):
+        started = time.perf_counter()
+        with connect(dsn) as conn:
+            conn.execute(SAMPLE_SQL, {'include_idle': False, 'application_name': None}, prepare=False).fetchall()
+        adhoc.append(time.perf_counter() - started)
+
+    sampler = ActivitySampler(dsn)
+    sampler.open()
+    try:
+        for _ in range(polls):
+            sampler.sample_once()
+    finally:
+        sampler.close()
+    return statistics.median(adhoc) * 1000, statistics.median(sampler.poll_seconds) * 1000
+
+def print_profile(sampler, top=10):
+    for dimension in DIMENSIONS:
+        totals = sampler.totals[dimension]
+        sessions = sum(totals.values()) or 1
+        print_table([dimension.capitalize(), "Avg active sessions", "% of samples"],
+                    [(value, f"{count / sampler.ticks:.2f}", f"{count / sessions * 100:.1f}%")
+                     for value, count in totals.most_common(top)])
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile sessions by sampling pg_stat_activity at a high rate.")
+    add_connection_arguments(parser)
+    parser.add_argument("--hz", type=float, default=50, help="samples per second (default 50)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to sample (default 30)")
+    parser.add_argument("--window", type=float, default=60, help="seconds kept in the ring buffers (default 60)")
+    parser.add_argument("--report-every", type=float, default=0, help="print the window summary every N seconds")
+    parser.add_argument("--include-idle", action="store_true", help="also count idle sessions")
+    parser.add_argument("--folded", default=None, help="write folded stacks for a flame graph to this path")
+    parser.add_argument("--json", default=None, help="write the summary as JSON to this path")
+    parser.add_argument("--compare-adhoc", type=int, default=0, metavar="N",
+                        help="instead of sampling, compare N ad-hoc polls with N prepared ones")
+    args = parser.parse_args()
+
+    if args.compare_adhoc:
+        adhoc_ms, prepared_ms = compare_adhoc(args.dsn, args.compare_adhoc)
+        print(f"Ad-hoc poll (connect + unprepared query): {adhoc_ms:.2f} ms median")
+        print(f"Prepared poll on a reused connection:     {prepared_ms:.2f} ms median")
+        print(f"✓ {adhoc_ms / prepared_ms:.0f}x less time per poll, and no backend started per sample")
+        return 0
+
+    sampler = ActivitySampler(args.dsn, args.hz, args.window, args.include_idle)
+    print(f"Sampling pg_stat_activity at {args.hz:g} Hz for {args.duration:g}s...")
+    try:
+        elapsed = sampler.run(args.duration, args.report_every or None)
+    except KeyboardInterrupt:
+        elapsed = None
+    finally:
+        sampler.close()
+
+    print_profile(sampler)
+    summary = sampler.summary()
+    rate = f", {sampler.ticks / elapsed:.1f} Hz achieved" if elapsed else ""
+    print(f"\n✓ {sampler.ticks:,} samples{rate}, {sampler.missed} missed ticks, "
+          f"{summary['poll_ms_median'] or 0:.2f} ms median poll")
+
+    if args.folded:
+        with open(args.folded, "w") as f:
+            f.write("\n".join(sampler.folded()) + "\n")
+        print(f"✓ Folded stacks: {args.folded} (flamegraph.pl {args.folded} > activity.svg)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ JSON summary: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
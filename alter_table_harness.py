@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Run the ALTER TABLE steps of Questions 3e, 3f and 3h against a large
+sample_table and measure what they cost a live system.
+
+The solutions add birthdate DATE, last_login TIMESTAMP WITH TIME ZONE and
+interests INTEGER[] with plain ALTER TABLE, and fill them with one UPDATE.
+On a toy table that is instant. This harness runs each pattern on --rows
+rows (10M-100M for real numbers):
+  • add_nullable      - the three columns as in the solutions, no default
+  • constant_default  - birthdate DATE NOT NULL DEFAULT '2000-01-15'
+  • stable_default    - last_login DEFAULT now(); now() is evaluated once
+  • volatile_default  - last_login DEFAULT clock_timestamp(), which forces
+                        a table rewrite
+  • backfill_update   - nullable columns, then the 3e UPDATE in one statement
+  • backfill_batched  - nullable columns, then UPDATEs of --batch-rows id
+                        ranges, each committed, with VACUUM every
+                        --vacuum-every batches so the space is reused
+
+Each scenario runs in its own copy of a base database, cloned with
+STRATEGY FILE_COPY, so they all start from the same table. While it runs,
+--readers threads keep looking up random rows by primary key. The report
+shows:
+  • how long the ALTER transactions took, including the wait for their
+    ACCESS EXCLUSIVE lock; readers queue behind them for that long
+  • whether the table was rewritten (its relfilenode changed)
+  • total time, WAL written, and table size before and after
+  • reader p99 and worst latency, and how many reads stalled over
+    --stall-ms
+
+--blocking-reader S keeps a reader transaction open for S seconds when the
+ALTER starts. The ALTER queues behind it and every later reader queues
+behind the ALTER. Adding --lock-timeout makes the ALTER give up and retry
+instead, which is the usual production remedy.
+
+Usage:
+    python alter_table_harness.py --rows 10000000 --readers 4
+    python alter_table_harness.py --rows 1000000 --scenarios add_nullable volatile_default \\
+        --blocking-reader 3 --lock-timeout 200ms
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+
+import psycopg
+from psycopg import sql
+
+from pg_local import add_connection_arguments, connect, create_database, drop_database, scratch_database, print_table
+
+BASE_DB = "alter_base"
+RUN_DB = "alter_run"
+
+TABLE_SQL = """
+CREATE TABLE sample_table (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50),
+    age NUMERIC(4, 2),
+    description TEXT
+)
+"""
+
+FILL_SQL = """
+INSERT INTO sample_table (name, age, description)
+SELECT 'Person ' || g, round((18 + random() * 60)::numeric, 2),
+       '  ' || md5(g::text) || ' ' || md5((g * 7)::text) || '  '
+FROM generate_series(1, %(rows)s) AS g
+"""
+
+ADD_NULLABLE = ("ALTER TABLE sample_table ADD COLUMN birthdate DATE, "
+                "ADD COLUMN last_login TIMESTAMP WITH TIME ZONE, ADD COLUMN interests INTEGER[]")
+BACKFILL = "UPDATE sample_table SET birthdate = '2000-01-15', last_login = CURRENT_TIMESTAMP"
+
+# Scenario -> steps; a step is (kind, SQL) with kind ddl, update or batched
+SCENARIOS = {
+    'add_nullable': [("ddl", ADD_NULLABLE)],
+    'constant_default': [("ddl", "ALTER TABLE sample_table ADD COLUMN birthdate DATE NOT NULL DEFAULT '2000-01-15'")],
+    'stable_default': [("ddl", "ALTER TABLE sample_table ADD COLUMN last_login TIMESTAMP WITH TIME ZONE DEFAULT now()")],
+    'volatile_default': [("ddl", "ALTER TABLE sample_table "
+                                 "ADD COLUMN last_login TIMESTAMP WITH TIME ZONE DEFAULT clock_timestamp()")],
+    'backfill_update': [("ddl", ADD_NULLABLE), ("update", BACKFILL)],
+    'backfill_batched': [("ddl", ADD_NULLABLE), ("batched", BACKFILL + " WHERE id >= %(low)s AND id < %(high)s")],
+}
+
+READ_SQL = "SELECT name FROM sample_table WHERE id = %s"
+BLOCKER_READY_SECONDS = 30
+
+def build_base(dsn, rows):
+    with connect(dsn) as admin:
+        drop_database(admin, BASE_DB)
+        create_database(admin, BASE_DB)
+    with connect(dsn, dbname=BASE_DB) as conn:
+        conn.execute(TABLE_SQL)
+        conn.execute(FILL_SQL, {'rows': rows})
+        conn.execute("VACUUM ANALYZE sample_table")
+
+class Readers:
+    """Threads looking up random ids until stopped; collects (latency ms) per read."""
+
+    def __init__(self, dsn, count, max_id):
+        self.dsn = dsn
+        self.count = count
+        self.max_id = max_id
+        self.latencies = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _run(self, seed):
+        rng = random.Random(seed)
+        samples = []
+        with connect(self.dsn, dbname=RUN_DB) as conn:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                conn.execute(READ_SQL, [rng.randint(1, self.max_id)]).fetchone()
+                samples.append((time.perf_counter() - started) * 1000)
+                self._stop.wait(0.002)
+        with self._lock:
+            self.latencies.extend(samples)
+
+    def __enter__(self):
+        self._threads = [threading.Thread(target=self._run, args=(seed,)) for seed in range(self.count)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+def blocking_reader(dsn, seconds, ready, errors):
+    """Hold ACCESS SHARE on sample_table in an open transaction for seconds.
+
+    ready is set once the lock is held, or when the reader fails with the error appended to errors.
+    """
+    try:
+        with connect(dsn, dbname=RUN_DB) as conn:
+            with conn.transaction():
+                conn.execute("SELECT 1 FROM sample_table LIMIT 1")
+                ready.set()
+                time.sleep(seconds)
+    except psycopg.Error as error:
+        errors.append(error)
+        ready.set()
+
+def run_ddl(conn, statement, lock_timeout):
+    """Run one ALTER in its own transaction; returns (seconds the lock was held, retries)."""
+    retries = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            with conn.transaction():
+                if lock_timeout:
+                    conn.execute(sql.SQL("SET LOCAL lock_timeout = {}").format(sql.Literal(lock_timeout)))
+                conn.execute(statement)
+            return time.perf_counter() - started, retries
+        except psycopg.errors.LockNotAvailable:
+            retries += 1
+            time.sleep(0.05 * min(retries, 20))
+
+def run_batched(conn, statement, max_id, batch_rows, vacuum_every):
+    for number, low in enumerate(range(1, max_id + 1, batch_rows), start=1):
+        conn.execute(statement, {'low': low, 'high': low + batch_rows})
+        if vacuum_every and number % vacuum_every == 0:
+            conn.execute("VACUUM sample_table")
+
+def table_state(conn):
+    return conn.execute("SELECT pg_relation_filenode('sample_table'), pg_table_size('sample_table'), "
+                        "pg_current_wal_lsn()").fetchone()
+
+def run_scenario(args, name, max_id):
+    result = {'scenario': name, 'lock_seconds': 0.0, 'retries': 0}
+    with scratch_database(args.dsn, RUN_DB, template=BASE_DB, strategy="FILE_COPY"):
+        with connect(args.dsn, dbname=RUN_DB) as conn:
+            conn.execute("CHECKPOINT")
+            filenode, size_before, lsn = table_state(conn)
+
+            with Readers(args.dsn, args.readers, max_id) as readers:
+                time.sleep(0.5)
+                blocker = None
+                if args.blocking_reader:
+                    ready = threading.Event()
+                    errors = []
+                    blocker = threading.Thread(target=blocking_reader,
+                                               args=(args.dsn, args.blocking_reader, ready, errors), daemon=True)
+                    blocker.start()
+                    if not ready.wait(BLOCKER_READY_SECONDS) or errors:
+                        reason = errors[0] if errors else f"no lock after {BLOCKER_READY_SECONDS}s"
+                        raise RuntimeError(f"blocking reader failed: {reason}")
+
+                started = time.perf_counter()
+                for kind, statement in SCENARIOS[name]:
+                    if kind == "ddl":
+                        held, retries = run_ddl(conn, statement, args.lock_timeout)
+                        result['lock_seconds'] += held
+                        result['retries'] += retries
+                    elif kind == "update":
+                        conn.execute(statement)
+                    else:
+                        run_batched(conn, statement, max_id, args.batch_rows, args.vacuum_every)
+                result['seconds'] = time.perf_counter() - started
+                if blocker is not None:
+                    blocker.join()
+                time.sleep(0.5)
+
+            new_filenode, size_after, _ = table_state(conn)
+            result['wal_bytes'] = int(conn.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)",
+                                                   [lsn]).fetchone()[0])
+
+    latencies = sorted(readers.latencies)
+    result.update(
+        rewritten=new_filenode != filenode,
+        table_bytes_before=size_before,
+        table_bytes_after=size_after,
+        reads=len(latencies),
+        reader_p99_ms=latencies[int(0.99 * (len(latencies) - 1))] if latencies else None,
+        reader_max_ms=latencies[-1] if latencies else None,
+        reader_median_ms=statistics.median(latencies) if latencies else None,
+        stalled_reads=sum(1 for latency in latencies if latency > args.stall_ms),
+    )
+    return result
+
+def report(results, stall_ms):
+    print_table(
+        ["Scenario", "ALTER s", "Rewrite", "Total s", "WAL MB", "Table MB before/after", "Reads",
+         "Reader p99 ms", "Reader max ms", f"Reads > {stall_ms:g} ms", "DDL retries"],
+        [(result['scenario'], f"{result['lock_seconds']:.3f}", "yes" if result['rewritten'] else "no",
+          f"{result['seconds']:.2f}", f"{result['wal_bytes'] / 1e6:,.1f}",
+          f"{result['table_bytes_before'] / 1e6:,.0f} / {result['table_bytes_after'] / 1e6:,.0f}", result['reads'],
+          f"{result['reader_p99_ms']:.2f}" if result['reads'] else "-",
+          f"{result['reader_max_ms']:.1f}" if result['reads'] else "-", result['stalled_reads'], result['retries'])
+         for result in results],
+    )
+    for result in results:
+        if result['rewritten']:
+            print(f"✗ {result['scenario']} rewrote the table under ACCESS EXCLUSIVE "
+                  f"for {result['lock_seconds']:.2f}s")
+    quick = [result['scenario'] for result in results if not result['rewritten'] and result['lock_seconds'] < 1]
+    if quick:
+        print(f"✓ Metadata-only (lock under 1s): {', '.join(quick)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure locks, rewrites, WAL and reader impact of ALTER TABLE.")
+    add_connection_arguments(parser)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="rows in sample_table (default 10,000,000)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--readers", type=int, default=4, help="concurrent reader threads (default 4)")
+    parser.add_argument("--stall-ms", type=float, default=100, help="reader latency counted as a stall (default 100)")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="rows per backfill batch (default 100,000)")
+    parser.add_argument("--vacuum-every", type=int, default=10, help="VACUUM after this many batches; 0 never")
+    parser.add_argument("--blocking-reader", type=float, default=0, metavar="S",
+                        help="hold a reader transaction open for S seconds as the DDL starts")
+    parser.add_argument("--lock-timeout", default=None, help="lock_timeout for the DDL, retried until it succeeds")
+    parser.add_argument("--reuse-base", action="store_true", help=f"reuse an existing {BASE_DB} database")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    if not args.reuse_base:
+        print(f"Building {BASE_DB} with {args.rows:,} rows...")
+        build_base(args.dsn, args.rows)
+    with connect(args.dsn, dbname=BASE_DB) as conn:
+        max_id = conn.execute("SELECT max(id) FROM sample_table").fetchone()[0]
+
+    results = []
+    for name in args.scenarios:
+        print(f"Running {name}...")
+        results.append(run_scenario(args, name, max_id))
+
+    report(results, args.stall_ms)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Benchmark indexing strategies for the array columns the course queries with
+@> (contains) and && (overlap): students.skills TEXT[] (assignment2solution)
+and sample_table.interests INTEGER[] (Questions 3h/3i).
+
+Both columns are filled server-side at --scale with 1-8 distinct elements
+per row, drawn from --domain values with a skew, so single elements range
+from very common to very rare. Queries use 1-3 elements picked across that
+range, which spreads their selectivity from a few rows to most of the table.
+
+Setups, each measured on the same queries:
+  • seqscan       - no index
+  • gin           - CREATE INDEX ... USING GIN (column)
+  • gin__int_ops  - the intarray extension's opclass (interests only; skipped
+                    when intarray is not installed). The extension is dropped
+                    again afterwards: while it is installed its @> and &&
+                    operators take over int[] and hide the default GIN index.
+  • junction      - a normalized (key, element) table with a btree index on
+                    (element, key); @> becomes GROUP BY ... HAVING count(*) = n,
+                    && becomes count(DISTINCT key)
+
+Index setups run with enable_seqscan off, so the index path is measured even
+where the planner would not choose it. Each query's result is checked
+against the sequential scan. The report shows median latency by selectivity
+band, and the crossover selectivity above which each setup loses to a
+sequential scan.
+
+Usage:
+    python array_index_benchmark.py --scale 100 --queries 40
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+import psycopg
+from psycopg import sql
+
+from pg_local import add_connection_arguments, connect, create_database, drop_database, print_table
+from course_schema import BASE_ROWS
+
+Column = namedtuple("Column", "name table key column junction element kind")  # kind: the SQL element type
+Query = namedtuple("Query", "column operator elements matches selectivity")
+
+COLUMNS = {
+    'skills': Column("skills", "students", "student_id", "skills", "student_skills", "skill", "text"),
+    'interests': Column("interests", "sample_table", "id", "interests", "sample_interests", "interest", "integer"),
+}
+SETUPS = ["seqscan", "gin", "gin__int_ops", "junction"]
+OPERATORS = ["@>", "&&"]
+
+# Upper bounds of the selectivity bands in the report
+BANDS = [0.001, 0.01, 0.05, 0.2, 1.0]
+
+SCHEMA_SQL = """
+CREATE TABLE students (
+    student_id SERIAL PRIMARY KEY,
+    full_name TEXT,
+    skills TEXT[]
+);
+
+CREATE TABLE sample_table (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50),
+    interests INTEGER[]
+);
+"""
+
+# Element 1 is the most common; power(random(), skew) pushes picks towards it
+ELEMENT_SQL = "(1 + floor(power(random(), {skew}) * {domain}))::int"
+
+def populate_sql(rows, domain, skew):
+    element = ELEMENT_SQL.format(skew=skew, domain=domain)
+    return [
+        f"""INSERT INTO students (full_name, skills)
+SELECT 'Student ' || g,
+       ARRAY(SELECT DISTINCT 'skill ' || {element}
+             FROM generate_series(1, 1 + (random() * 7)::int) AS k(n) WHERE g.g > 0)
+FROM generate_series(1, {rows}) AS g(g)""",
+
+        f"""INSERT INTO sample_table (name, interests)
+SELECT 'Person ' || g,
+       ARRAY(SELECT DISTINCT {element}
+             FROM generate_series(1, 1 + (random() * 7)::int) AS k(n) WHERE g.g > 0)
+FROM generate_series(1, {rows}) AS g(g)""",
+    ]
+
+def build_database(dsn, dbname, rows, domain, skew, seed=0.42):
+    with connect(dsn) as admin:
+        drop_database(admin, dbname)
+        create_database(admin, dbname)
+    with connect(dsn, dbname=dbname) as conn:
+        conn.execute(SCHEMA_SQL)
+        conn.execute("SELECT setseed(%s)", [seed])
+        for statement in populate_sql(rows, domain, skew):
+            conn.execute(statement)
+        conn.execute("VACUUM ANALYZE")
+
+def element_value(column, number):
+    return f"skill {number}" if column.kind == "text" else number
+
+def build_queries(conn, column, count, domain, rows, seed=42):
+    """Queries whose elements are spread log-uniformly over frequency ranks, with exact match counts.
+
+    A small domain has fewer distinct queries than asked for; drawing stops after 100 tries per query
+    and returns the distinct ones found.
+    """
+    rng = random.Random(seed)
+    queries = []
+    seen = set()
+    for _ in range(100 * count * len(OPERATORS)):
+        if len(queries) == count * len(OPERATORS):
+            break
+        operator = OPERATORS[len(queries) % len(OPERATORS)]
+        size = rng.randint(1, 3)
+        numbers = sorted({max(1, min(domain, int(domain ** rng.random()))) for _ in range(size)})
+        key = (operator, tuple(numbers))
+        if key in seen:
+            continue
+        seen.add(key)
+        elements = [element_value(column, number) for number in numbers]
+        matches = conn.execute(array_query(column, operator), [elements]).fetchone()[0]
+        queries.append(Query(column.name, operator, elements, matches, matches / rows))
+    if len(queries) < count * len(OPERATORS):
+        print(f"✗ Only {len(queries)} distinct {column.name} queries of {count * len(OPERATORS)} "
+              f"with --domain {domain}")
+    return queries
+
+def array_param(column):
+    """Placeholder cast to the column's array type (small Python ints would be sent as smallint[])."""
+    return sql.SQL("%s::{}[]").format(sql.SQL(column.kind))
+
+def array_query(column, operator):
+    return sql.SQL("SELECT count(*) FROM {} WHERE {} " + operator + " {}").format(
+        sql.Identifier(column.table), sql.Identifier(column.column), array_param(column))
+
+def junction_query(column, operator):
+    if operator == "@>":
+        return sql.SQL("SELECT count(*) FROM (SELECT {key} FROM {junction} WHERE {element} = ANY({param}) "
+                       "GROUP BY {key} HAVING count(*) = %s) AS matched").format(
+            key=sql.Identifier(column.key), junction=sql.Identifier(column.junction),
+            element=sql.Identifier(column.element), param=array_param(column))
+    return sql.SQL("SELECT count(DISTINCT {key}) FROM {junction} WHERE {element} = ANY({param})").format(
+        key=sql.Identifier(column.key), junction=sql.Identifier(column.junction),
+        element=sql.Identifier(column.element), param=array_param(column))
+
+def create_setup(conn, column, setup):
+    """Build a setup; returns (seconds, bytes) or raises psycopg.Error if it is unavailable."""
+    started = time.perf_counter()
+    index = sql.Identifier(f"{column.table}_{column.column}_{setup}")
+    if setup == "gin":
+        conn.execute(sql.SQL("CREATE INDEX {} ON {} USING GIN ({})").format(
+            index, sql.Identifier(column.table), sql.Identifier(column.column)))
+    elif setup == "gin__int_ops":
+        conn.execute("CREATE EXTENSION intarray")
+        conn.execute(sql.SQL("CREATE INDEX {} ON {} USING GIN ({} gin__int_ops)").format(
+            index, sql.Identifier(column.table), sql.Identifier(column.column)))
+    elif setup == "junction":
+        conn.execute(sql.SQL("CREATE TABLE {junction} AS SELECT {key}, unnest({column}) AS {element} FROM {table}").format(
+            junction=sql.Identifier(column.junction), key=sql.Identifier(column.key),
+            column=sql.Identifier(column.column), element=sql.Identifier(column.element),
+            table=sql.Identifier(column.table)))
+        conn.execute(sql.SQL("CREATE INDEX {} ON {} ({}, {})").format(
+            index, sql.Identifier(column.junction), sql.Identifier(column.element), sql.Identifier(column.key)))
+    seconds = time.perf_counter() - started
+
+    if setup == "seqscan":
+        return seconds, 0
+    size = conn.execute("SELECT pg_relation_size(%s::regclass)", [index.as_string(conn)]).fetchone()[0]
+    if setup == "junction":
+        size += conn.execute("SELECT pg_relation_size(%s::regclass)", [column.junction]).fetchone()[0]
+    return seconds, size
+
+def drop_setup(conn, column, setup):
+    index = sql.Identifier(f"{column.table}_{column.column}_{setup}")
+    if setup == "junction":
+        conn.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(column.junction)))
+    elif setup != "seqscan":
+        conn.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(index))
+    if setup == "gin__int_ops":
+        conn.execute("DROP EXTENSION IF EXISTS intarray")
+
+def time_query(conn, column, setup, query, runs):
+    """(median ms, count) of one query under a setup, after a warm-up run."""
+    if setup == "junction":
+        statement = junction_query(column, query.operator)
+        params = [query.elements, len(query.elements)] if query.operator == "@>" else [query.elements]
+    else:
+        statement = array_query(column, query.operator)
+        params = [query.elements]
+
+    timings = []
+    count = None
+    for _ in range(runs + 1):
+        started = time.perf_counter()
+        count = conn.execute(statement, params).fetchone()[0]
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings[1:]), count
+
+def crossover(points):
+    """Selectivity threshold that best separates wins (below) from losses (above).
+
+    points are (selectivity, index_wins). Returns 0.0 when the setup never
+    wins, 1.0 when it always does.
+    """
+    points = sorted(points)
+    best = (sum(1 for _, wins in points if wins), 0.0)  # threshold 0: every win misclassified
+    for i, (selectivity, _) in enumerate(points):
+        errors = sum(1 for _, wins in points[:i + 1] if not wins) + sum(1 for _, wins in points[i + 1:] if wins)
+        upper = points[i + 1][0] if i + 1 < len(points) else 1.0
+        threshold = (selectivity + upper) / 2 if i + 1 < len(points) else 1.0
+        if errors < best[0]:
+            best = (errors, threshold)
+    return best[1]
+
+def band_label(upper, lower):
+    return f"{lower * 100:g}-{upper * 100:g}%"
+
+def run_column(conn, column, queries, setups, runs):
+    """Measure every setup for one column; returns (results, builds)."""
+    results = {}
+    builds = {}
+    for setup in setups:
+        if setup == "gin__int_ops" and column.kind != "integer":
+            continue
+        try:
+            with conn.transaction():
+                builds[setup] = create_setup(conn, column, setup)
+        except psycopg.Error as exc:
+            print(f"  - {column.name}/{setup} skipped: {(exc.diag.message_primary or str(exc)).strip()}")
+            continue
+
+        if setup == "junction":
+            # Outside the build transaction; sets the visibility map for index-only scans
+            conn.execute(sql.SQL("VACUUM ANALYZE {}").format(sql.Identifier(column.junction)))
+        print(f"  {column.name}/{setup}: built in {builds[setup][0]:.1f}s, {builds[setup][1] / 1e6:.1f} MB")
+        conn.execute("SET enable_seqscan = " + ("on" if setup == "seqscan" else "off"))
+        for query in queries:
+            ms, count = time_query(conn, column, setup, query, runs)
+            if count != query.matches:
+                print(f"  ✗ {column.name}/{setup} {query.operator} {query.elements}: {count} rows, expected {query.matches}")
+            results[(setup, query.operator, tuple(query.elements))] = ms
+        conn.execute("RESET enable_seqscan")
+        drop_setup(conn, column, setup)
+    return results, builds
+
+def report(column, queries, results, builds):
+    setups = [setup for setup in SETUPS if setup in builds]
+    for operator in OPERATORS:
+        operator_queries = [query for query in queries if query.operator == operator]
+        rows = []
+        lower = 0.0
+        for upper in BANDS:
+            banded = [query for query in operator_queries if lower <= query.selectivity < upper or
+                      (upper == 1.0 and query.selectivity == 1.0)]
+            if banded:
+                rows.append([band_label(upper, lower), len(banded)] +
+                            [f"{statistics.median(results[(setup, operator, tuple(query.elements))] for query in banded):.2f}"
+                             for setup in setups])
+            lower = upper
+        print(f"\n{column.table}.{column.column} {operator} - median ms by selectivity")
+        print_table(["Selectivity", "Queries"] + setups, rows)
+
+        for setup in setups:
+            if setup == "seqscan":
+                continue
+            points = [(query.selectivity,
+                       results[(setup, operator, tuple(query.elements))] < results[("seqscan", operator, tuple(query.elements))])
+                      for query in operator_queries]
+            threshold = crossover(points)
+            if threshold >= 1.0:
+                verdict = "faster than a seq scan at every selectivity measured"
+            elif threshold <= 0.0:
+                verdict = "never faster than a seq scan"
+            else:
+                verdict = f"faster than a seq scan below ~{threshold * 100:.2g}% selectivity"
+            print(f"  {setup}: {verdict} (built in {builds[setup][0]:.1f}s, {builds[setup][1] / 1e6:.1f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare array indexing strategies for @> and && queries.")
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", type=float, default=10, help=f"multiple of {BASE_ROWS:,} rows per table (default 10)")
+    parser.add_argument("--domain", type=int, default=1000, help="distinct element values (default 1000)")
+    parser.add_argument("--skew", type=float, default=3.0, help="element skew, 1 = uniform (default 3)")
+    parser.add_argument("--queries", type=int, default=30, help="queries per operator and column (default 30)")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per query; the median is kept")
+    parser.add_argument("--columns", nargs="+", choices=list(COLUMNS), default=list(COLUMNS))
+    parser.add_argument("--setups", nargs="+", choices=SETUPS, default=SETUPS)
+    parser.add_argument("--reuse-db", action="store_true", help="reuse an existing array_bench_s<scale> database")
+    parser.add_argument("--json", default=None, help="also write the per-query timings to this path")
+    args = parser.parse_args()
+
+    rows = int(BASE_ROWS * args.scale)
+    dbname = f"array_bench_s{args.scale:g}".replace(".", "_")
+    if not args.reuse_db:
+        print(f"Loading {dbname}: {rows:,} rows per table, {args.domain} values, skew {args.skew:g}...")
+        build_database(args.dsn, dbname, rows, args.domain, args.skew)
+
+    setups = ["seqscan"] + [setup for setup in args.setups if setup != "seqscan"]
+    output = []
+    with connect(args.dsn, dbname=dbname) as conn:
+        for name in args.columns:
+            column = COLUMNS[name]
+            queries = build_queries(conn, column, args.queries, args.domain, rows)
+            results, builds = run_column(conn, column, queries, setups, args.runs)
+            report(column, queries, results, builds)
+            output.extend({'column': name, 'operator': query.operator, 'elements': query.elements,
+                           'selectivity': query.selectivity,
+                           'ms': {setup: results[(setup, query.operator, tuple(query.elements))] for setup in builds}}
+                          for query in queries)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"\n✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Benchmark pg_dump output formats against compression methods and levels.
+
+The Section 4 summary lists the plain, custom, directory and tar formats.
+This benchmark dumps one database in every format with every compression
+setting in --compressions (METHOD:LEVEL as pg_dump -Z takes it, or none).
+Methods the local pg_dump was built without are found by a test dump and
+skipped; tar takes no compression. Each archive is then:
+  • restored in full into a fresh database: pg_restore, or psql for plain
+    (piped through the method's command-line decompressor when compressed,
+    under bash's pipefail so a failed decompression fails the restore)
+  • restored selectively with `pg_restore -t --table --data-only` into a
+    database whose schema was restored first, untimed, so that defaults
+    and other objects the table depends on exist. Plain dumps cannot do
+    this without replaying the whole script.
+
+Recorded for every combination:
+  • dump and restore seconds, and single-table restore latency
+  • archive bytes and compression ratio against the uncompressed plain dump
+  • peak memory and CPU seconds of the client programs (pg_dump, pg_restore,
+    psql and the decompressor); the server's share is not included
+
+A policy table at the end names the best combination for each goal.
+
+Without --database a course database is built at --scale with course_schema.py.
+
+Usage:
+    python backup_format_matrix.py --scale 20
+    python backup_format_matrix.py --database mydb --formats custom directory \\
+        --compressions none gzip:1 gzip:6 zstd:3 --table orders
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import sys
+from collections import namedtuple
+
+from pg_local import add_connection_arguments, connect, conninfo, drop_database, pg_binary, run_command, print_table
+from course_schema import build_course_database
+from parallel_dump_restore import check, fresh_database, table_sizes
+
+FORMATS = {'plain': "p", 'custom': "c", 'directory': "d", 'tar': "t"}
+EXTENSIONS = {'plain': ".sql", 'custom': ".dump", 'directory': ".dir", 'tar': ".tar"}
+DECOMPRESSORS = {'gzip': "gzip", 'lz4': "lz4", 'zstd': "zstd"}
+COMPRESSIONS = ["none", "gzip:1", "gzip:6", "gzip:9", "lz4:1", "lz4:9", "zstd:1", "zstd:3", "zstd:9"]
+
+Combination = namedtuple("Combination", "format compression")
+
+def method(compression):
+    return compression.split(":")[0]
+
+def supported_methods(pg_dump, dsn, database, methods, work_dir):
+    """Methods this pg_dump accepts, found by a schema-only custom-format dump with each."""
+    probe = os.path.join(work_dir, "probe.dump")
+    supported = set()
+    for name in methods:
+        result = run_command([pg_dump, "-F", "c", "-Z", "none" if name == "none" else f"{name}:1", "--schema-only",
+                              "-f", probe, "-d", conninfo(dsn, database)])
+        if result.returncode == 0:
+            supported.add(name)
+    if os.path.exists(probe):
+        os.remove(probe)
+    return supported
+
+def combinations(formats, compressions, supported):
+    """(Combination list, skipped messages) for the requested matrix."""
+    chosen = []
+    skipped = []
+    for name in formats:
+        for compression in compressions:
+            if method(compression) not in supported:
+                skipped.append(f"{compression}: not supported by this pg_dump")
+            elif name == "tar" and compression != "none":
+                skipped.append(f"tar with {compression}: the tar format is never compressed")
+            else:
+                chosen.append(Combination(name, compression))
+    return chosen, sorted(set(skipped))
+
+def archive_bytes(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def restore_command(combination, archive, target, tools, jobs):
+    """The argument list that restores an archive in full, or None when no decompressor is installed."""
+    if combination.format != "plain":
+        args = [tools['pg_restore'], "-d", target, archive]
+        if jobs > 1 and combination.format in ("custom", "directory"):
+            args[1:1] = ["-j", str(jobs)]
+        return args
+    psql = [tools['psql'], "-X", "-q", "-v", "ON_ERROR_STOP=1", "-d", target]
+    if combination.compression == "none":
+        return psql + ["-f", archive]
+    decompressor = shutil.which(DECOMPRESSORS[method(combination.compression)])
+    if decompressor is None:
+        return None
+    pipeline = f"{shlex.quote(decompressor)} -dc {shlex.quote(archive)} | {shlex.join(psql)}"
+    return ["bash", "-o", "pipefail", "-c", pipeline]
+
+def run_combination(args, tools, source, combination, table):
+    label = f"{combination.format}/{combination.compression}"
+    archive = os.path.join(args.work_dir, f"{source}.{combination.compression.replace(':', '_')}"
+                                          f"{EXTENSIONS[combination.format]}")
+    shutil.rmtree(archive, ignore_errors=True)
+    if os.path.isfile(archive):
+        os.remove(archive)
+
+    dump_args = [tools['pg_dump'], "-F", FORMATS[combination.format], "-Z", combination.compression,
+                 "-f", archive, "-d", conninfo(args.dsn, source)]
+    if combination.format == "directory" and args.jobs > 1:
+        dump_args[1:1] = ["-j", str(args.jobs)]
+    dumped = check(run_command(dump_args), f"pg_dump {label}")
+    result = {
+        'format': combination.format,
+        'compression': combination.compression,
+        'bytes': archive_bytes(archive),
+        'dump_seconds': dumped.seconds,
+        'dump_cpu_seconds': dumped.user_cpu + dumped.system_cpu,
+        'dump_peak_kb': dumped.max_rss_kb,
+        'restore_seconds': None,
+        'restore_cpu_seconds': None,
+        'restore_peak_kb': None,
+        'table_restore_seconds': None,
+    }
+
+    restored = f"{source}_matrix"
+    restore_args = restore_command(combination, archive, conninfo(args.dsn, restored), tools, args.jobs)
+    if restore_args is not None:
+        fresh_database(args.dsn, restored)
+        full = check(run_command(restore_args), f"restore of {label}")
+        result.update(restore_seconds=full.seconds, restore_cpu_seconds=full.user_cpu + full.system_cpu,
+                      restore_peak_kb=full.max_rss_kb)
+
+    if combination.format != "plain":
+        fresh_database(args.dsn, restored)
+        check(run_command([tools['pg_restore'], "--section=pre-data", "-d", conninfo(args.dsn, restored), archive]),
+              f"pre-data restore of {label}")
+        single = check(run_command([tools['pg_restore'], "-t", table, "--data-only", "-d",
+                                    conninfo(args.dsn, restored), archive]),
+                       f"pg_restore -t {table} of {label}")
+        result['table_restore_seconds'] = single.seconds
+
+    with connect(args.dsn) as admin:
+        drop_database(admin, restored)
+    if not args.keep:
+        shutil.rmtree(archive, ignore_errors=True)
+        if os.path.isfile(archive):
+            os.remove(archive)
+    return result
+
+def seconds(value):
+    return "-" if value is None else f"{value:.2f}"
+
+def report(results, table):
+    baseline = next((result['bytes'] for result in results
+                     if result['format'] == "plain" and result['compression'] == "none"), None)
+    print_table(
+        ["Format", "Compression", "Size MB", "Ratio", "Dump s", "Dump CPU s", "Dump peak MB", "Restore s",
+         "Restore CPU s", "Restore peak MB", f"-t {table} s"],
+        [(result['format'], result['compression'], f"{result['bytes'] / 1e6:,.1f}",
+          f"{baseline / result['bytes']:.1f}x" if baseline else "-", seconds(result['dump_seconds']),
+          seconds(result['dump_cpu_seconds']), f"{result['dump_peak_kb'] / 1024:,.0f}",
+          seconds(result['restore_seconds']), seconds(result['restore_cpu_seconds']),
+          "-" if result['restore_peak_kb'] is None else f"{result['restore_peak_kb'] / 1024:,.0f}",
+          seconds(result['table_restore_seconds']))
+         for result in results],
+    )
+
+    goals = [
+        ("Smallest archive", "bytes", lambda value: f"{value / 1e6:,.1f} MB"),
+        ("Fastest dump", "dump_seconds", lambda value: f"{value:.2f}s"),
+        ("Least dump CPU", "dump_cpu_seconds", lambda value: f"{value:.2f}s"),
+        ("Fastest full restore", "restore_seconds", lambda value: f"{value:.2f}s"),
+        (f"Fastest single-table restore ({table})", "table_restore_seconds", lambda value: f"{value:.2f}s"),
+        ("Lowest restore memory", "restore_peak_kb", lambda value: f"{value / 1024:,.0f} MB"),
+    ]
+    policy = []
+    for goal, key, show in goals:
+        candidates = [result for result in results if result[key] is not None]
+        if candidates:
+            best = min(candidates, key=lambda result: result[key])
+            policy.append((goal, f"{best['format']}/{best['compression']}", show(best[key])))
+    print_table(["Goal", "Format/compression", "Value"], policy)
+    if any(result['format'] == "plain" for result in results):
+        print(f"✗ plain dumps cannot restore {table} alone; it needs a full replay of the script")
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump/restore time, size, memory and CPU per format and compression.")
+    add_connection_arguments(parser)
+    parser.add_argument("--database", default=None, help="database to dump (default: build a course database)")
+    parser.add_argument("--scale", type=float, default=20, help="course_schema scale when building (default 20)")
+    parser.add_argument("--formats", nargs="+", choices=list(FORMATS), default=list(FORMATS))
+    parser.add_argument("--compressions", nargs="+", default=COMPRESSIONS, metavar="METHOD[:LEVEL]",
+                        help="pg_dump -Z settings (default: " + " ".join(COMPRESSIONS) + ")")
+    parser.add_argument("--table", default=None, help="table for the pg_restore -t test (default: the largest)")
+    parser.add_argument("--jobs", type=int, default=1, help="-j for directory dumps and custom/directory restores")
+    parser.add_argument("--work-dir", default=os.path.join("bench_work", "dumps"), help="where dumps are written")
+    parser.add_argument("--bin-dir", default=None, help="directory of pg_dump/pg_restore/psql")
+    parser.add_argument("--keep", action="store_true", help="keep the archives")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    tools = {name: pg_binary(name, args.bin_dir) for name in ("pg_dump", "pg_restore", "psql")}
+    source = args.database
+    if source is None:
+        source = f"dump_source_s{args.scale:g}".replace(".", "_")
+        print(f"Building {source} at scale {args.scale:g}...")
+        build_course_database(args.dsn, source, args.scale, verbose=False)
+    with connect(args.dsn, dbname=source) as conn:
+        sizes = table_sizes(conn)
+    table = args.table or sizes[0].name
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    supported = supported_methods(tools['pg_dump'], args.dsn, source,
+                                  {method(compression) for compression in args.compressions}, args.work_dir)
+    matrix, skipped = combinations(args.formats, args.compressions, supported)
+    for message in skipped:
+        print(f"✗ Skipped {message}")
+
+    results = []
+    for combination in matrix:
+        print(f"Running {combination.format} with {combination.compression}...")
+        results.append(run_combination(args, tools, source, combination, table))
+    for result in results:
+        if result['format'] == "plain" and result['restore_seconds'] is None:
+            print(f"✗ No {method(result['compression'])} command to decompress the plain dump; restore skipped")
+
+    report(results, table)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'database': source, 'table': table, 'results': results}, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Batch-generate solution PDFs and study-guide decks for many exam variants.
+
+Each exam content source is a JSON file:
+
+    {
+      "title": "Advanced Database",
+      "subtitle": "Midterm Exam - Section B",
+      "sections": [
+        {
+          "title": "Section 1: Managing Database Connections",
+          "questions": [
+            {
+              "label": "1a",
+              "title": "List Connections and PIDs",
+              "question": "How can you retrieve ...?",
+              "answer": "Use the pg_stat_activity system view ...",
+              "code": "SELECT pid, usename FROM pg_stat_activity;",
+              "notes": "pid is the process ID ..."
+            }
+          ]
+        }
+      ],
+      "tips": ["Arrays are 1-indexed"]
+    }
+
+"code", "notes" and "tips" are optional; exams/midterm_sample.json is an
+example. Outputs are named after the source file, so two sources with the
+same file name are rejected. Sources are rendered across a process pool;
+every worker builds the ReportLab styles, loads the fonts and the PPTX
+template once and reuses them for all documents it renders.
+
+Usage:
+    python batch_generate.py exams/*.json --output-dir build --workers 4
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from reportlab.pdfbase import pdfmetrics
+
+from generate_midterm_solutions import build_styles, create_exam_solutions_pdf
+from create_midterm_powerpoint import load_presentation_template, create_exam_powerpoint
+
+# Fonts used by the styles in build_styles()
+PDF_FONTS = ["Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Courier"]
+
+# Per-worker caches, filled once by _init_worker()
+_styles = None
+_pptx_template = None
+
+def load_exam_source(path):
+    """Read and sanity-check one exam content source."""
+    with open(path, encoding="utf-8") as f:
+        exam = json.load(f)
+
+    if not exam.get('sections'):
+        raise ValueError(f"{path}: exam source has no sections")
+    for section in exam['sections']:
+        for question in section.get('questions', []):
+            missing = [key for key in ('label', 'title', 'question', 'answer') if key not in question]
+            if missing:
+                raise ValueError(f"{path}: question in '{section.get('title')}' is missing {', '.join(missing)}")
+
+    return exam
+
+def output_stem(source):
+    """Output file name prefix for a source: its file name without the extension."""
+    return os.path.splitext(os.path.basename(source))[0]
+
+def check_output_stems(sources):
+    """Raise ValueError when two sources would write the same output files."""
+    by_stem = {}
+    for source in sources:
+        by_stem.setdefault(output_stem(source), []).append(source)
+    clashes = [paths for paths in by_stem.values() if len(paths) > 1]
+    if clashes:
+        raise ValueError("sources would overwrite each other's outputs: "
+                         + "; ".join(", ".join(paths) for paths in clashes))
+
+def _init_worker():
+    """Build the styles, fonts and deck template this worker will reuse."""
+    global _styles, _pptx_template
+
+    for font_name in PDF_FONTS:
+        pdfmetrics.getFont(font_name)
+    _styles = build_styles()
+    _pptx_template = load_presentation_template()
+
+def _render_source(source, output_dir, formats):
+    """Render one source in a worker; returns timings and sizes per output."""
+    if _styles is None:
+        _init_worker()
+
+    started = time.perf_counter()
+    exam = load_exam_source(source)
+    stem = output_stem(source)
+    outputs = []
+
+    if 'pdf' in formats:
+        t0 = time.perf_counter()
+        path, pages = create_exam_solutions_pdf(exam, os.path.join(output_dir, f"{stem}_solutions.pdf"),
+                                                styles=_styles)
+        outputs.append({'path': path, 'units': pages, 'unit': 'pages',
+                        'seconds': time.perf_counter() - t0, 'bytes': os.path.getsize(path)})
+
+    if 'pptx' in formats:
+        t0 = time.perf_counter()
+        path, slides = create_exam_powerpoint(exam, os.path.join(output_dir, f"{stem}_study_guide.pptx"),
+                                              template=_pptx_template)
+        outputs.append({'path': path, 'units': slides, 'unit': 'slides',
+                        'seconds': time.perf_counter() - t0, 'bytes': os.path.getsize(path)})
+
+    return {'source': source, 'pid': os.getpid(), 'outputs': outputs,
+            'seconds': time.perf_counter() - started}
+
+def batch_generate(sources, output_dir="build", workers=None, formats=("pdf", "pptx")):
+    """Render every exam source across a process pool and report throughput."""
+
+    check_output_stems(sources)
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    print(f"Rendering {len(sources)} exam source(s) with {workers} worker(s)...")
+    print("-" * 60)
+
+    results = []
+    failures = []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_render_source, source, output_dir, tuple(formats)): source
+                   for source in sources}
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                failures.append((source, exc))
+                print(f"✗ {source}: {exc}")
+                continue
+
+            results.append(result)
+            for output in result['outputs']:
+                rate = output['units'] / output['seconds'] if output['seconds'] else 0.0
+                print(f"✓ {output['path']}")
+                print(f"  → {output['units']} {output['unit']}, {output['bytes'] / 1024:.1f} KB, "
+                      f"{output['seconds']:.2f}s ({rate:.1f} {output['unit']}/s, worker {result['pid']})")
+
+    elapsed = time.perf_counter() - started
+    documents = sum(len(result['outputs']) for result in results)
+    total_bytes = sum(output['bytes'] for result in results for output in result['outputs'])
+    pages = sum(output['units'] for result in results for output in result['outputs']
+                if output['unit'] == 'pages')
+    slides = sum(output['units'] for result in results for output in result['outputs']
+                 if output['unit'] == 'slides')
+
+    print("-" * 60)
+    print(f"\nSources rendered: {len(results)} of {len(sources)}")
+    print(f"  Documents written: {documents} ({pages} pages, {slides} slides, {total_bytes / 1024:.1f} KB)")
+    print(f"  Wall time: {elapsed:.2f}s")
+    if elapsed:
+        print(f"  Throughput: {documents / elapsed:.2f} documents/s, "
+              f"{pages / elapsed:.1f} pages/s, {slides / elapsed:.1f} slides/s")
+    if failures:
+        print(f"  Failed sources: {len(failures)}")
+
+    return results, failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sources", nargs="+", help="exam content source JSON files")
+    parser.add_argument("--output-dir", default="build", help="directory for generated files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--formats", nargs="+", choices=["pdf", "pptx"], default=["pdf", "pptx"],
+                        help="which documents to generate for each source")
+    args = parser.parse_args()
+
+    try:
+        _, failures = batch_generate(args.sources, args.output_dir, args.workers, args.formats)
+    except ValueError as exc:
+        print(f"✗ {exc}")
+        return 1
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Benchmark every generator stage on synthetic inputs at 1x, 10x and 100x scale.
+
+For each scale the suite creates (and caches under --work-dir):
+  • chapter PDFs with many pages          → merge_slides, create_combined_pdf
+  • a midterm .docx with many questions   → extract_midterm
+  • a Q&A bank in the batch_generate.py
+    exam-source format                    → generate_midterm_solutions,
+                                            create_midterm_powerpoint
+
+Each stage is measured with build_telemetry (wall time, CPU time, peak
+memory, output size) over --repeat runs, keeping the median times and the
+lowest peak memory. Results are written to --results and compared against
+--baseline; a metric that grew by more than --threshold fails the run, unless
+the growth is below its minimum (--min-delta-ms for wall time, 4 MB for peak
+memory).
+
+Usage:
+    python benchmark_generators.py --scales 1 10
+    python benchmark_generators.py --update-baseline --repeat 5
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from docx import Document
+
+from build_telemetry import BuildTelemetry
+from merge_slides import merge_pdf_slides
+from create_combined_pdf import create_combined_pdf
+from extract_midterm import extract_midterm_questions
+from generate_midterm_solutions import create_exam_solutions_pdf
+from create_midterm_powerpoint import create_exam_powerpoint
+
+STAGES = ["merge_slides", "create_combined_pdf", "extract_midterm",
+          "generate_midterm_solutions", "create_midterm_powerpoint"]
+
+# Size of the real inputs, which 1x approximates
+CHAPTERS = 6
+PAGES_PER_CHAPTER = 28
+DOCX_QUESTIONS = 40
+BANK_SECTIONS = 4
+BANK_QUESTIONS_PER_SECTION = 5
+
+# Metrics compared against the baseline
+COMPARED_METRICS = ["wall_seconds", "peak_rss_bytes", "bytes_written"]
+
+# Growth below these is noise, whatever the ratio; wall_seconds comes from --min-delta-ms
+MIN_DELTAS = {'peak_rss_bytes': 4 * 2**20, 'bytes_written': 0}
+
+WORDS = ("postgres table index query role grant array jsonb backup restore "
+         "sequence vacuum tsvector connection schema column select insert update "
+         "delete trigger function privilege database cluster").split()
+
+SQL_SNIPPET = """SELECT pid, usename, datname, state, query
+FROM pg_stat_activity
+WHERE usename = 'dev_user'
+  AND pid <> pg_backend_pid();"""
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def make_chapter_pdfs(directory, scale, rng):
+    """Write CHAPTERS synthetic slide decks with PAGES_PER_CHAPTER * scale pages each."""
+    paths = []
+    for chapter in range(1, CHAPTERS + 1):
+        path = os.path.join(directory, f"Ch{chapter:02d}_synthetic.pdf")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+
+        pdf = canvas.Canvas(path, pagesize=letter, invariant=1)
+        for page in range(1, PAGES_PER_CHAPTER * scale + 1):
+            pdf.setFont("Helvetica-Bold", 20)
+            pdf.drawString(72, 720, f"Chapter {chapter} - Slide {page}")
+            pdf.setFont("Helvetica", 12)
+            for line in range(20):
+                pdf.drawString(72, 680 - line * 24, _sentence(rng))
+            pdf.showPage()
+        pdf.save()
+    return paths
+
+def make_midterm_docx(directory, scale, rng):
+    """Write a midterm-style .docx with DOCX_QUESTIONS * scale questions."""
+    path = os.path.join(directory, "midterm_synthetic.docx")
+    if os.path.exists(path):
+        return path
+
+    doc = Document()
+    doc.add_heading("Advanced Database - Synthetic Midterm", 0)
+    for number in range(1, DOCX_QUESTIONS * scale + 1):
+        doc.add_paragraph(f"Question {number}: {_sentence(rng, 18)}")
+        doc.add_paragraph(_sentence(rng, 30))
+    doc.save(path)
+    return path
+
+def make_qa_bank(directory, scale, rng):
+    """Write an exam source with BANK_SECTIONS * BANK_QUESTIONS_PER_SECTION * scale questions."""
+    path = os.path.join(directory, "qa_bank_synthetic.json")
+    if os.path.exists(path):
+        return path
+
+    sections = []
+    for section in range(1, BANK_SECTIONS + 1):
+        questions = []
+        for number in range(1, BANK_QUESTIONS_PER_SECTION * scale + 1):
+            questions.append({
+                'label': f"{section}.{number}",
+                'title': _sentence(rng, 4).rstrip("."),
+                'question': _sentence(rng, 25),
+                'answer': _sentence(rng, 40),
+                'code': SQL_SNIPPET,
+                'notes': _sentence(rng, 20),
+            })
+        sections.append({'title': f"Section {section}: {_sentence(rng, 3).rstrip('.')}",
+                         'questions': questions})
+
+    exam = {'title': "Advanced Database", 'subtitle': f"Synthetic Q&A Bank ({scale}x)",
+            'sections': sections, 'tips': [_sentence(rng) for _ in range(10)]}
+    with open(path, "w") as f:
+        json.dump(exam, f)
+    return path
+
+def prepare_inputs(work_dir, scale, seed=0):
+    """Create (or reuse) every synthetic input for one scale."""
+    directory = os.path.join(work_dir, f"{scale}x")
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed + scale)
+
+    return {
+        'directory': directory,
+        'chapters': make_chapter_pdfs(directory, scale, rng),
+        'docx': make_midterm_docx(directory, scale, rng),
+        'bank': make_qa_bank(directory, scale, rng),
+    }
+
+def run_scale(scale, inputs):
+    """Run every stage on one scale's inputs; returns {stage: measurements}."""
+    directory = inputs['directory']
+    merged = os.path.join(directory, "out_merged_slides.pdf")
+    solutions = os.path.join(directory, "out_solutions.pdf")
+    deck = os.path.join(directory, "out_study_guide.pptx")
+    combined = os.path.join(directory, "out_combined.pdf")
+
+    with open(inputs['bank']) as f:
+        exam = json.load(f)
+
+    telemetry = BuildTelemetry()
+
+    # Stage output goes to /dev/null so terminal I/O does not skew timings
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with telemetry.stage("merge_slides", outputs=[merged]) as stage:
+            _, pages = merge_pdf_slides(inputs['chapters'], merged)
+            stage.record(pages=pages)
+
+        with telemetry.stage("extract_midterm") as stage:
+            paragraphs = extract_midterm_questions(inputs['docx'])
+            stage.record(paragraphs=len(paragraphs))
+
+        with telemetry.stage("generate_midterm_solutions", outputs=[solutions]) as stage:
+            _, pages = create_exam_solutions_pdf(exam, solutions)
+            stage.record(pages=pages)
+
+        with telemetry.stage("create_midterm_powerpoint", outputs=[deck]) as stage:
+            _, slides = create_exam_powerpoint(exam, deck)
+            stage.record(slides=slides)
+
+        with telemetry.stage("create_combined_pdf", outputs=[combined]) as stage:
+            _, pages = create_combined_pdf([merged, solutions], combined)
+            stage.record(pages=pages)
+
+    return {stage.name: stage.as_dict() for stage in telemetry.stages}
+
+def run_scale_repeated(scale, inputs, repeat):
+    """run_scale repeat times; each stage keeps its median wall and CPU time and its lowest peak memory."""
+    runs = [run_scale(scale, inputs) for _ in range(repeat)]
+    results = {}
+    for stage, data in runs[0].items():
+        samples = [run[stage] for run in runs]
+        data['wall_seconds'] = statistics.median(sample['wall_seconds'] for sample in samples)
+        data['cpu_seconds'] = statistics.median(sample['cpu_seconds'] for sample in samples)
+        peaks = [sample['peak_rss_bytes'] for sample in samples if sample['peak_rss_bytes']]
+        data['peak_rss_bytes'] = min(peaks) if peaks else data['peak_rss_bytes']
+        data['runs'] = repeat
+        results[stage] = data
+    return results
+
+def compare_to_baseline(results, baseline, threshold, min_deltas):
+    """Return (key, metric, baseline, current, ratio) for every regression.
+
+    A metric regresses when it grew by more than threshold and by more than min_deltas[metric].
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            if ratio > 1 + threshold and new - old > min_deltas.get(metric, 0):
+                regressions.append((key, metric, old, new, ratio))
+    return regressions
+
+def print_results(results, baseline):
+    print("-" * 78)
+    print(f"{'Stage @ scale':<36}{'Wall s':>9}{'Peak MB':>10}{'KB out':>12}{'vs base':>11}")
+    for key, data in results.items():
+        peak = f"{data['peak_rss_bytes'] / 2**20:.1f}" if data['peak_rss_bytes'] else "-"
+        previous = baseline.get(key)
+        delta = ""
+        if previous and previous.get('wall_seconds'):
+            delta = f"{(data['wall_seconds'] / previous['wall_seconds'] - 1) * 100:+.0f}%"
+        print(f"{key:<36}{data['wall_seconds']:>9.2f}{peak:>10}"
+              f"{data['bytes_written'] / 1024:>12.1f}{delta:>11}")
+    print("-" * 78)
+
+def run_benchmarks(scales=(1, 10, 100), work_dir="bench_work", results_file="benchmark_results.json",
+                   baseline_file="benchmark_baseline.json", threshold=0.2, update_baseline=False,
+                   repeat=3, min_delta_ms=50.0):
+    """Run the suite; returns the list of regressions against the baseline."""
+
+    results = {}
+    for scale in scales:
+        print(f"Preparing {scale}x synthetic inputs in {work_dir}/{scale}x ...")
+        inputs = prepare_inputs(work_dir, scale)
+        print(f"Running stages at {scale}x ({repeat} runs) ...")
+        for stage, data in run_scale_repeated(scale, inputs, repeat).items():
+            data['scale'] = scale
+            results[f"{stage}@{scale}x"] = data
+
+    with open(results_file, "w") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+    print(f"✓ Results written: {results_file}")
+
+    if update_baseline:
+        baseline.update(results)
+        with open(baseline_file, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"✓ Baseline updated: {baseline_file}")
+        return []
+
+    if not baseline:
+        print(f"No baseline at {baseline_file}; run with --update-baseline to record one.")
+        return []
+
+    regressions = compare_to_baseline(results, baseline, threshold,
+                                      dict(MIN_DELTAS, wall_seconds=min_delta_ms / 1000))
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) above {threshold:.0%}:")
+        for key, metric, old, new, ratio in regressions:
+            print(f"  {key} {metric}: {old:,.3f} → {new:,.3f} ({ratio:.2f}x)")
+    else:
+        print(f"✓ No regressions above {threshold:.0%} against {baseline_file}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generators on synthetic inputs.")
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100],
+                        help="input scale factors (default: 1 10 100)")
+    parser.add_argument("--work-dir", default="bench_work", help="directory for synthetic inputs and outputs")
+    parser.add_argument("--results", default="benchmark_results.json", help="where to write this run's results")
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="stored baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative growth before a metric counts as a regression (default 0.2)")
+    parser.add_argument("--min-delta-ms", type=float, default=50.0,
+                        help="ignore wall-time changes smaller than this (default 50 ms)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the median time is kept (default 3)")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    regressions = run_benchmarks(args.scales, args.work_dir, args.results, args.baseline,
+                                 args.threshold, args.update_baseline, args.repeat, args.min_delta_ms)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
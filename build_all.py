@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Rebuild every study material in order, with per-stage telemetry.
+
+Stages: merge (course slides), extract (midterm-demo.docx), solutions
+(midterm_sample_solutions.pdf), pptx (study guide deck) and combine
+(slides + solutions). Each stage records wall time, CPU time, peak memory,
+pages/slides and bytes written; the run writes a Chrome trace and a JSON
+summary next to the outputs.
+
+Usage:
+    python build_all.py
+    python build_all.py --stages solutions combine --trace build_trace.json
+    python build_all.py --profile solutions
+"""
+
+import argparse
+
+from PyPDF2 import PdfReader
+from pptx import Presentation
+
+from build_telemetry import BuildTelemetry
+from merge_slides import merge_pdf_slides
+from extract_midterm import extract_midterm_questions
+from generate_midterm_solutions import create_midterm_solutions_pdf
+from create_midterm_powerpoint import create_comprehensive_powerpoint
+from create_combined_pdf import create_combined_pdf
+
+STAGES = ["merge", "extract", "solutions", "pptx", "combine"]
+
+MERGED_SLIDES = "adv_db_merged_slides.pdf"
+MIDTERM_DOCX = "midterm-demo.docx"
+SOLUTIONS_PDF = "midterm_sample_solutions.pdf"
+STUDY_GUIDE_PPTX = "adv_db_midterm_study_guide.pptx"
+COMBINED_PDF = "adv_db_merged_with_sample.pdf"
+
+STAGE_OUTPUTS = {
+    "merge": [MERGED_SLIDES],
+    "extract": [],
+    "solutions": [SOLUTIONS_PDF],
+    "pptx": [STUDY_GUIDE_PPTX],
+    "combine": [COMBINED_PDF],
+}
+
+def run_stage(name, stage, profile=False):
+    """Run one named stage and record its counts on the StageRecord."""
+
+    if name == "merge":
+        _, pages = merge_pdf_slides(output_file=MERGED_SLIDES, profile=profile)
+        stage.record(pages=pages)
+    elif name == "extract":
+        paragraphs = extract_midterm_questions(MIDTERM_DOCX, profile=profile)
+        stage.record(paragraphs=len(paragraphs))
+    elif name == "solutions":
+        create_midterm_solutions_pdf(SOLUTIONS_PDF, profile=profile)
+    elif name == "pptx":
+        create_comprehensive_powerpoint(STUDY_GUIDE_PPTX, profile=profile)
+    elif name == "combine":
+        _, pages = create_combined_pdf(output_file=COMBINED_PDF, profile=profile)
+        stage.record(pages=pages)
+
+def build_all(stages=STAGES, trace_file="build_trace.json", summary_file="build_summary.json",
+              profile_stages=()):
+    """Run the selected stages in order and export their telemetry.
+
+    Stages listed in profile_stages also write cProfile/tracemalloc stats
+    (their timings are inflated by the profiler).
+    """
+
+    telemetry = BuildTelemetry()
+
+    try:
+        for name in STAGES:
+            if name not in stages:
+                continue
+            print(f"\n=== Stage: {name} ===")
+            with telemetry.stage(name, outputs=STAGE_OUTPUTS[name]) as stage:
+                run_stage(name, stage, profile=name in profile_stages)
+
+            # Counted outside the timed block so it does not skew the stage
+            if name == "solutions":
+                stage.record(pages=len(PdfReader(SOLUTIONS_PDF).pages))
+            elif name == "pptx":
+                stage.record(slides=len(Presentation(STUDY_GUIDE_PPTX).slides))
+    finally:
+        # A failed build is exported too, with the failing stage marked as an error
+        print()
+        telemetry.print_report()
+        if trace_file:
+            telemetry.write_chrome_trace(trace_file)
+            print(f"✓ Chrome trace: {trace_file}")
+        if summary_file:
+            telemetry.write_summary(summary_file)
+            print(f"✓ Summary: {summary_file}")
+
+    return telemetry
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the study materials with per-stage telemetry.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES,
+                        help="stages to run (always executed in build order)")
+    parser.add_argument("--trace", default="build_trace.json", help="Chrome trace output path")
+    parser.add_argument("--summary", default="build_summary.json", help="JSON summary output path")
+    parser.add_argument("--profile", nargs="+", choices=STAGES, default=[], metavar="STAGE",
+                        help="stages to run under cProfile and tracemalloc")
+    args = parser.parse_args()
+
+    build_all(args.stages, args.trace, args.summary, args.profile)
+
+if __name__ == "__main__":
+    main()
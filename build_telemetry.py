@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Per-stage build telemetry with Chrome-trace and JSON summary export.
+
+Wrap each build stage in BuildTelemetry.stage() to record wall time, CPU
+time, peak memory and the pages, slides and bytes it wrote:
+
+    telemetry = BuildTelemetry()
+    with telemetry.stage("merge", outputs=["adv_db_merged_slides.pdf"]) as stage:
+        _, pages = merge_pdf_slides()
+        stage.record(pages=pages)
+    telemetry.write_chrome_trace("build_trace.json")   # open in chrome://tracing or Perfetto
+    telemetry.write_summary("build_summary.json")
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS counter; returns False where unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_bytes():
+    """Peak resident set size since the last reset (Linux) or process start."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class StageRecord:
+    """Measurements for one build stage."""
+
+    def __init__(self, name, outputs):
+        self.name = name
+        self.outputs = list(outputs)
+        self.start = 0.0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_bytes = None
+        self.peak_rss_scope = "stage"
+        self.bytes_written = 0
+        self.status = "ok"
+        self.error = None
+        self.metrics = {}
+
+    def record(self, **metrics):
+        """Attach counts such as pages=, slides= or paragraphs= to the stage."""
+        self.metrics.update(metrics)
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'status': self.status,
+            'error': self.error,
+            'wall_seconds': round(self.wall_seconds, 6),
+            'cpu_seconds': round(self.cpu_seconds, 6),
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'peak_rss_scope': self.peak_rss_scope,
+            'pages': self.metrics.get('pages'),
+            'slides': self.metrics.get('slides'),
+            'bytes_written': self.bytes_written,
+            'outputs': self.outputs,
+            'metrics': self.metrics,
+        }
+
+class BuildTelemetry:
+    """Collects StageRecords for one build and exports them."""
+
+    def __init__(self):
+        self.stages = []
+        self._origin = time.perf_counter()
+        self._started_at = time.time()
+
+    @contextmanager
+    def stage(self, name, outputs=()):
+        """Measure the enclosed block as one stage writing the given outputs."""
+        record = StageRecord(name, outputs)
+        if not _reset_peak_rss():
+            record.peak_rss_scope = "process"
+
+        record.start = time.perf_counter() - self._origin
+        cpu_start = time.process_time()
+        try:
+            yield record
+        except BaseException as exc:
+            record.status = "error"
+            record.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            record.cpu_seconds = time.process_time() - cpu_start
+            record.wall_seconds = time.perf_counter() - self._origin - record.start
+            record.peak_rss_bytes = _peak_rss_bytes()
+            record.bytes_written = sum(os.path.getsize(path) for path in record.outputs
+                                       if os.path.exists(path))
+            self.stages.append(record)
+
+    def summary(self):
+        """Machine-readable summary of every recorded stage."""
+        stages = [stage.as_dict() for stage in self.stages]
+        return {
+            'started_at': self._started_at,
+            'wall_seconds': round(sum(stage.wall_seconds for stage in self.stages), 6),
+            'cpu_seconds': round(sum(stage.cpu_seconds for stage in self.stages), 6),
+            'bytes_written': sum(stage.bytes_written for stage in self.stages),
+            'peak_rss_bytes': max((stage.peak_rss_bytes or 0 for stage in self.stages), default=0),
+            'stages': stages,
+        }
+
+    def chrome_trace(self):
+        """Stages as Chrome trace-event JSON (complete and counter events)."""
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                   'args': {'name': 'adv-db build'}}]
+
+        for stage in self.stages:
+            ts = stage.start * 1e6
+            data = stage.as_dict()
+            events.append({
+                'name': stage.name,
+                'cat': 'build',
+                'ph': 'X',
+                'ts': round(ts, 3),
+                'dur': round(stage.wall_seconds * 1e6, 3),
+                'pid': pid,
+                'tid': tid,
+                'args': {key: value for key, value in data.items() if key != 'name'},
+            })
+            if stage.peak_rss_bytes is not None:
+                events.append({'name': 'peak_rss_mb', 'ph': 'C', 'ts': round(ts, 3), 'pid': pid,
+                               'args': {'peak_rss_mb': round(stage.peak_rss_bytes / 2**20, 2)}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f, indent=1)
+        return path
+
+    def write_summary(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def print_report(self):
+        """Print a one-line-per-stage table in the scripts' usual style."""
+        print("-" * 60)
+        print(f"{'Stage':<12}{'Wall s':>9}{'CPU s':>9}{'Peak MB':>10}{'Units':>9}{'KB out':>11}")
+        for stage in self.stages:
+            units = stage.metrics.get('pages') or stage.metrics.get('slides') or ''
+            peak = f"{stage.peak_rss_bytes / 2**20:.1f}" if stage.peak_rss_bytes else "-"
+            print(f"{stage.name:<12}{stage.wall_seconds:>9.2f}{stage.cpu_seconds:>9.2f}"
+                  f"{peak:>10}{units:>9}{stage.bytes_written / 1024:>11.1f}")
+        print("-" * 60)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Bulk-load large CSV or COPY binary files into the course tables.
+
+assignment2solution fills its tables with one INSERT per row. This loader
+streams the data with COPY FROM STDIN instead, over a pool of connections:
+
+  • CSV files are split into chunks of about --chunk-mb at record
+    boundaries. A newline ends a record only when an even number of quote
+    characters precede it, so quoted fields with embedded newlines are
+    never cut. The boundaries are found with NumPy over a memory map, a
+    block at a time.
+  • COPY binary files (generate_synthetic_data.py output, read from its
+    manifest.json) are loaded one file per chunk.
+
+Chunks are sent largest first, and each connection reads the next block
+of its file while psycopg's writer thread sends the previous one. Before
+the load, secondary indexes, primary/unique keys and foreign keys on the
+target tables are dropped; they are rebuilt afterwards in parallel. The
+statements to rebuild them are written to --deferred-sql first, so an
+interrupted load can be repaired by hand. Triggers (the FTS trigger on
+library_books) stay enabled.
+
+With --baseline-rows N, N of the loaded rows are also inserted one
+statement per row, autocommitted, into a copy of the table, as the
+assignment script does, and the rows/sec of both methods are compared.
+
+Usage:
+    python bulk_load.py synthetic_data --database course_bulk --create
+    python bulk_load.py books.csv --table library_books --columns title,author --header
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+from psycopg import sql
+from psycopg.copy import QueuedLibpqWriter
+
+from pg_local import add_connection_arguments, connect, create_database, drop_database, print_table
+from course_schema import create_schema
+
+READ_BYTES = 1 << 20
+SCAN_BYTES = 64 << 20
+
+Chunk = namedtuple("Chunk", "table columns path start end format")  # format: 'csv' or 'binary'
+Loaded = namedtuple("Loaded", "chunk rows seconds")
+
+def record_ends(path, quote=b'"'):
+    """Byte offset just past every CSV record, skipping newlines inside quotes."""
+    data = np.memmap(path, np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, np.uint8)
+    ends = []
+    quotes_before = 0
+    for start in range(0, len(data), SCAN_BYTES):
+        block = data[start:start + SCAN_BYTES]
+        quotes = np.flatnonzero(block == quote[0])
+        newlines = np.flatnonzero(block == ord("\n"))
+        outside = (quotes_before + np.searchsorted(quotes, newlines)) % 2 == 0
+        ends.append(newlines[outside] + start + 1)
+        quotes_before += len(quotes)
+
+    ends = np.concatenate(ends) if ends else np.zeros(0, np.int64)
+    # A last record without a trailing newline
+    if len(data) and (not len(ends) or ends[-1] < len(data)):
+        ends = np.append(ends, len(data))
+    return ends
+
+def csv_chunks(path, table, columns, chunk_bytes, header=False):
+    """Chunks of a CSV file, each ending on a record boundary."""
+    ends = record_ends(path)
+    first = int(ends[0]) if header and len(ends) else 0
+    if header:
+        ends = ends[1:]
+    if not len(ends):
+        return []
+
+    targets = np.arange(first + chunk_bytes, int(ends[-1]), chunk_bytes)
+    cuts = np.unique(np.append(ends[np.minimum(np.searchsorted(ends, targets), len(ends) - 1)], ends[-1]))
+    starts = np.concatenate([[first], cuts[:-1]])
+    return [Chunk(table, columns, path, int(start), int(end), "csv") for start, end in zip(starts, cuts)]
+
+def manifest_chunks(directory, tables=None):
+    """One chunk per COPY binary file listed in a generate_synthetic_data.py manifest."""
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    chunks = []
+    for table, entry in manifest['tables'].items():
+        if tables and table not in tables:
+            continue
+        for name in entry['files']:
+            path = os.path.join(directory, name)
+            chunks.append(Chunk(table, entry['columns'], path, 0, os.path.getsize(path), "binary"))
+    return chunks
+
+def copy_statement(chunk):
+    columns = sql.SQL(", ").join(sql.Identifier(column) for column in chunk.columns) if chunk.columns else None
+    target = sql.Identifier(chunk.table)
+    if columns is not None:
+        target = sql.SQL("{} ({})").format(target, columns)
+    return sql.SQL("COPY {} FROM STDIN WITH (FORMAT {})").format(target, sql.SQL(chunk.format))
+
+def stream_chunk(conn, chunk):
+    """COPY one chunk on conn, reading while the writer thread sends; returns rows loaded."""
+    with conn.cursor() as cursor:
+        with cursor.copy(copy_statement(chunk), writer=QueuedLibpqWriter(cursor)) as copy:
+            with open(chunk.path, "rb") as f:
+                f.seek(chunk.start)
+                remaining = chunk.end - chunk.start
+                while remaining > 0:
+                    block = f.read(min(READ_BYTES, remaining))
+                    if not block:
+                        break
+                    copy.write(block)
+                    remaining -= len(block)
+        return cursor.rowcount
+
+def deferrable_objects(conn, table):
+    """(drop, rebuild) statement pairs for the indexes and keys on table, keys last."""
+    indexes = conn.execute("""
+        SELECT format('DROP INDEX %%s', i.indexrelid::regclass), pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """, [table]).fetchall()
+
+    # Keys referenced by a foreign key elsewhere stay in place
+    keys = conn.execute("""
+        SELECT format('ALTER TABLE %%s DROP CONSTRAINT %%I', c.conrelid::regclass, c.conname),
+               format('ALTER TABLE %%s ADD CONSTRAINT %%I %%s', c.conrelid::regclass, c.conname,
+                      pg_get_constraintdef(c.oid)),
+               c.contype
+        FROM pg_constraint c
+        WHERE c.conrelid = %s::regclass
+          AND (c.contype = 'f' OR (c.contype IN ('p', 'u') AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint f WHERE f.contype = 'f' AND f.confrelid = c.conrelid)))
+        ORDER BY c.contype = 'f'
+    """, [table]).fetchall()
+    return [(drop, rebuild, "index") for drop, rebuild in indexes] + [(drop, rebuild, kind) for drop, rebuild, kind in keys]
+
+class _WorkerState(threading.local):
+    conn = None
+
+class BulkLoader:
+    """COPYs chunks and rebuilds deferred objects on a pool of connections."""
+
+    def __init__(self, dsn, dbname=None, workers=4, maintenance_work_mem="256MB"):
+        self.dsn = dsn
+        self.dbname = dbname
+        self.workers = workers
+        self.maintenance_work_mem = maintenance_work_mem
+        self._state = _WorkerState()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _init_worker(self):
+        conn = connect(self.dsn, dbname=self.dbname)
+        conn.execute("SELECT set_config('maintenance_work_mem', %s, false)", [self.maintenance_work_mem])
+        self._state.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+
+    def _load(self, chunk):
+        started = time.perf_counter()
+        rows = stream_chunk(self._state.conn, chunk)
+        return Loaded(chunk, rows, time.perf_counter() - started)
+
+    def _execute(self, statement):
+        started = time.perf_counter()
+        self._state.conn.execute(statement)
+        return statement, time.perf_counter() - started
+
+    def run(self, chunks, rebuilds):
+        """Load chunks largest first, then rebuild indexes/keys, then foreign keys."""
+        timings = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, initializer=self._init_worker) as pool:
+                started = time.perf_counter()
+                ordered = sorted(chunks, key=lambda chunk: chunk.end - chunk.start, reverse=True)
+                loaded = [future.result() for future in as_completed([pool.submit(self._load, chunk) for chunk in ordered])]
+                timings['copy'] = time.perf_counter() - started
+
+                started = time.perf_counter()
+                for phase in ([rebuild for rebuild, kind in rebuilds if kind != "f"],
+                              [rebuild for rebuild, kind in rebuilds if kind == "f"]):
+                    for future in as_completed([pool.submit(self._execute, statement) for statement in phase]):
+                        future.result()
+                timings['rebuild'] = time.perf_counter() - started
+        finally:
+            for conn in self._connections:
+                conn.close()
+        return loaded, timings
+
+def insert_baseline(conn, table, columns, rows):
+    """Insert rows of table one autocommitted INSERT at a time into a copy of it; returns rows/sec."""
+    baseline = f"{table}_insert_baseline"
+    conn.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(baseline)))
+    conn.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING ALL)").format(sql.Identifier(baseline), sql.Identifier(table)))
+
+    # LIKE does not copy triggers, and the FTS trigger is part of the per-row cost
+    triggers = conn.execute("SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal",
+                            [table]).fetchall()
+    for (definition,) in triggers:
+        conn.execute(re.sub(rf" ON (\S+\.)?{re.escape(table)} ", f" ON {baseline} ", definition, count=1))
+
+    names = sql.SQL(", ").join(sql.Identifier(column) for column in columns)
+    values = conn.execute(sql.SQL("SELECT {} FROM {} LIMIT %s").format(
+        sql.SQL(", ").join(sql.SQL("{}::text").format(sql.Identifier(column)) for column in columns),
+        sql.Identifier(table)), [rows]).fetchall()
+    insert = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
+        sql.Identifier(baseline), names, sql.SQL(", ").join(sql.Placeholder() * len(columns)))
+
+    started = time.perf_counter()
+    for row in values:
+        conn.execute(insert, row, prepare=False)
+    seconds = time.perf_counter() - started
+
+    conn.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(baseline)))
+    return len(values) / seconds if seconds else 0.0
+
+def table_columns(conn, table):
+    """Insertable columns of table, in order."""
+    return [name for (name,) in conn.execute("""
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        ORDER BY attnum
+    """, [table]).fetchall()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load CSV or COPY binary files with parallel COPY FROM STDIN.")
+    add_connection_arguments(parser)
+    parser.add_argument("source", help="a CSV file, or a generate_synthetic_data.py output directory")
+    parser.add_argument("--database", default=None, help="target database (default: the one --dsn names)")
+    parser.add_argument("--create", action="store_true", help="(re)create --database with the course schema first")
+    parser.add_argument("--table", default=None, help="target table for a CSV file")
+    parser.add_argument("--tables", nargs="+", default=None, help="only load these tables from a manifest")
+    parser.add_argument("--columns", default=None, help="comma-separated CSV column list (default: all columns)")
+    parser.add_argument("--header", action="store_true", help="the CSV file starts with a header line")
+    parser.add_argument("--workers", type=int, default=4, help="parallel connections (default 4)")
+    parser.add_argument("--chunk-mb", type=int, default=64, help="CSV chunk size in MB (default 64)")
+    parser.add_argument("--maintenance-work-mem", default="256MB", help="for the index rebuilds (default 256MB)")
+    parser.add_argument("--no-defer", action="store_true", help="keep indexes and keys in place during the load")
+    parser.add_argument("--deferred-sql", default="bulk_load_deferred.sql", help="where to save the rebuild statements")
+    parser.add_argument("--baseline-rows", type=int, default=2000,
+                        help="rows per table for the INSERT-per-row comparison, 0 to skip (default 2000)")
+    args = parser.parse_args()
+
+    if args.create:
+        if not args.database:
+            parser.error("--create needs --database")
+        with connect(args.dsn) as admin:
+            drop_database(admin, args.database)
+            create_database(admin, args.database)
+        with connect(args.dsn, dbname=args.database) as conn:
+            create_schema(conn)
+
+    with connect(args.dsn, dbname=args.database) as conn:
+        if os.path.isdir(args.source):
+            chunks = manifest_chunks(args.source, args.tables)
+        else:
+            if not args.table:
+                parser.error("--table is required for a CSV file")
+            columns = args.columns.split(",") if args.columns else None
+            chunks = csv_chunks(args.source, args.table, columns, args.chunk_mb << 20, args.header)
+        if not chunks:
+            print("Nothing to load")
+            return 1
+
+        tables = list(dict.fromkeys(chunk.table for chunk in chunks))
+        deferred = [] if args.no_defer else [item for table in tables for item in deferrable_objects(conn, table)]
+        if deferred:
+            with open(args.deferred_sql, "w") as f:
+                f.writelines(f"{rebuild};\n" for _, rebuild, _ in deferred)
+            with conn.transaction():
+                # Foreign keys first, so the keys they reference can be dropped
+                for drop, _, _ in sorted(deferred, key=lambda item: item[2] != "f"):
+                    conn.execute(drop)
+            print(f"Deferred {len(deferred)} index/key builds (rebuild SQL saved to {args.deferred_sql})")
+
+        print(f"Loading {len(chunks)} chunk(s) into {', '.join(tables)} with {args.workers} connections...")
+        total_bytes = sum(chunk.end - chunk.start for chunk in chunks)
+        loader = BulkLoader(args.dsn, args.database, args.workers, args.maintenance_work_mem)
+        loaded, timings = loader.run(chunks, [(rebuild, kind) for _, rebuild, kind in deferred])
+        if deferred:
+            os.remove(args.deferred_sql)
+
+        started = time.perf_counter()
+        for table in tables:
+            conn.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table)))
+        timings['analyze'] = time.perf_counter() - started
+
+        rows_by_table = {table: sum(item.rows for item in loaded if item.chunk.table == table) for table in tables}
+        baselines = {}
+        if args.baseline_rows:
+            for table in tables:
+                columns = next(chunk.columns for chunk in chunks if chunk.table == table) or table_columns(conn, table)
+                baselines[table] = insert_baseline(conn, table, columns, args.baseline_rows)
+
+    total_rows = sum(rows_by_table.values())
+    total_seconds = sum(timings.values())
+    copy_rate = total_rows / timings['copy'] if timings['copy'] else 0.0
+    print_table(
+        ["Table", "Chunks", "Rows", "MB", "COPY rows/s per conn", "INSERT rows/s"],
+        [(table, sum(1 for item in loaded if item.chunk.table == table), f"{rows_by_table[table]:,}",
+          f"{sum(item.chunk.end - item.chunk.start for item in loaded if item.chunk.table == table) / 1e6:.1f}",
+          f"{sum(item.rows for item in loaded if item.chunk.table == table) / max(sum(item.seconds for item in loaded if item.chunk.table == table), 1e-9):,.0f}",
+          f"{baselines[table]:,.0f}" if table in baselines else "-")
+         for table in tables],
+    )
+    print(f"\n✓ Loaded {total_rows:,} rows ({total_bytes / 1e6:.1f} MB)")
+    print(f"  COPY: {timings['copy']:.2f}s ({copy_rate:,.0f} rows/s across {args.workers} connections)")
+    print(f"  Index/key rebuild: {timings['rebuild']:.2f}s, ANALYZE: {timings['analyze']:.2f}s")
+    print(f"  End to end: {total_seconds:.2f}s ({total_rows / total_seconds:,.0f} rows/s)")
+    if baselines:
+        insert_rate = sum(baselines.values()) / len(baselines)
+        print(f"  INSERT per row: {insert_rate:,.0f} rows/s -> bulk load is {total_rows / total_seconds / insert_rate:.0f}x faster")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Capture EXPLAIN ANALYZE plans for every SELECT in the solution material and
+flag plan-shape changes and latency regressions against a stored baseline.
+
+The queries come from sql_snippets (solutions PDF, study-guide deck and the
+assignment scripts): every SELECT that reads one of the course tables and
+calls nothing with side effects (pg_terminate_backend, nextval, ...). They
+run against a course database built by course_schema at --scale, each one
+`EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)` once to warm the cache and then
+--runs times, inside a rolled-back transaction.
+
+Each query is keyed by a hash of its normalized text, so baselines survive
+edits that only move it around in its file. The corpus for a scale is
+stored as plan_baselines/plans_s<scale>.json, with the full JSON plan, its
+shape (node types, relations and indexes), the median execution and
+planning time, and buffer counts.
+
+Usage:
+    python capture_query_plans.py --scale 10 --update-baseline
+    python capture_query_plans.py --scale 10            # compare with the baseline
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+
+import psycopg
+
+from pg_local import add_connection_arguments, connect, print_table
+from course_schema import build_course_database
+from sql_snippets import collect_snippets, snippet_statements, first_keyword
+
+COURSE_TABLES = ("library_books", "students", "products", "sample_table", "orders")
+COURSE_TABLE_RE = re.compile(r"\b(" + "|".join(COURSE_TABLES) + r")\b", re.IGNORECASE)
+SIDE_EFFECT_RE = re.compile(
+    r"\b(pg_terminate_backend|pg_cancel_backend|nextval|setval|pg_sleep|pg_reload_conf)\s*\(",
+    re.IGNORECASE,
+)
+
+def normalize(sql):
+    """Whitespace-insensitive form of a query, used for its identity."""
+    return " ".join(sql.split())
+
+def query_id(sql):
+    return hashlib.sha1(normalize(sql).encode("utf-8")).hexdigest()[:12]
+
+def collect_queries():
+    """Distinct read-only SELECTs on course tables, with their first source location."""
+    queries = {}
+    for snippet in collect_snippets():
+        for statement in snippet_statements(snippet):
+            if statement.kind != "sql" or first_keyword(statement.sql) not in ("SELECT", "WITH"):
+                continue
+            if not COURSE_TABLE_RE.search(statement.sql) or SIDE_EFFECT_RE.search(statement.sql):
+                continue
+            key = query_id(statement.sql)
+            queries.setdefault(key, {'id': key, 'sql': statement.sql,
+                                     'source': f"{snippet.source}:{statement.line}"})
+    return list(queries.values())
+
+def plan_shape(node):
+    """Node types with their relation/index, nested; ignores costs and row counts."""
+    label = node["Node Type"]
+    if "Index Name" in node:
+        label += f" using {node['Index Name']}"
+    if "Relation Name" in node:
+        label += f" on {node['Relation Name']}"
+    children = [plan_shape(child) for child in node.get("Plans", [])]
+    return label + (" (" + ", ".join(children) + ")" if children else "")
+
+def explain(conn, sql, runs):
+    """Run EXPLAIN ANALYZE runs times after a warm-up; returns the measurements for one query."""
+    executions = []
+    plannings = []
+    plan = None
+    for run in range(runs + 1):
+        with conn.transaction(force_rollback=True):
+            output = conn.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql).fetchone()[0]
+        result = output[0] if isinstance(output, list) else json.loads(output)[0]
+        if run == 0:
+            continue
+        executions.append(result["Execution Time"])
+        plannings.append(result["Planning Time"])
+        plan = result["Plan"]
+
+    return {
+        'shape': plan_shape(plan),
+        'execution_ms': round(statistics.median(executions), 3),
+        'planning_ms': round(statistics.median(plannings), 3),
+        'rows': plan.get("Actual Rows"),
+        'shared_hit_blocks': plan.get("Shared Hit Blocks"),
+        'shared_read_blocks': plan.get("Shared Read Blocks"),
+        'plan': plan,
+    }
+
+def capture(conn, queries, runs):
+    """Measure every query; returns ({id: entry}, [(query, error)])."""
+    corpus = {}
+    errors = []
+    for query in queries:
+        try:
+            entry = explain(conn, query['sql'], runs)
+        except psycopg.Error as exc:
+            errors.append((query, (exc.diag.message_primary or str(exc)).strip()))
+            continue
+        entry.update(query)
+        corpus[query['id']] = entry
+    return corpus, errors
+
+def compare(corpus, baseline, threshold, min_delta_ms):
+    """Return (entry, status, detail) rows; status is ok, new, PLAN CHANGED or SLOWER."""
+    rows = []
+    for key, entry in corpus.items():
+        previous = baseline.get(key)
+        if previous is None:
+            rows.append((entry, "new", ""))
+        elif previous['shape'] != entry['shape']:
+            rows.append((entry, "PLAN CHANGED", f"was: {previous['shape']}"))
+        elif (entry['execution_ms'] > previous['execution_ms'] * (1 + threshold)
+              and entry['execution_ms'] - previous['execution_ms'] > min_delta_ms):
+            rows.append((entry, "SLOWER", f"{previous['execution_ms']:.2f} → {entry['execution_ms']:.2f} ms"))
+        else:
+            rows.append((entry, "ok", ""))
+    return rows
+
+def baseline_path(baseline_dir, scale):
+    return os.path.join(baseline_dir, f"plans_s{scale:g}.json")
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture and compare EXPLAIN ANALYZE plans for the solution queries.")
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", type=float, default=1, help="data scale for course_schema (default 1)")
+    parser.add_argument("--runs", type=int, default=5, help="EXPLAIN ANALYZE runs per query; the median is kept")
+    parser.add_argument("--baseline-dir", default="plan_baselines", help="directory of the baseline corpus")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="relative latency growth flagged as a regression (default 0.5)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="ignore latency changes smaller than this (default 2 ms)")
+    parser.add_argument("--reuse-db", action="store_true", help="reuse an existing plans_s<scale> database")
+    args = parser.parse_args()
+
+    dbname = f"plans_s{args.scale:g}".replace(".", "_")
+    queries = collect_queries()
+    print(f"Found {len(queries)} SELECT queries on course tables")
+
+    if not args.reuse_db:
+        print(f"Loading {dbname} at scale {args.scale:g}...")
+        build_course_database(args.dsn, dbname, args.scale)
+
+    with connect(args.dsn, dbname=dbname, autocommit=False) as conn:
+        conn.execute("SET statement_timeout = '5min'")
+        corpus, errors = capture(conn, queries, args.runs)
+        conn.rollback()
+
+    for query, message in errors:
+        print(f"✗ {query['source']}: {message}")
+
+    path = baseline_path(args.baseline_dir, args.scale)
+    baseline = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+
+    rows = compare(corpus, baseline, args.threshold, args.min_delta_ms)
+    print_table(
+        ["Query", "Source", "Exec ms", "Plan ms", "Top node", "Status"],
+        [(entry['id'], entry['source'], f"{entry['execution_ms']:.2f}", f"{entry['planning_ms']:.2f}",
+          entry['shape'].split(" (")[0][:40], status) for entry, status, _ in rows],
+    )
+    flagged = [(entry, status, detail) for entry, status, detail in rows if status in ("PLAN CHANGED", "SLOWER")]
+    for entry, status, detail in flagged:
+        print(f"✗ {status}: {entry['source']} [{entry['id']}]")
+        print(f"    now: {entry['shape']}")
+        print(f"    {detail}")
+
+    if args.update_baseline:
+        os.makedirs(args.baseline_dir, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(corpus, f, indent=2)
+        print(f"\n✓ Baseline written: {path} ({len(corpus)} plans)")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {path}; run with --update-baseline to record one.")
+        return 0
+    print(f"\n{len(flagged)} of {len(rows)} queries changed plan or regressed")
+    return 1 if flagged else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Sweep server settings over the course workloads and rank them per workload.
+
+Ch02 lists the memory and WAL knobs without saying which values pay off for
+this material. This harness creates its own PostgreSQL instance (initdb
+into --data-dir) and restarts it once per configuration with:
+  • shared_buffers, work_mem, maintenance_work_mem, max_wal_size and
+    effective_io_concurrency, each from its list of values
+By default each knob is varied on its own from a baseline made of the
+first value of every list. --grid runs every combination instead.
+
+On each start it builds the course database at --scale and replays:
+  • bulk_load - course_schema's server-side load into the tables of
+                assignment2solution and assignment3solutionFTS, with the FTS
+                trigger and GIN index in place, then GIN index builds on
+                students.skills and products.details->'tags'
+  • fts       - fts_read_benchmark's search sessions (ts_rank, keyset pages)
+  • array     - the skills @> ARRAY[...] query of assignment2solution, and
+                one array_append UPDATE per --write-every queries
+  • jsonb     - details->'tags' ? tag, and the details || '{"stock": n}'
+                UPDATE as the write
+Query workloads run on --clients connections and count server-side, so the
+client does not limit them. --rounds repeats the whole sweep, interleaved,
+and keeps the median of every measurement.
+
+The report ranks the configurations of every workload by throughput, with
+p50/p95 latency and the change against the baseline. It ends with the best
+settings for each workload, and flags a winner that is within the
+baseline's run-to-run spread.
+
+initdb and postgres refuse to run as root; pass --run-as with a user that
+can write --data-dir.
+
+Usage:
+    python config_sweep.py --scale 20 --rounds 3 --shared-buffers 128MB 1GB --work-mem 4MB 64MB
+    python config_sweep.py --grid --scale 5 --data-dir /tmp/sweep --run-as postgres
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pg_local import LocalCluster, connect, print_table
+from course_schema import BASE_ROWS, SKILLS, TAGS, build_course_database
+from fts_read_benchmark import build_sessions, run_workload, summarize
+
+DBNAME = "sweep_course"
+WORKLOADS = ["bulk_load", "fts", "array", "jsonb"]
+
+# Knob -> (option, default values); the first value is the baseline
+KNOBS = {
+    'shared_buffers': ("--shared-buffers", ["128MB", "512MB", "1GB"]),
+    'work_mem': ("--work-mem", ["4MB", "64MB"]),
+    'maintenance_work_mem': ("--maintenance-work-mem", ["64MB", "512MB"]),
+    'max_wal_size': ("--max-wal-size", ["1GB", "4GB"]),
+    'effective_io_concurrency': ("--effective-io-concurrency", ["1", "64"]),
+}
+
+INDEX_SQL = [
+    "CREATE INDEX students_skills_gin ON students USING GIN (skills)",
+    "CREATE INDEX products_tags_gin ON products USING GIN ((details->'tags'))",
+]
+
+ARRAY_READ = "SELECT count(*) FROM students WHERE skills @> ARRAY[%s]"
+ARRAY_WRITE = "UPDATE students SET skills = array_append(skills, %s) WHERE student_id = %s"
+JSONB_READ = "SELECT count(*) FROM products WHERE details->'tags' ? %s"
+JSONB_WRITE = "UPDATE products SET details = details || jsonb_build_object('stock', %s::int) WHERE product_id = %s"
+
+# Query workload -> (read, write, read values by frequency, value for a write)
+QUERY_WORKLOADS = {
+    'array': (ARRAY_READ, ARRAY_WRITE, SKILLS, lambda rng: rng.choice(SKILLS)),
+    'jsonb': (JSONB_READ, JSONB_WRITE, TAGS, lambda rng: rng.randint(0, 100)),
+}
+
+def configurations(values, grid=False):
+    """Settings dicts to run: the baseline and one change at a time, or the full grid."""
+    names = list(values)
+    if grid:
+        return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+    baseline = {name: values[name][0] for name in names}
+    result = [baseline]
+    for name in names:
+        for value in values[name][1:]:
+            result.append(dict(baseline, **{name: value}))
+    return result
+
+def label(settings, baseline):
+    changed = [f"{name}={value}" for name, value in settings.items() if baseline.get(name) != value]
+    return " ".join(changed) or "baseline"
+
+def bulk_load(dsn, scale):
+    started = time.perf_counter()
+    rows = build_course_database(dsn, DBNAME, scale, verbose=False)
+    load_seconds = time.perf_counter() - started
+    with connect(dsn, dbname=DBNAME) as conn:
+        started = time.perf_counter()
+        for statement in INDEX_SQL:
+            conn.execute(statement)
+        index_seconds = time.perf_counter() - started
+        conn.execute("ANALYZE students, products")
+    # Five tables of rows each
+    return {'throughput': 5 * rows / load_seconds, 'unit': "rows/s", 'seconds': load_seconds,
+            'index_seconds': index_seconds, 'p50_ms': None, 'p95_ms': None}
+
+class _ClientState(threading.local):
+    conn = None
+
+def replay(dsn, operations, clients):
+    """Run (sql, params) operations on clients connections; returns (latencies in ms, seconds)."""
+    state = _ClientState()
+    connections = []
+    lock = threading.Lock()
+
+    def init_client():
+        state.conn = connect(dsn, dbname=DBNAME)
+        with lock:
+            connections.append(state.conn)
+
+    def run(operation):
+        started = time.perf_counter()
+        state.conn.execute(*operation)
+        return (time.perf_counter() - started) * 1000
+
+    try:
+        with ThreadPoolExecutor(max_workers=clients, initializer=init_client) as pool:
+            started = time.perf_counter()
+            latencies = list(pool.map(run, operations))
+            return latencies, time.perf_counter() - started
+    finally:
+        for conn in connections:
+            conn.close()
+
+def query_operations(workload, count, max_id, write_every, seed=42):
+    """count reads with values drawn by rank (Zipf-like), and a write after every write_every of them."""
+    read, write, values, write_value = QUERY_WORKLOADS[workload]
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(values))]
+    operations = []
+    for number in range(1, count + 1):
+        operations.append((read, [rng.choices(values, weights)[0]]))
+        if write_every and number % write_every == 0:
+            operations.append((write, [write_value(rng), rng.randint(1, max_id)]))
+    return operations
+
+def summarize_latencies(latencies, seconds):
+    p50, p95 = (float(value) for value in np.percentile(latencies, [50, 95]))
+    return {'throughput': len(latencies) / seconds, 'unit': "ops/s", 'p50_ms': p50, 'p95_ms': p95}
+
+def run_configuration(cluster, settings, args):
+    cluster.start(settings)
+    try:
+        dsn = cluster.dsn
+        with connect(dsn) as conn:
+            actual = {name: conn.execute(f"SHOW {name}").fetchone()[0] for name in settings}
+        results = {'settings': settings, 'actual': actual}
+        results['bulk_load'] = bulk_load(dsn, args.scale)
+        max_id = int(BASE_ROWS * args.scale)
+
+        if "fts" in args.workloads:
+            sessions = build_sessions(args.sessions, {'and': 1, 'or': 1, 'phrase': 1})
+            samples, seconds = run_workload(dsn, DBNAME, sessions, "ts_rank", "keyset", args.clients, args.pages, 20)
+            fts = summarize(samples, seconds, args.pages)
+            results['fts'] = {'throughput': fts['qps'], 'unit': "pages/s", 'p50_ms': fts['p50_ms'],
+                              'p95_ms': fts['p95_ms']}
+        for workload in QUERY_WORKLOADS:
+            if workload in args.workloads:
+                operations = query_operations(workload, args.queries, max_id, args.write_every)
+                results[workload] = summarize_latencies(*replay(dsn, operations, args.clients))
+    finally:
+        cluster.stop()
+    return results
+
+def combine(runs, workloads):
+    """One result per configuration from its rounds: the median of every measurement, and the spread of throughput."""
+    result = {'settings': runs[0]['settings'], 'actual': runs[0]['actual'], 'rounds': len(runs)}
+    for workload in workloads:
+        measured = [run[workload] for run in runs]
+        merged = dict(measured[0])
+        for key, value in measured[0].items():
+            if isinstance(value, float):
+                merged[key] = float(np.median([item[key] for item in measured]))
+        throughputs = [item['throughput'] for item in measured]
+        merged['spread'] = (max(throughputs) - min(throughputs)) / merged['throughput']
+        result[workload] = merged
+    return result
+
+def _ms(value):
+    return "-" if value is None else f"{value:.2f}"
+
+def report(results, baseline, workloads):
+    base = next((result for result in results if result['settings'] == baseline), None)
+    best = []
+    for workload in workloads:
+        ranked = sorted(results, key=lambda result: result[workload]['throughput'], reverse=True)
+        unit = ranked[0][workload]['unit']
+        print(f"\n{workload} (ranked by {unit})")
+        rows = []
+        for rank, result in enumerate(ranked, start=1):
+            measured = result[workload]
+            change = "-"
+            if base is not None:
+                change = f"{(measured['throughput'] / base[workload]['throughput'] - 1) * 100:+.1f}%"
+            extra = f"{measured['index_seconds']:.2f}" if workload == "bulk_load" else "-"
+            rows.append((rank, label(result['settings'], baseline), f"{measured['throughput']:,.0f}",
+                         f"{measured['spread'] * 100:.0f}%", _ms(measured['p50_ms']), _ms(measured['p95_ms']), extra,
+                         change))
+        print_table(["#", "Settings", unit, "Spread", "p50 ms", "p95 ms", "Index build s", "vs baseline"], rows)
+        top = ranked[0]
+        best.append((workload, label(top['settings'], baseline), f"{top[workload]['throughput']:,.0f} {unit}",
+                     rows[0][-1]))
+
+    print("\nBest settings per workload")
+    print_table(["Workload", "Settings", "Throughput", "vs baseline"], best)
+    for workload, settings, _, change in best:
+        noise = max(0.05, base[workload]['spread']) if base is not None else 0.05
+        if change != "-" and settings != "baseline" and abs(float(change.rstrip("%"))) < noise * 100:
+            print(f"✗ {workload}: the best setting is within {noise * 100:.0f}% of the baseline, "
+                  f"the run-to-run noise; treat it as a tie")
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank server settings by throughput on the course workloads.")
+    for name, (option, values) in KNOBS.items():
+        parser.add_argument(option, nargs="+", default=values, help=f"{name} values (default {' '.join(values)})")
+    parser.add_argument("--grid", action="store_true", help="every combination instead of one knob at a time")
+    parser.add_argument("--rounds", type=int, default=1, help="passes over all configurations; medians are kept")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS,
+                        help="workloads to run; bulk_load always runs to build the data")
+    parser.add_argument("--scale", type=float, default=10, help="course_schema scale (default 10)")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent clients for the query workloads")
+    parser.add_argument("--queries", type=int, default=2000, help="reads per array and jsonb run (default 2000)")
+    parser.add_argument("--write-every", type=int, default=10, help="one UPDATE per this many reads; 0 none")
+    parser.add_argument("--sessions", type=int, default=200, help="FTS search sessions (default 200)")
+    parser.add_argument("--pages", type=int, default=3, help="pages per FTS session (default 3)")
+    parser.add_argument("--data-dir", default=os.path.join("bench_work", "sweep_cluster"), help="cluster directory")
+    parser.add_argument("--port", type=int, default=55432, help="port of the sweep cluster (default 55432)")
+    parser.add_argument("--bin-dir", default=None, help="directory of initdb/pg_ctl")
+    parser.add_argument("--run-as", default=None, help="OS user to run initdb and the server as")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    values = {name: getattr(args, option[2:].replace("-", "_")) for name, (option, _) in KNOBS.items()}
+    configs = configurations(values, args.grid)
+    baseline = {name: values[name][0] for name in values}
+
+    # Rounds interleave the configurations, so drift over time does not favour one of them
+    runs = {index: [] for index in range(len(configs))}
+    workloads = ["bulk_load"] + [workload for workload in args.workloads if workload != "bulk_load"]
+    with LocalCluster(args.data_dir, args.port, args.bin_dir, args.run_as) as cluster:
+        for round_number in range(1, args.rounds + 1):
+            for index, settings in enumerate(configs):
+                print(f"[round {round_number}/{args.rounds}, {index + 1}/{len(configs)}] "
+                      f"{label(settings, baseline)}...")
+                try:
+                    runs[index].append(run_configuration(cluster, settings, args))
+                except RuntimeError as error:
+                    print(f"✗ Could not run {label(settings, baseline)}: {error}")
+
+    results = [combine(found, workloads) for found in runs.values() if found]
+    if not results:
+        return 1
+    report(results, baseline, args.workloads)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'baseline': baseline, 'results': results}, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
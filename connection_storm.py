@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Open a storm of connections as one role, kill them in batches, and measure
+how long the sessions take to drain and the clients take to come back.
+
+Question 1c kills every session of a role with one statement:
+
+    SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+    WHERE usename = 'dev_user' AND pid <> pg_backend_pid();
+
+Before doing that to a busy production role, this harness rehearses it
+locally. --clients asyncio clients log in as --role and run `SELECT 1` every
+--think-ms. The role's backends are then terminated in batches of
+--batch-size, never including the terminating session's own pid. The clients
+reconnect, with jittered exponential backoff starting at --backoff-ms
+(0 reconnects immediately, which is the storm). It is run in two modes:
+  • direct  - every client holds its own server connection
+  • pooled  - clients share --pool-size connections through an in-process
+              front end, as they would behind pgbouncer
+
+For each mode the report shows:
+  • connect time: how long until every client's first query succeeded
+  • terminate time: the batched pg_terminate_backend() calls
+  • drain time: until none of the terminated pids is in pg_stat_activity
+  • recovery: for the clients that lost their connection, from the kill
+    to their next successful query (median), and until every terminated
+    connection was replaced and every affected client served again
+  • reconnect attempts, failed connects and failed queries, and the peak
+    number of the role's backends during recovery
+
+The role is created (LOGIN, no password) when it does not exist. Direct mode
+needs --clients free connection slots. Raise max_connections (and `ulimit -n`)
+to rehearse thousands of clients.
+
+Usage:
+    python connection_storm.py --role dev_user --clients 200 --pool-size 20
+    python connection_storm.py --clients 2000 --modes pooled --backoff-ms 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import statistics
+import sys
+import time
+
+import psycopg
+from psycopg import sql
+
+from pg_local import add_connection_arguments, connect, connect_async, print_table
+
+MODES = ["direct", "pooled"]
+
+# Soft open-files limit to ask for when the hard limit is unlimited
+MAX_OPEN_FILES = 1 << 20
+
+ROLE_PIDS_SQL = "SELECT pid FROM pg_stat_activity WHERE usename = %s AND pid <> pg_backend_pid() ORDER BY pid"
+TERMINATE_SQL = "SELECT count(*) FILTER (WHERE pg_terminate_backend(pid)) FROM unnest(%s::integer[]) AS pid"
+REMAINING_SQL = "SELECT count(*) FROM pg_stat_activity WHERE pid = ANY(%s::integer[])"
+ROLE_BACKENDS_SQL = "SELECT count(*) FROM pg_stat_activity WHERE usename = %s"
+
+class Stats:
+    """Counters shared by the clients of one run; asyncio needs no locking."""
+
+    def __init__(self, clients):
+        self.clients = clients
+        self.connected = set()
+        self.connect_attempts = 0
+        self.failed_connects = 0
+        self.failed_queries = 0
+        self.kill_started = None
+        self.attempts_at_kill = 0
+        self.replaced = 0
+        self.lost = set()
+        self.recovered = {}
+
+    def query_ok(self, client):
+        self.connected.add(client)
+        if client in self.lost and client not in self.recovered:
+            self.recovered[client] = time.perf_counter() - self.kill_started
+
+    def query_failed(self, client):
+        self.failed_queries += 1
+        if self.kill_started is not None:
+            self.lost.add(client)
+
+    def settled(self, terminated):
+        """Every terminated connection replaced, and every client that lost one served again."""
+        return self.replaced >= terminated and len(self.recovered) == len(self.lost)
+
+def backoff_delay(attempt, base, cap=2.0):
+    """Full-jitter exponential backoff in seconds; 0 when base is 0."""
+    if not base or not attempt:
+        return 0.0
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+async def open_connection(conninfo, stats, backoff, stop):
+    """Connect, retrying with backoff until it works; None once stop is set."""
+    attempt = 0
+    while not stop.is_set():
+        await asyncio.sleep(backoff_delay(attempt, backoff))
+        if stop.is_set():
+            break
+        stats.connect_attempts += 1
+        try:
+            return await connect_async(**conninfo)
+        except psycopg.OperationalError:
+            stats.failed_connects += 1
+            attempt += 1
+    return None
+
+class FrontEndPool:
+    """A fixed set of server connections shared by many clients, like a pgbouncer in transaction mode."""
+
+    def __init__(self, conninfo, size, stats, backoff, stop):
+        self.conninfo = conninfo
+        self.size = size
+        self.stats = stats
+        self.backoff = backoff
+        self.stop = stop
+        self._idle = asyncio.Queue()
+
+    async def open(self):
+        for conn in await asyncio.gather(*[open_connection(self.conninfo, self.stats, self.backoff, self.stop)
+                                           for _ in range(self.size)]):
+            self._idle.put_nowait(conn)
+
+    async def execute(self, query):
+        conn = await self._idle.get()
+        try:
+            await conn.execute(query)
+        except psycopg.OperationalError:
+            # The server side was killed: replace it before handing it back
+            await conn.close()
+            conn = await open_connection(self.conninfo, self.stats, self.backoff, self.stop)
+            if conn is not None:
+                self.stats.replaced += 1
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put_nowait(conn)
+
+    async def close(self):
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()
+
+async def direct_client(client, conninfo, stats, stop, think, backoff):
+    conn = await open_connection(conninfo, stats, backoff, stop)
+    if conn is None:
+        return
+    try:
+        while not stop.is_set():
+            try:
+                await conn.execute("SELECT 1")
+                stats.query_ok(client)
+            except psycopg.OperationalError:
+                stats.query_failed(client)
+                await conn.close()
+                conn = await open_connection(conninfo, stats, backoff, stop)
+                if conn is None:
+                    return
+                stats.replaced += 1
+                continue
+            await asyncio.sleep(think)
+    finally:
+        if conn is not None:
+            await conn.close()
+
+async def pooled_client(client, pool, stats, stop, think):
+    while not stop.is_set():
+        try:
+            await pool.execute("SELECT 1")
+            stats.query_ok(client)
+        except psycopg.OperationalError:
+            stats.query_failed(client)
+            continue
+        await asyncio.sleep(think)
+
+async def wait_until(predicate, timeout, poll=0.005, on_poll=None):
+    """Poll predicate until true; returns the seconds taken, or None on timeout."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if on_poll is not None:
+            await on_poll()
+        if await predicate():
+            return time.perf_counter() - started
+        await asyncio.sleep(poll)
+    return None
+
+async def terminate_role(admin, role, batch_size, pause):
+    """pg_terminate_backend() every session of role but our own, batch_size pids per statement."""
+    pids = [row[0] for row in await (await admin.execute(ROLE_PIDS_SQL, [role])).fetchall()]
+    terminated = 0
+    for start in range(0, len(pids), batch_size):
+        cursor = await admin.execute(TERMINATE_SQL, [pids[start:start + batch_size]])
+        terminated += (await cursor.fetchone())[0]
+        if pause:
+            await asyncio.sleep(pause)
+    return pids, terminated
+
+async def run_mode(args, mode):
+    conninfo = {'dsn': args.dsn, 'dbname': args.database, 'user': args.role}
+    stats = Stats(args.clients)
+    stop = asyncio.Event()
+    think = args.think_ms / 1000
+    backoff = args.backoff_ms / 1000
+    result = {'mode': mode, 'clients': args.clients}
+
+    admin = await connect_async(args.dsn, dbname=args.database)
+    pool = None
+    started = time.perf_counter()
+    if mode == "pooled":
+        pool = FrontEndPool(conninfo, args.pool_size, stats, backoff, stop)
+        await pool.open()
+        tasks = [asyncio.create_task(pooled_client(client, pool, stats, stop, think))
+                 for client in range(args.clients)]
+    else:
+        tasks = [asyncio.create_task(direct_client(client, conninfo, stats, stop, think, backoff))
+                 for client in range(args.clients)]
+
+    async def everyone_connected():
+        return len(stats.connected) == args.clients
+
+    async def role_backends():
+        return (await (await admin.execute(ROLE_BACKENDS_SQL, [args.role])).fetchone())[0]
+
+    try:
+        connected = await wait_until(everyone_connected, args.timeout)
+        result['connect_seconds'] = None if connected is None else time.perf_counter() - started
+        result['backends'] = await role_backends()
+        result['failed_connects_initial'] = stats.failed_connects
+
+        stats.kill_started = time.perf_counter()
+        stats.attempts_at_kill = stats.connect_attempts
+        pids, result['terminated'] = await terminate_role(admin, args.role, args.batch_size, args.batch_pause_ms / 1000)
+        result['terminate_seconds'] = time.perf_counter() - stats.kill_started
+
+        async def drained():
+            return (await (await admin.execute(REMAINING_SQL, [pids])).fetchone())[0] == 0
+
+        peak = [0]
+
+        async def track_peak():
+            peak[0] = max(peak[0], await role_backends())
+
+        async def settled():
+            return stats.settled(result['terminated'])
+
+        drain = await wait_until(drained, args.timeout)
+        result['drain_seconds'] = None if drain is None else time.perf_counter() - stats.kill_started
+        recovery = await wait_until(settled, args.timeout, poll=0.01, on_poll=track_peak)
+        result['recovery_seconds'] = None if recovery is None else time.perf_counter() - stats.kill_started
+        result['peak_backends'] = peak[0]
+    finally:
+        stop.set()
+        # A client can still be inside a connect or query; cancel whatever has not finished shortly after
+        _, pending = await asyncio.wait(tasks, timeout=5)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if pool is not None:
+            await pool.close()
+        await admin.close()
+
+    recovery = list(stats.recovered.values())
+    result['affected'] = len(stats.lost)
+    result['recovered'] = len(recovery)
+    result['recovery_p50_seconds'] = statistics.median(recovery) if recovery else None
+    result['reconnect_attempts'] = stats.connect_attempts - stats.attempts_at_kill
+    result['failed_connects'] = stats.failed_connects
+    result['failed_queries'] = stats.failed_queries
+    return result
+
+def ensure_role(dsn, database, role):
+    with connect(dsn, dbname=database) as admin:
+        if not admin.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", [role]).fetchone():
+            admin.execute(sql.SQL("CREATE ROLE {} LOGIN").format(sql.Identifier(role)))
+            print(f"✓ Created role {role}")
+        free = admin.execute("""
+            SELECT current_setting('max_connections')::int
+                 - current_setting('superuser_reserved_connections')::int
+                 - (SELECT count(*) FROM pg_stat_activity WHERE backend_type = 'client backend')
+        """).fetchone()[0]
+    return free
+
+def raise_file_limit():
+    """Every connection is a socket; lift the soft open-files limit to the hard one.
+
+    An unlimited hard limit is capped at MAX_OPEN_FILES, which the kernel accepts (macOS rejects
+    an unlimited soft limit). If the limit cannot be raised, the run continues at the current one.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return MAX_OPEN_FILES
+    target = MAX_OPEN_FILES if hard == resource.RLIM_INFINITY else min(hard, MAX_OPEN_FILES)
+    if soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError) as error:
+            print(f"✗ Could not raise the open-files limit to {target} ({error}); keeping {soft}")
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+def _seconds(value):
+    return "timeout" if value is None else f"{value:.3f}"
+
+def report(results):
+    print_table(
+        ["Mode", "Clients", "Server conns", "Connect s", "Terminate s", "Drain s", "Affected", "Recovery p50 s",
+         "Recovered s", "Reconnects", "Peak conns", "Failed connects", "Failed queries"],
+        [(result['mode'], result['clients'], result['backends'], _seconds(result['connect_seconds']),
+          f"{result['terminate_seconds']:.3f}", _seconds(result['drain_seconds']), result['affected'],
+          _seconds(result['recovery_p50_seconds']), _seconds(result['recovery_seconds']),
+          result['reconnect_attempts'], result['peak_backends'], result['failed_connects'], result['failed_queries'])
+         for result in results],
+    )
+    for result in results:
+        mark = "✓" if result['recovery_seconds'] is not None else "✗"
+        print(f"{mark} {result['mode']}: {result['terminated']} sessions terminated, "
+              f"{result['recovered']}/{result['affected']} affected clients recovered")
+
+def main():
+    parser = argparse.ArgumentParser(description="Rehearse killing every session of a role under a connection storm.")
+    add_connection_arguments(parser)
+    parser.add_argument("--role", default="dev_user", help="role the clients log in as (default dev_user)")
+    parser.add_argument("--database", default="postgres", help="database the clients connect to")
+    parser.add_argument("--clients", type=int, default=200, help="concurrent clients (default 200)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--pool-size", type=int, default=20, help="server connections behind the pooled front end")
+    parser.add_argument("--think-ms", type=float, default=100, help="pause between a client's queries (default 100)")
+    parser.add_argument("--backoff-ms", type=float, default=0,
+                        help="base reconnect backoff; 0 reconnects immediately (default 0)")
+    parser.add_argument("--batch-size", type=int, default=100, help="pids per pg_terminate_backend statement")
+    parser.add_argument("--batch-pause-ms", type=float, default=0, help="pause between terminate batches")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for connect, drain and recovery")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    files = raise_file_limit()
+    free = ensure_role(args.dsn, args.database, args.role)
+    needed = {'direct': args.clients, 'pooled': args.pool_size}
+    # Only the server connections are sockets: one per client direct, the pool's size pooled
+    sockets = max(needed[mode] for mode in args.modes)
+    if sockets + 10 > files:
+        print(f"✗ Only {files} open files allowed; raise `ulimit -n` for {sockets} server connections")
+        return 1
+
+    results = []
+    for mode in args.modes:
+        if needed[mode] > free:
+            print(f"✗ Skipping {mode}: needs {needed[mode]} connections, the server has {free} free "
+                  f"(raise max_connections)")
+            continue
+        print(f"Running {mode} with {args.clients} clients as {args.role}...")
+        results.append(asyncio.run(run_mode(args, mode)))
+
+    if results:
+        report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
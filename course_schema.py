@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+The course's sample schema, and a server-side loader for it at any scale.
+
+The tables combine what the material creates:
+  • library_books  - assignment2solution (author, dates) and
+                     assignment3solutionFTS (description, fulltext tsvector)
+  • students       - assignment2solution, skills TEXT[]
+  • products       - assignment2solution, details JSONB with a tags array
+  • sample_table   - Questions 3a-3l, including birthdate, last_login and
+                     interests INTEGER[]
+  • orders         - Question 3g, keyed by sample_sequence
+
+populate() fills them with generate_series() inside the server, so no rows
+cross the network. Word frequencies are skewed so that common terms
+('classic', 'novel', 'SQL', 'electronics') match many rows and rare ones few.
+
+    python course_schema.py --scale 10      # create course_s10 with 10x rows
+"""
+
+import argparse
+import time
+
+from pg_local import add_connection_arguments, connect, create_database, drop_database
+
+# Rows per table at scale 1
+BASE_ROWS = 10_000
+
+SCHEMA_SQL = """
+CREATE TABLE library_books (
+    book_id SERIAL PRIMARY KEY,
+    title VARCHAR(200) NOT NULL,
+    author TEXT,
+    description TEXT NOT NULL,
+    published_date DATE,
+    available_time TIME,
+    fulltext TSVECTOR
+);
+
+CREATE TABLE students (
+    student_id SERIAL PRIMARY KEY,
+    full_name TEXT,
+    skills TEXT[]
+);
+
+CREATE TABLE products (
+    product_id SERIAL PRIMARY KEY,
+    details JSONB
+);
+
+CREATE TABLE sample_table (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(50),
+    age NUMERIC(4, 2),
+    description TEXT,
+    birthdate DATE,
+    last_login TIMESTAMP WITH TIME ZONE,
+    interests INTEGER[]
+);
+
+CREATE SEQUENCE sample_sequence START WITH 100 INCREMENT BY 10;
+
+CREATE TABLE orders (
+    id INTEGER DEFAULT nextval('sample_sequence'),
+    product VARCHAR(100)
+);
+"""
+
+# Full-text setup exactly as assignment3solutionFTS does it
+FTS_SQL = """
+UPDATE library_books SET fulltext =
+setweight(to_tsvector(COALESCE(title,'')),'A') ||
+setweight(to_tsvector(COALESCE(description,'')),'B');
+
+CREATE TRIGGER library_books_fulltextsearch_trigge
+BEFORE INSERT OR UPDATE OF title,description ON library_books
+FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger
+(fulltext,'pg_catalog.english',title,description);
+
+CREATE INDEX ix_library_books_fts_gin ON library_books
+USING GIN(fulltext);
+"""
+
+# Ordered most to least frequent; pick() skews towards the front
+WORDS = ("classic novel science fiction adventure fantasy the of a about by dystopian "
+         "journey quest captain island mystery history war love ocean mountain desert "
+         "planet empire wizard dragon detective murder survival political intrigue "
+         "machine future ancient kingdom forest river storm winter summer shadow").split()
+SKILLS = ["SQL", "Database", "Programming", "Data Science", "Web Development", "Computing",
+          "Communication", "Mobile Development", "Linear Algebra", "Statistics", "Networking",
+          "Security", "Cloud", "DevOps", "Machine Learning", "UX Design"]
+TAGS = ["electronics", "gadgets", "mobile", "computers", "audio", "wearables", "home",
+        "kitchen", "outdoor", "toys", "books", "office", "gaming", "camera", "fitness", "garden"]
+PRODUCT_NAMES = ["Smartphone", "Laptop", "Wireless Earbuds", "Apple Watch", "Tablet", "Monitor",
+                 "Keyboard", "Camera", "Speaker", "Router"]
+
+def _array_literal(values):
+    return "ARRAY[" + ", ".join("'" + value.replace("'", "''") + "'" for value in values) + "]"
+
+def _pick(array, skew=3):
+    """SQL expression choosing an element of array, skewed towards the front."""
+    return f"({array})[1 + floor(power(random(), {skew}) * array_length({array}, 1))::int]"
+
+def _words(count_expr, skew=1.5):
+    """SQL expression for a space-separated run of skewed random words."""
+    words = _array_literal(WORDS)
+    return (f"(SELECT string_agg({_pick(words, skew)}, ' ') "
+            f"FROM generate_series(1, {count_expr}) AS w(n) WHERE g.g > 0)")
+
+def _distinct_pick(array, count_expr, skew=1.5):
+    """SQL expression for an array of distinct skewed picks from array."""
+    return (f"ARRAY(SELECT DISTINCT {_pick(array, skew)} "
+            f"FROM generate_series(1, {count_expr}) AS k(n) WHERE g.g > 0)")
+
+def populate_sql(rows):
+    """INSERT ... SELECT generate_series statements for every course table."""
+    skills = _array_literal(SKILLS)
+    tags = _array_literal(TAGS)
+    names = _array_literal(PRODUCT_NAMES)
+
+    return [
+        f"""INSERT INTO library_books (title, author, description, published_date, available_time)
+SELECT initcap({_words("2 + (random() * 4)::int")}),
+       'Author ' || (1 + (random() * {max(rows // 20, 1)})::int),
+       {_words("10 + (random() * random() * 60)::int")} || '.',
+       DATE '1800-01-01' + (random() * 80000)::int,
+       TIME '08:00' + (random() * 36000)::int * INTERVAL '1 second'
+FROM generate_series(1, {rows}) AS g(g)""",
+
+        f"""INSERT INTO students (full_name, skills)
+SELECT 'Student ' || g, {_distinct_pick(skills, "1 + (random() * 4)::int")}
+FROM generate_series(1, {rows}) AS g(g)""",
+
+        f"""INSERT INTO products (details)
+SELECT jsonb_build_object(
+           'name', {_pick(names, 1)} || ' ' || g,
+           'price', round((5 + random() * 1995)::numeric, 2),
+           'tags', to_jsonb({_distinct_pick(tags, "1 + (random() * 3)::int")}))
+FROM generate_series(1, {rows}) AS g(g)""",
+
+        f"""INSERT INTO sample_table (name, age, description, birthdate, last_login, interests)
+SELECT 'Person ' || g,
+       round((18 + random() * 60)::numeric, 2),
+       '  ' || {_words("3 + (random() * 12)::int")} || '  ',
+       DATE '1950-01-01' + (random() * 20000)::int,
+       now() - random() * INTERVAL '365 days',
+       ARRAY(SELECT DISTINCT (1 + floor(power(random(), 2) * 20))::int
+             FROM generate_series(1, 1 + (random() * 5)::int) AS k(n) WHERE g.g > 0)
+FROM generate_series(1, {rows}) AS g(g)""",
+
+        f"""INSERT INTO orders (product)
+SELECT {_pick(names, 1)} FROM generate_series(1, {rows}) AS g(g)""",
+    ]
+
+def create_schema(conn, with_fts=True):
+    """Create the course tables (and the FTS trigger/index) on conn."""
+    conn.execute(SCHEMA_SQL)
+    if with_fts:
+        conn.execute(FTS_SQL)
+
+def populate(conn, scale=1, seed=0.42, verbose=True):
+    """Fill the course tables with BASE_ROWS * scale rows each, then VACUUM ANALYZE."""
+    rows = int(BASE_ROWS * scale)
+    conn.execute("SELECT setseed(%s)", [seed])
+
+    for statement in populate_sql(rows):
+        table = statement.split()[2]
+        started = time.perf_counter()
+        conn.execute(statement)
+        if verbose:
+            print(f"  {table}: {rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    # VACUUM sets the visibility map too, so index-only scans are costed as
+    # they will be once autovacuum has run, and plans are stable from the start
+    conn.execute("VACUUM ANALYZE")
+    return rows
+
+def build_course_database(dsn, dbname, scale=1, with_fts=True, verbose=True):
+    """(Re)create dbname with the course schema populated at scale."""
+    with connect(dsn) as admin:
+        drop_database(admin, dbname)
+        create_database(admin, dbname)
+
+    # The FTS trigger and index exist before the load, as in assignment3solutionFTS
+    with connect(dsn, dbname=dbname) as conn:
+        create_schema(conn, with_fts)
+        rows = populate(conn, scale, verbose=verbose)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Create a course database populated at a given scale.")
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", type=float, default=1, help=f"multiple of {BASE_ROWS:,} rows per table")
+    parser.add_argument("--database", default=None, help="database name (default course_s<scale>)")
+    parser.add_argument("--no-fts", action="store_true", help="skip the fulltext trigger and GIN index")
+    args = parser.parse_args()
+
+    dbname = args.database or f"course_s{args.scale:g}".replace(".", "_")
+    print(f"Building {dbname} at scale {args.scale:g}...")
+    print("-" * 60)
+    rows = build_course_database(args.dsn, dbname, args.scale, not args.no_fts)
+    print("-" * 60)
+    print(f"\n✓ Created {dbname} ({rows:,} rows per table)")
+
+if __name__ == "__main__":
+    main()
@@ -3,39 +3,51 @@
 Create combined PDF: All course slides + sample midterm solutions
 """
 
-from PyPDF2 import PdfMerger
+from PyPDF2 import PdfMerger, PdfReader
+import argparse
 
-def create_combined_pdf():
-    """Merge course slides and midterm solutions into one comprehensive PDF."""
+from profiling import profileable, add_profile_argument
 
-    files_to_merge = [
-        "adv_db_merged_slides.pdf",
-        "midterm_sample_solutions.pdf"
-    ]
+@profileable("output_file")
+def create_combined_pdf(files_to_merge=None, output_file="adv_db_merged_with_sample.pdf"):
+    """Merge course slides and midterm solutions into one comprehensive PDF."""
 
-    output_file = "adv_db_merged_with_sample.pdf"
+    if files_to_merge is None:
+        files_to_merge = [
+            "adv_db_merged_slides.pdf",
+            "midterm_sample_solutions.pdf"
+        ]
 
     print("Creating combined PDF...")
     print("-" * 60)
 
     merger = PdfMerger()
+    page_counts = []
 
     for pdf_file in files_to_merge:
         print(f"Adding: {pdf_file}")
         merger.append(pdf_file)
 
+        # Count pages
+        page_count = len(PdfReader(pdf_file).pages)
+        page_counts.append(page_count)
+        print(f"  → {page_count} pages")
+
     merger.write(output_file)
     merger.close()
 
+    total_pages = sum(page_counts)
+
     print("-" * 60)
     print(f"\n✓ Successfully created: {output_file}")
+    print(f"  Total pages: {total_pages}")
     print(f"\nThis file contains:")
-    print(f"  1. All course slides (169 pages)")
-    print(f"  2. Sample midterm questions & solutions")
-    print(f"\nYou now have:")
-    print(f"  • adv_db_merged_slides.pdf (course slides only)")
-    print(f"  • midterm_sample_solutions.pdf (sample exam only)")
-    print(f"  • adv_db_merged_with_sample.pdf (everything combined)")
+    for number, (pdf_file, page_count) in enumerate(zip(files_to_merge, page_counts), 1):
+        print(f"  {number}. {pdf_file} ({page_count} pages)")
+
+    return output_file, total_pages
 
 if __name__ == "__main__":
-    create_combined_pdf()
+    parser = add_profile_argument(argparse.ArgumentParser(description="Combine the slides and solutions into one PDF."))
+    args = parser.parse_args()
+    create_combined_pdf(profile=args.profile)
@@ -8,6 +8,12 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
+from io import BytesIO
+
+import argparse
+
+from reproducible import pin_presentation, normalize_zip
+from profiling import profileable, add_profile_argument
 
 def add_title_slide(prs, title, subtitle=""):
     """Add a title slide."""
@@ -92,13 +98,35 @@ def add_qa_slide(prs, question, answer, code=""):
 
     return slide
 
-def create_comprehensive_powerpoint():
-    """Create comprehensive PowerPoint with all midterm content."""
-
+def load_presentation_template():
+    """Return the blank 10x7.5in deck as bytes so it can be reopened cheaply."""
     prs = Presentation()
     prs.slide_width = Inches(10)
     prs.slide_height = Inches(7.5)
 
+    buffer = BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+def new_presentation(template=None):
+    """Open a fresh deck, from a cached template if one is given."""
+    if template is None:
+        template = load_presentation_template()
+    return Presentation(BytesIO(template))
+
+def save_presentation(prs, filename):
+    """Save prs, pinning dates and zip metadata in reproducible mode."""
+    pin_presentation(prs)
+    prs.save(filename)
+    normalize_zip(filename)
+    return filename
+
+@profileable("filename")
+def create_comprehensive_powerpoint(filename="adv_db_midterm_study_guide.pptx", template=None):
+    """Create comprehensive PowerPoint with all midterm content."""
+
+    prs = new_presentation(template)
+
     # ===== COVER SLIDE =====
     add_title_slide(prs,
                    "Advanced Database\nMidterm Study Guide",
@@ -723,11 +751,48 @@ SELECT EXTRACT(YEAR FROM date_column);"""
     ])
 
     # Save the presentation
-    filename = "adv_db_midterm_study_guide.pptx"
-    prs.save(filename)
+    save_presentation(prs, filename)
     print(f"\n✓ Successfully created: {filename}")
     print(f"✓ Total slides: {len(prs.slides)}")
     return filename
 
+def build_exam_presentation(prs, exam):
+    """Add the slides for one exam content source to prs."""
+
+    add_title_slide(prs,
+                   f"{exam.get('title', 'Advanced Database')}\n{exam.get('subtitle', 'Midterm Exam')}",
+                   "Complete Questions & Solutions\nOpen-Book Exam Reference")
+
+    add_content_slide(prs, "Table of Contents",
+                      [section['title'] for section in exam['sections']])
+
+    for section in exam['sections']:
+        title, _, subtitle = section['title'].partition(': ')
+        add_title_slide(prs, title, subtitle)
+
+        for question in section['questions']:
+            add_qa_slide(prs, question['question'], question['answer'],
+                         question.get('code', ''))
+
+    tips = exam.get('tips', [])
+    if tips:
+        add_content_slide(prs, "Exam Success Tips", [f"✓ {tip}" for tip in tips])
+
+    return prs
+
+def create_exam_powerpoint(exam, filename, template=None):
+    """Render one exam content source to a study-guide deck.
+
+    Pass bytes from load_presentation_template() to reuse the template across decks.
+    Returns the output path and the number of slides written.
+    """
+
+    prs = build_exam_presentation(new_presentation(template), exam)
+    save_presentation(prs, filename)
+
+    return filename, len(prs.slides)
+
 if __name__ == "__main__":
-    create_comprehensive_powerpoint()
+    parser = add_profile_argument(argparse.ArgumentParser(description="Create the midterm study-guide deck."))
+    args = parser.parse_args()
+    create_comprehensive_powerpoint(profile=args.profile)
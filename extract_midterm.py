@@ -4,7 +4,11 @@ Extract questions from midterm-demo.docx
 """
 
 from docx import Document
+import argparse
 
+from profiling import profileable, add_profile_argument
+
+@profileable("docx_path")
 def extract_midterm_questions(docx_path):
     """Extract all text from the midterm demo document."""
 
@@ -26,5 +30,7 @@ def extract_midterm_questions(docx_path):
     return full_text
 
 if __name__ == "__main__":
-    questions = extract_midterm_questions("midterm-demo.docx")
+    parser = add_profile_argument(argparse.ArgumentParser(description="Extract the questions from midterm-demo.docx."))
+    args = parser.parse_args()
+    questions = extract_midterm_questions("midterm-demo.docx", profile=args.profile)
     print(f"\nExtracted {len(questions)} paragraphs from the document.")
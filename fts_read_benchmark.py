@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Replay a full-text search workload against library_books and compare query
+shapes by latency percentiles and throughput.
+
+The workload is a reproducible mix (--mix) of the three query forms in
+assignment3solutionFTS:
+  • and     - 'fiction & adventure'
+  • or      - 'science | fantasy'
+  • phrase  - 'classic <3> novel'  (distance 1-3)
+with terms drawn from the course vocabulary, so common and rare words are
+both represented. Every search is a session that pages through up to
+--pages pages of --limit results, as a search page would.
+
+Each session is run under every combination of
+  • ranking     - none (ORDER BY book_id), ts_rank or ts_rank_cd
+  • pagination  - OFFSET n, or keyset (WHERE (rank, book_id) < last seen)
+and every --clients count. Clients are threads with their own connection.
+For every combination the report shows QPS and p50/p95/p99 latency, overall
+and for the last page, where OFFSET has to skip everything before it.
+
+The data is a course database built by course_schema at --scale, with the
+assignment's trigger-maintained fulltext column and GIN index.
+
+Usage:
+    python fts_read_benchmark.py --scale 10 --clients 1 8 --sessions 200
+    python fts_read_benchmark.py --scale 100 --reuse-db --mix and=2,or=1,phrase=1
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pg_local import add_connection_arguments, connect, print_table
+from course_schema import WORDS, build_course_database
+
+RANKINGS = {'none': None, 'ts_rank': "ts_rank(fulltext, query)", 'ts_rank_cd': "ts_rank_cd(fulltext, query)"}
+PAGINATIONS = ["offset", "keyset"]
+QUERY_KINDS = ["and", "or", "phrase"]
+
+# English stop words are dropped by to_tsquery and make empty queries
+STOP_WORDS = {"the", "of", "a", "about", "by"}
+
+Session = namedtuple("Session", "kind query")
+Sample = namedtuple("Sample", "kind page ms rows")
+
+def parse_mix(text):
+    """'and=2,or=1,phrase=1' -> {'and': 2, 'or': 1, 'phrase': 1}."""
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in QUERY_KINDS:
+            raise ValueError(f"unknown query kind {kind!r}, expected one of {', '.join(QUERY_KINDS)}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+def build_sessions(count, mix, seed=42):
+    """count reproducible search sessions drawn from the weighted mix."""
+    rng = random.Random(seed)
+    terms = [word for word in WORDS if word not in STOP_WORDS]
+    kinds = list(mix)
+    sessions = []
+    for _ in range(count):
+        kind = rng.choices(kinds, weights=[mix[kind] for kind in kinds])[0]
+        first, second = rng.sample(terms, 2)
+        if kind == "and":
+            query = f"{first} & {second}"
+        elif kind == "or":
+            query = f"{first} | {second}"
+        else:
+            query = f"{first} <{rng.randint(1, 3)}> {second}"
+        sessions.append(Session(kind, query))
+    return sessions
+
+def page_sql(ranking, pagination, first_page):
+    """The SELECT for one page under a ranking and pagination scheme."""
+    score = RANKINGS[ranking]
+    query = "SELECT book_id" + (f", {score}" if score else "")
+    query += " FROM library_books, to_tsquery('english', %(query)s) AS query WHERE fulltext @@ query"
+    # Ranks are real; the last-seen value must be compared as real too, or ties are skipped
+    if pagination == "keyset" and not first_page:
+        query += f" AND ({score}, book_id) < (%(score)s::real, %(book_id)s)" if score else " AND book_id > %(book_id)s"
+    query += f" ORDER BY {score} DESC, book_id DESC" if score else " ORDER BY book_id"
+    query += " LIMIT %(limit)s"
+    if pagination == "offset":
+        query += " OFFSET %(offset)s"
+    return query
+
+def run_session(conn, session, ranking, pagination, pages, limit):
+    """Page through one search; returns a Sample per page fetched."""
+    samples = []
+    params = {'query': session.query, 'limit': limit, 'offset': 0, 'score': None, 'book_id': None}
+    for page in range(1, pages + 1):
+        started = time.perf_counter()
+        rows = conn.execute(page_sql(ranking, pagination, page == 1), params).fetchall()
+        samples.append(Sample(session.kind, page, (time.perf_counter() - started) * 1000, len(rows)))
+        if len(rows) < limit:
+            break
+        params['offset'] += limit
+        params['book_id'] = rows[-1][0]
+        params['score'] = rows[-1][1] if len(rows[-1]) > 1 else None
+    return samples
+
+class _ClientState(threading.local):
+    conn = None
+
+def run_workload(dsn, dbname, sessions, ranking, pagination, clients, pages, limit):
+    """Run every session on clients concurrent connections; returns (samples, seconds)."""
+    state = _ClientState()
+    connections = []
+    lock = threading.Lock()
+
+    def init_client():
+        state.conn = connect(dsn, dbname=dbname)
+        with lock:
+            connections.append(state.conn)
+
+    def run(session):
+        return run_session(state.conn, session, ranking, pagination, pages, limit)
+
+    try:
+        with ThreadPoolExecutor(max_workers=clients, initializer=init_client) as pool:
+            started = time.perf_counter()
+            results = list(pool.map(run, sessions))
+            elapsed = time.perf_counter() - started
+    finally:
+        for conn in connections:
+            conn.close()
+    return [sample for samples in results for sample in samples], elapsed
+
+def percentiles(samples):
+    if not samples:
+        return (None, None, None)
+    return tuple(float(value) for value in np.percentile([sample.ms for sample in samples], [50, 95, 99]))
+
+def summarize(samples, elapsed, pages):
+    p50, p95, p99 = percentiles(samples)
+    last = [sample for sample in samples if sample.page == pages]
+    by_kind = {kind: percentiles([sample for sample in samples if sample.kind == kind])[1] for kind in QUERY_KINDS}
+    return {
+        'requests': len(samples),
+        'qps': len(samples) / elapsed if elapsed else 0.0,
+        'p50_ms': p50,
+        'p95_ms': p95,
+        'p99_ms': p99,
+        'last_page_p95_ms': percentiles(last)[1],
+        'p95_ms_by_kind': by_kind,
+    }
+
+def _ms(value):
+    return "-" if value is None else f"{value:.2f}"
+
+def report(results):
+    print_table(
+        ["Clients", "Ranking", "Paging", "Requests", "QPS", "p50 ms", "p95 ms", "p99 ms", "Last page p95",
+         "p95 and/or/phrase"],
+        [(result['clients'], result['ranking'], result['pagination'], result['requests'], f"{result['qps']:,.0f}",
+          _ms(result['p50_ms']), _ms(result['p95_ms']), _ms(result['p99_ms']), _ms(result['last_page_p95_ms']),
+          " / ".join(_ms(result['p95_ms_by_kind'][kind]) for kind in QUERY_KINDS))
+         for result in results],
+    )
+    for clients in sorted({result['clients'] for result in results}):
+        best = min((result for result in results if result['clients'] == clients), key=lambda result: result['p95_ms'])
+        print(f"✓ {clients} client(s): lowest p95 is {best['ranking']} + {best['pagination']} "
+              f"({best['p95_ms']:.2f} ms, {best['qps']:,.0f} QPS)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency percentiles and QPS for ranked FTS queries and pagination.")
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", type=float, default=10, help="course_schema scale of library_books (default 10)")
+    parser.add_argument("--reuse-db", action="store_true", help="reuse an existing fts_read_s<scale> database")
+    parser.add_argument("--sessions", type=int, default=200, help="search sessions per combination (default 200)")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured sessions before each combination")
+    parser.add_argument("--pages", type=int, default=5, help="pages fetched per session (default 5)")
+    parser.add_argument("--limit", type=int, default=20, help="results per page (default 20)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8], help="concurrent client counts (default 1 8)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("and=1,or=1,phrase=1"),
+                        help="weighted query mix (default and=1,or=1,phrase=1)")
+    parser.add_argument("--rankings", nargs="+", choices=list(RANKINGS), default=list(RANKINGS))
+    parser.add_argument("--paginations", nargs="+", choices=PAGINATIONS, default=PAGINATIONS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    dbname = f"fts_read_s{args.scale:g}".replace(".", "_")
+    if not args.reuse_db:
+        print(f"Loading {dbname} at scale {args.scale:g}...")
+        build_course_database(args.dsn, dbname, args.scale)
+
+    sessions = build_sessions(args.sessions, args.mix, args.seed)
+    warmup = build_sessions(args.warmup, args.mix, args.seed + 1)
+
+    results = []
+    for clients in args.clients:
+        for ranking in args.rankings:
+            for pagination in args.paginations:
+                print(f"Running {clients} client(s), {ranking} + {pagination}...")
+                run_workload(args.dsn, dbname, warmup, ranking, pagination, clients, args.pages, args.limit)
+                samples, elapsed = run_workload(args.dsn, dbname, sessions, ranking, pagination,
+                                                clients, args.pages, args.limit)
+                result = summarize(samples, elapsed, args.pages)
+                result.update(clients=clients, ranking=ranking, pagination=pagination)
+                results.append(result)
+
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ways assignment3solutionFTS can maintain library_books.fulltext.
+
+Strategies:
+  • trigger    - tsvector_update_trigger, exactly as the assignment creates it
+  • generated  - fulltext GENERATED ALWAYS AS (setweight(...) || ...) STORED,
+                 the weighted expression of the assignment's UPDATE
+  • batch      - load without fulltext, then UPDATE ... SET fulltext in
+                 --batch-rows id ranges, as the assignment's one-off UPDATE
+
+The GIN index (ix_library_books_fts_gin) is either built before the load
+with fastupdate on (new entries go to the pending list), built before it
+with fastupdate off (every row updates the main index), or built after the
+load. Every combination runs in a fresh database. The rows come from
+generate_synthetic_data.py and are loaded by bulk_load.py's parallel COPY.
+
+For every run the report shows:
+  • load time and rows/s
+  • post-load work: the batch UPDATE, the index build, or flushing the
+    pending list with gin_clean_pending_list()
+  • pending-list pages after the load, from pgstatginindex() when the
+    pgstattuple extension is available, otherwise from the pages flushed
+  • latency of the first indexed query after the load (it has to scan the
+    pending list) and after the cleanup
+  • WAL written, and table and index size
+
+Usage:
+    python fts_write_benchmark.py --rows 1000000 --workers 4
+    python fts_write_benchmark.py --rows 200000 --strategies trigger generated --json fts_write.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+import psycopg
+from psycopg import sql
+
+from pg_local import add_connection_arguments, connect, scratch_database, print_table
+from generate_synthetic_data import ensure_generated
+from bulk_load import BulkLoader, manifest_chunks
+
+TABLE_SQL = """
+CREATE TABLE library_books (
+    book_id SERIAL PRIMARY KEY,
+    title VARCHAR(200) NOT NULL,
+    author TEXT,
+    description TEXT NOT NULL,
+    published_date DATE,
+    available_time TIME,
+    fulltext {fulltext}
+)
+"""
+
+WEIGHTED_VECTOR = ("setweight(to_tsvector('english', COALESCE(title,'')),'A') || "
+                   "setweight(to_tsvector('english', COALESCE(description,'')),'B')")
+
+TRIGGER_SQL = """
+CREATE TRIGGER library_books_fulltextsearch_trigge
+BEFORE INSERT OR UPDATE OF title,description ON library_books
+FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger
+(fulltext,'pg_catalog.english',title,description)
+"""
+
+INDEX_SQL = "CREATE INDEX ix_library_books_fts_gin ON library_books USING GIN(fulltext) WITH (fastupdate = {})"
+
+PROBE_QUERY = ("SELECT count(*) FROM library_books "
+               "WHERE fulltext @@ to_tsquery('english', 'dragon & quest')")
+
+STRATEGIES = ["trigger", "generated", "batch"]
+INDEX_MODES = ["fastupdate", "no-fastupdate", "after"]
+
+Config = namedtuple("Config", "strategy index")
+
+def configs(strategies):
+    """Every strategy with every index mode; batch fills fulltext after the load, so only 'after'."""
+    return [Config(strategy, index) for strategy in strategies for index in INDEX_MODES
+            if strategy != "batch" or index == "after"]
+
+def create_table(conn, strategy, index):
+    fulltext = f"TSVECTOR GENERATED ALWAYS AS ({WEIGHTED_VECTOR}) STORED" if strategy == "generated" else "TSVECTOR"
+    conn.execute(TABLE_SQL.format(fulltext=fulltext))
+    if strategy == "trigger":
+        conn.execute(TRIGGER_SQL)
+    if index != "after":
+        conn.execute(INDEX_SQL.format("on" if index == "fastupdate" else "off"))
+
+def batch_update(conn, batch_rows):
+    """Fill fulltext in book_id ranges, one transaction per range."""
+    low, high = conn.execute("SELECT min(book_id), max(book_id) FROM library_books").fetchone()
+    for start in range(low or 0, (high or 0) + 1, batch_rows):
+        conn.execute(f"UPDATE library_books SET fulltext = {WEIGHTED_VECTOR} WHERE book_id >= %s AND book_id < %s",
+                     [start, start + batch_rows])
+
+def wal_lsn(conn):
+    return conn.execute("SELECT pg_current_wal_lsn()").fetchone()[0]
+
+def wal_bytes(conn, since):
+    return int(conn.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", [since]).fetchone()[0])
+
+def pending_list(conn):
+    """(pending pages, pending tuples) from pgstattuple, or None without the extension."""
+    try:
+        with conn.transaction():
+            conn.execute("CREATE EXTENSION IF NOT EXISTS pgstattuple")
+    except psycopg.Error:
+        return None
+    return conn.execute("SELECT pending_pages, pending_tuples FROM pgstatginindex('ix_library_books_fts_gin')").fetchone()
+
+def probe_ms(conn, runs=1):
+    """Median latency of an indexed search, with the sequential-scan path disabled."""
+    conn.execute("SET enable_seqscan = off")
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.execute(PROBE_QUERY).fetchone()
+        timings.append((time.perf_counter() - started) * 1000)
+    conn.execute("RESET enable_seqscan")
+    return statistics.median(timings)
+
+def run_config(dsn, config, chunks, workers, batch_rows, gin_pending_list_limit):
+    """Load chunks under one configuration in a fresh database; returns its measurements."""
+    dbname = f"fts_write_{config.strategy}_{config.index}".replace("-", "_")
+    result = {'strategy': config.strategy, 'index': config.index}
+
+    with scratch_database(dsn, dbname):
+        with connect(dsn, dbname=dbname) as conn:
+            if gin_pending_list_limit:
+                conn.execute(sql.SQL("ALTER DATABASE {} SET gin_pending_list_limit = {}").format(
+                    sql.Identifier(dbname), sql.Literal(gin_pending_list_limit)))
+            create_table(conn, config.strategy, config.index)
+            conn.execute("CHECKPOINT")
+            wal_start = wal_lsn(conn)
+
+            started = time.perf_counter()
+            loaded, _ = BulkLoader(dsn, dbname, workers).run(chunks, [])
+            result['load_seconds'] = time.perf_counter() - started
+            result['rows'] = sum(item.rows for item in loaded)
+
+            result['pending'] = None
+            result['first_query_ms'] = None
+            started = time.perf_counter()
+            if config.strategy == "batch":
+                batch_update(conn, batch_rows)
+            if config.index == "after":
+                conn.execute(INDEX_SQL.format("on"))
+            else:
+                result['pending'] = pending_list(conn)
+                result['first_query_ms'] = probe_ms(conn)
+                flushed = conn.execute("SELECT gin_clean_pending_list('ix_library_books_fts_gin')").fetchone()[0]
+                if result['pending'] is None:
+                    result['pending'] = (flushed, None)
+            result['post_seconds'] = time.perf_counter() - started
+
+            conn.execute("ANALYZE library_books")
+            result['query_ms'] = probe_ms(conn, runs=5)
+            result['wal_bytes'] = wal_bytes(conn, wal_start)
+            result['table_bytes'], result['index_bytes'] = conn.execute(
+                "SELECT pg_table_size('library_books'), pg_relation_size('ix_library_books_fts_gin')").fetchone()
+
+    result['total_seconds'] = result['load_seconds'] + result['post_seconds']
+    return result
+
+def report(results):
+    print_table(
+        ["Strategy", "GIN", "Load s", "Rows/s", "Post s", "Total s", "Pending pages", "1st query ms",
+         "Query ms", "WAL MB", "Table MB", "Index MB"],
+        [(result['strategy'], result['index'], f"{result['load_seconds']:.1f}",
+          f"{result['rows'] / result['load_seconds']:,.0f}", f"{result['post_seconds']:.1f}",
+          f"{result['total_seconds']:.1f}", result['pending'][0] if result['pending'] else "-",
+          f"{result['first_query_ms']:.1f}" if result['first_query_ms'] is not None else "-",
+          f"{result['query_ms']:.1f}", f"{result['wal_bytes'] / 1e6:.0f}",
+          f"{result['table_bytes'] / 1e6:.0f}", f"{result['index_bytes'] / 1e6:.0f}")
+         for result in results],
+    )
+    fastest = min(results, key=lambda result: result['total_seconds'])
+    print(f"\n✓ Fastest end to end: {fastest['strategy']} / {fastest['index']} ({fastest['total_seconds']:.1f}s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare tsvector maintenance strategies for library_books.")
+    add_connection_arguments(parser)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows to load (default 1,000,000)")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--workers", type=int, default=4, help="parallel COPY connections (default 4)")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="rows per UPDATE for the batch strategy")
+    parser.add_argument("--gin-pending-list-limit", default=None, help="e.g. 16MB (default: server setting)")
+    parser.add_argument("--data-dir", default=os.path.join("bench_work", "fts_books"), help="synthetic data cache")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    print(f"Preparing {args.rows:,} library_books rows...")
+    ensure_generated(["library_books"], args.rows, args.data_dir, args.workers, args.seed)
+    chunks = manifest_chunks(args.data_dir, ["library_books"])
+
+    results = []
+    for config in configs(args.strategies):
+        print(f"Running {config.strategy} / {config.index}...")
+        results.append(run_config(args.dsn, config, chunks, args.workers, args.batch_rows, args.gin_pending_list_limit))
+
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,16 +9,16 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Preformatted
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
 from reportlab.pdfgen import canvas
+from xml.sax.saxutils import escape
 
-def create_midterm_solutions_pdf():
-    """Create a comprehensive PDF with all sample midterm questions and solutions."""
+import argparse
 
-    output_file = "midterm_sample_solutions.pdf"
-    doc = SimpleDocTemplate(output_file, pagesize=letter,
-                           topMargin=0.5*inch, bottomMargin=0.5*inch,
-                           leftMargin=0.75*inch, rightMargin=0.75*inch)
+from reproducible import pdf_invariant
+from profiling import profileable, add_profile_argument
+
+def build_styles():
+    """Create the paragraph styles shared by every solutions PDF."""
 
-    # Define styles
     styles = getSampleStyleSheet()
 
     title_style = ParagraphStyle(
@@ -66,6 +66,32 @@ def create_midterm_solutions_pdf():
         fontName='Courier'
     )
 
+    return {
+        'title': title_style,
+        'section': section_style,
+        'question': question_style,
+        'answer': answer_style,
+        'code': code_style,
+    }
+
+@profileable("output_file")
+def create_midterm_solutions_pdf(output_file="midterm_sample_solutions.pdf", styles=None):
+    """Create a comprehensive PDF with all sample midterm questions and solutions."""
+
+    doc = SimpleDocTemplate(output_file, pagesize=letter,
+                           topMargin=0.5*inch, bottomMargin=0.5*inch,
+                           leftMargin=0.75*inch, rightMargin=0.75*inch,
+                           invariant=pdf_invariant())
+
+    # Define styles
+    if styles is None:
+        styles = build_styles()
+    title_style = styles['title']
+    section_style = styles['section']
+    question_style = styles['question']
+    answer_style = styles['answer']
+    code_style = styles['code']
+
     # Build content
     story = []
 
@@ -1038,5 +1064,75 @@ pg_restore -d mydb backup.tar"""
 
     return output_file
 
+def build_exam_story(exam, styles):
+    """Lay out an exam content source the same way as the hand-written sample."""
+
+    story = []
+
+    # Cover slide
+    story.append(Paragraph(escape(exam.get('title', 'Advanced Database')), styles['title']))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph(escape(exam.get('subtitle', 'Midterm Exam')), styles['title']))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(Paragraph("Questions & Complete Solutions", styles['section']))
+    story.append(Spacer(1, 0.3*inch))
+    story.append(Paragraph("<i>Study Material for Open-Book Exam</i>", styles['answer']))
+    story.append(PageBreak())
+
+    for section in exam['sections']:
+        story.append(Paragraph(escape(section['title']), styles['title']))
+        story.append(Spacer(1, 0.2*inch))
+
+        for question in section['questions']:
+            heading = f"Question {question['label']}: {question['title']}"
+            story.append(Paragraph(f"<b>{escape(heading)}</b>", styles['section']))
+            story.append(Paragraph(escape(question['question']), styles['question']))
+            story.append(Spacer(1, 0.1*inch))
+
+            story.append(Paragraph("<b>Answer:</b>", styles['answer']))
+            story.append(Paragraph(escape(question['answer']), styles['answer']))
+            story.append(Spacer(1, 0.05*inch))
+
+            if question.get('code'):
+                story.append(Preformatted(question['code'], styles['code']))
+            if question.get('notes'):
+                story.append(Paragraph(
+                    f"<b>Key points:</b> {escape(question['notes'])}",
+                    styles['answer']
+                ))
+            story.append(PageBreak())
+
+    tips = exam.get('tips', [])
+    if tips:
+        story.append(Paragraph("Study Tips", styles['title']))
+        story.append(Spacer(1, 0.2*inch))
+        story.append(Paragraph("<b>Key Concepts to Remember:</b>", styles['section']))
+        for tip in tips:
+            story.append(Paragraph(f"• {escape(tip)}", styles['answer']))
+            story.append(Spacer(1, 0.05*inch))
+
+    return story
+
+def create_exam_solutions_pdf(exam, output_file, styles=None):
+    """Render one exam content source to a solutions PDF.
+
+    Pass a styles dict from build_styles() to reuse it across documents.
+    Returns the output path and the number of pages written.
+    """
+
+    doc = SimpleDocTemplate(output_file, pagesize=letter,
+                           topMargin=0.5*inch, bottomMargin=0.5*inch,
+                           leftMargin=0.75*inch, rightMargin=0.75*inch,
+                           invariant=pdf_invariant())
+
+    if styles is None:
+        styles = build_styles()
+
+    doc.build(build_exam_story(exam, styles))
+
+    return output_file, doc.page
+
 if __name__ == "__main__":
-    create_midterm_solutions_pdf()
+    parser = add_profile_argument(argparse.ArgumentParser(description="Generate the sample midterm solutions PDF."))
+    args = parser.parse_args()
+    create_midterm_solutions_pdf(profile=args.profile)
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Generate large synthetic data sets for the course tables as COPY binary files.
+
+Rows for library_books, students, products, sample_table and orders are
+built column by column with NumPy and encoded straight into PostgreSQL's
+binary COPY format. No Python object is created per row. Every column is a
+Ragged byte array (one contiguous buffer plus row offsets), and whole
+tuples are assembled with a single vectorized scatter per column.
+
+Values follow the course material but with realistic distributions:
+  • words, skills, tags, product names and interests are drawn with a
+    Zipfian frequency (--zipf), so a few terms are very common and most rare
+  • description and title lengths are log-normal
+  • publication dates lean towards recent years, logins towards recent days
+
+Each table is written as --shards part files (each a complete COPY file)
+by a process pool. manifest.json lists the files and the column list to
+load them with:
+
+    COPY library_books (title, author, ...) FROM STDIN WITH (FORMAT binary)
+
+SERIAL columns and the fulltext tsvector are left to their defaults and
+triggers. Output is deterministic for a given --seed; with SOURCE_DATE_EPOCH
+set, login timestamps are relative to it instead of the current time.
+
+Usage:
+    python generate_synthetic_data.py --scale 100 --output-dir synthetic_data
+    python generate_synthetic_data.py --rows 5000000 --tables library_books --zipf 1.3
+"""
+
+import argparse
+import itertools
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from course_schema import BASE_ROWS, WORDS, SKILLS, TAGS, PRODUCT_NAMES
+from reproducible import source_date_epoch
+
+COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+COPY_TRAILER = struct.pack(">h", -1)
+
+# PostgreSQL dates and timestamps count from 2000-01-01
+PG_EPOCH_DAYS = 10957
+PG_EPOCH_SECONDS = 946684800
+INT4_OID = 23
+TEXT_OID = 25
+
+MICROSECONDS = 1_000_000
+CHUNK_ROWS = 100_000
+
+FIRST_NAMES = ["John", "Mary", "James", "Linda", "Robert", "Patricia", "Michael", "Jennifer",
+               "David", "Elizabeth", "Ahmed", "Fatima", "Wei", "Mei", "Carlos", "Sofia",
+               "Ivan", "Olga", "Kenji", "Yuki"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+              "Hassan", "Ali", "Wang", "Li", "Rodriguez", "Martinez", "Ivanov", "Tanaka",
+              "Nguyen", "Kim", "Muller", "Rossi"]
+
+# Made-up words that fill the long tail of the description vocabulary
+SYLLABLES = "ka lo mi ra ten vor shi an del qu ex ul bro fen gal ith".split()
+TAIL_WORDS = 4000
+
+class Ragged:
+    """One variable-length byte string per row, stored back to back in data."""
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @classmethod
+    def from_fixed(cls, array):
+        """Rows of a fixed-width array, e.g. big-endian integers of shape (n,) or (n, k)."""
+        array = np.ascontiguousarray(array)
+        width = array[0].nbytes if len(array) else 0
+        return cls(array.view(np.uint8).reshape(-1), np.arange(len(array) + 1, dtype=np.int64) * width)
+
+    @classmethod
+    def constant(cls, value, rows):
+        return cls.from_fixed(np.tile(np.frombuffer(value, np.uint8), (rows, 1)))
+
+    def group(self, counts):
+        """Merge consecutive rows, counts[i] of them into row i."""
+        return Ragged(self.data, self.offsets[_offsets(counts)])
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+def concat(parts):
+    """Row-wise concatenation of Ragged columns with the same number of rows."""
+    offsets = _offsets(sum(part.lengths for part in parts))
+    out = np.empty(offsets[-1], np.uint8)
+    start = offsets[:-1].copy()
+
+    for part in parts:
+        lengths = part.lengths
+        first, last = part.offsets[0], part.offsets[-1]
+        # Destination of every byte: its row's start plus its position within the row
+        destination = np.repeat(start - part.offsets[:-1], lengths) + np.arange(first, last)
+        out[destination] = part.data[first:last]
+        start += lengths
+    return Ragged(out, offsets)
+
+class Vocabulary:
+    """Byte strings that rows pick from by index."""
+
+    def __init__(self, values):
+        encoded = [value if isinstance(value, bytes) else value.encode("utf-8") for value in values]
+        self.data = np.frombuffer(b"".join(encoded), np.uint8)
+        self.lengths = np.array([len(value) for value in encoded], np.int64)
+        self.starts = _offsets(self.lengths)[:-1]
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def take(self, indices):
+        """Ragged with the value at each index as one row."""
+        lengths = self.lengths[indices]
+        offsets = _offsets(lengths)
+        source = np.repeat(self.starts[indices] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return Ragged(self.data[source], offsets)
+
+def separated(values, separator, quote=""):
+    """Vocabulary of quoted values followed by separator-prefixed copies, for join()."""
+    quoted = [quote + value + quote for value in values]
+    return Vocabulary(quoted + [separator + value for value in quoted])
+
+def join(vocabulary, indices, counts):
+    """Rows of counts[i] separated picks; vocabulary comes from separated()."""
+    first = np.zeros(len(indices), bool)
+    first[_offsets(counts)[:-1][counts > 0]] = True
+    return vocabulary.take(indices + (len(vocabulary) // 2) * ~first).group(counts)
+
+def decimal_text(values, width=1):
+    """ASCII decimal digits of non-negative integers, zero-padded to width."""
+    values = np.asarray(values, np.int64)
+    places = max(width, len(str(int(values.max()))) if len(values) else 1)
+    powers = 10 ** np.arange(places - 1, -1, -1, dtype=np.int64)
+    digits = np.maximum(1 + (values[:, None] >= powers[:-1][::-1][None, :]).sum(1), width)
+    matrix = ((values[:, None] // powers) % 10 + 48).astype(np.uint8)
+    keep = np.arange(places)[None, :] >= (places - digits)[:, None]
+    return Ragged(matrix[keep], _offsets(digits))
+
+def zipf_choice(rng, size, count, exponent):
+    """count indices in range(size), index k drawn with weight 1 / (k + 1) ** exponent."""
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return rng.choice(size, count, p=weights / weights.sum())
+
+def picks_per_row(rng, counts, size, exponent, distinct=False):
+    """Zipfian picks for ragged rows; returns (indices, counts), distinct within a row if asked."""
+    indices = zipf_choice(rng, size, int(counts.sum()), exponent)
+    if not distinct:
+        return indices, counts
+
+    rows = np.repeat(np.arange(len(counts)), counts)
+    order = np.lexsort((indices, rows))
+    rows, indices = rows[order], indices[order]
+    keep = np.ones(len(rows), bool)
+    keep[1:] = (rows[1:] != rows[:-1]) | (indices[1:] != indices[:-1])
+    return indices[keep], np.bincount(rows[keep], minlength=len(counts))
+
+def lognormal_counts(rng, rows, median, sigma, low, high):
+    return np.clip(np.rint(rng.lognormal(np.log(median), sigma, rows)), low, high).astype(np.int64)
+
+# Binary send formats
+
+def int4_array(values, counts):
+    """int4[] values, one dimension per row (counts >= 1)."""
+    elements = np.empty((len(values), 2), ">i4")
+    elements[:, 0] = 4
+    elements[:, 1] = values
+    header = np.empty((len(counts), 5), ">i4")
+    header[:] = (1, 0, INT4_OID, 0, 1)
+    header[:, 3] = counts
+    return concat([Ragged.from_fixed(header), Ragged.from_fixed(elements).group(counts)])
+
+def text_array(vocabulary, indices, counts):
+    """text[] from a Vocabulary built by length_prefixed()."""
+    header = np.empty((len(counts), 5), ">i4")
+    header[:] = (1, 0, TEXT_OID, 0, 1)
+    header[:, 3] = counts
+    return concat([Ragged.from_fixed(header), vocabulary.take(indices).group(counts)])
+
+def length_prefixed(values):
+    return Vocabulary([struct.pack(">i", len(value.encode("utf-8"))) + value.encode("utf-8") for value in values])
+
+def numeric_scale2(cents):
+    """NUMERIC with two decimals from integer hundredths (0 <= value < 10**8)."""
+    whole, fraction = np.divmod(np.asarray(cents, np.int64), 100)
+    fields = np.empty((len(whole), 7), ">i2")
+    fields[:, :4] = (3, 1, 0, 2)  # base-10000 digits, weight, sign, display scale
+    fields[:, 4] = whole // 10000
+    fields[:, 5] = whole % 10000
+    fields[:, 6] = fraction * 100
+    return Ragged.from_fixed(fields)
+
+def jsonb(text):
+    return concat([Ragged.constant(b"\x01", len(text)), text])
+
+def encode_tuples(columns):
+    """COPY binary tuples for a list of Ragged columns."""
+    rows = len(columns[0])
+    parts = [Ragged.from_fixed(np.full(rows, len(columns), ">i2"))]
+    for column in columns:
+        parts.append(Ragged.from_fixed(column.lengths.astype(">i4")))
+        parts.append(column)
+    return concat(parts).data
+
+class Vocabularies:
+    """Every vocabulary the tables draw from, built once per worker."""
+
+    def __init__(self):
+        tail = ["".join(parts) for size in (2, 3) for parts in itertools.product(SYLLABLES, repeat=size)]
+        words = WORDS + [word for word in tail if word not in WORDS][:TAIL_WORDS]
+        self.words = separated(words, " ")
+        self.title_words = separated([word.capitalize() for word in words], " ")
+        self.first_names = Vocabulary([name + " " for name in FIRST_NAMES])
+        self.last_names = Vocabulary(LAST_NAMES)
+        self.skills = length_prefixed(SKILLS)
+        self.tags = separated(TAGS, ", ", quote='"')
+        self.products = Vocabulary(PRODUCT_NAMES)
+        self.product_names = Vocabulary([name + " " for name in PRODUCT_NAMES])
+
+def _text(vocabulary, rng, rows, median, sigma, low, high, exponent):
+    counts = lognormal_counts(rng, rows, median, sigma, low, high)
+    indices, counts = picks_per_row(rng, counts, len(vocabulary) // 2, exponent)
+    return join(vocabulary, indices, counts)
+
+def _person_names(vocab, rng, rows, exponent):
+    first = vocab.first_names.take(zipf_choice(rng, len(vocab.first_names), rows, exponent))
+    last = vocab.last_names.take(zipf_choice(rng, len(vocab.last_names), rows, exponent))
+    return concat([first, last])
+
+def _days(rng, rows, start_year, end_year, skew=1.0):
+    """Days since 2000-01-01, between two years, skewed towards the end by skew > 1."""
+    start = np.datetime64(f"{start_year}-01-01", "D").astype(np.int64)
+    end = np.datetime64(f"{end_year}-01-01", "D").astype(np.int64)
+    return (start + (end - start) * rng.beta(skew, 1.0, rows)).astype(np.int64) - PG_EPOCH_DAYS
+
+def library_books(vocab, rng, rows, first_row, options):
+    authors = max(options['total_rows'] // 20, 1)
+    author_ids = zipf_choice(rng, authors, rows, options['zipf']) + 1
+    description = _text(vocab.words, rng, rows, 60, 0.7, 5, 400, options['zipf'])
+    minutes = rng.integers(8 * 60, 18 * 60, rows)
+    return [
+        _text(vocab.title_words, rng, rows, 3, 0.5, 1, 12, options['zipf']),
+        concat([Ragged.constant(b"Author ", rows), decimal_text(author_ids)]),
+        concat([description, Ragged.constant(b".", rows)]),
+        Ragged.from_fixed(_days(rng, rows, 1800, 2025, skew=3.0).astype(">i4")),
+        Ragged.from_fixed((minutes * 60 * MICROSECONDS).astype(">i8")),
+    ]
+
+def students(vocab, rng, rows, first_row, options):
+    counts = np.clip(rng.poisson(2.0, rows) + 1, 1, 8)
+    indices, counts = picks_per_row(rng, counts, len(SKILLS), options['zipf'], distinct=True)
+    return [_person_names(vocab, rng, rows, options['zipf']), text_array(vocab.skills, indices, counts)]
+
+def products(vocab, rng, rows, first_row, options):
+    names = vocab.product_names.take(zipf_choice(rng, len(PRODUCT_NAMES), rows, options['zipf']))
+    cents = np.clip(np.rint(rng.lognormal(np.log(8000), 1.0, rows)), 100, 999_999).astype(np.int64)
+    whole, fraction = np.divmod(cents, 100)
+    counts = np.clip(rng.poisson(1.5, rows) + 1, 1, 6)
+    indices, counts = picks_per_row(rng, counts, len(TAGS), options['zipf'], distinct=True)
+
+    # Names and tags are plain ASCII without quotes, so no JSON escaping is needed
+    text = concat([
+        Ragged.constant(b'{"name": "', rows), names, decimal_text(first_row + np.arange(1, rows + 1)),
+        Ragged.constant(b'", "price": ', rows), decimal_text(whole), Ragged.constant(b".", rows),
+        decimal_text(fraction, width=2),
+        Ragged.constant(b', "tags": [', rows), join(vocab.tags, indices, counts), Ragged.constant(b"]}", rows),
+    ])
+    return [jsonb(text)]
+
+def sample_table(vocab, rng, rows, first_row, options):
+    ages = np.clip(np.rint(rng.normal(3500, 1200, rows)), 1800, 8000).astype(np.int64)
+    now = (options['now'] - PG_EPOCH_SECONDS) * MICROSECONDS
+    login_age = np.minimum(rng.exponential(7 * 86400, rows), 365 * 86400) * MICROSECONDS
+    counts = np.clip(rng.poisson(2.0, rows) + 1, 1, 8)
+    interests, counts = picks_per_row(rng, counts, 20, options['zipf'], distinct=True)
+    padding = Ragged.constant(b"  ", rows)
+    return [
+        _person_names(vocab, rng, rows, options['zipf']),
+        numeric_scale2(ages),
+        concat([padding, _text(vocab.words, rng, rows, 8, 0.4, 3, 15, options['zipf']), padding]),
+        Ragged.from_fixed(_days(rng, rows, 1950, 2006).astype(">i4")),
+        Ragged.from_fixed((now - login_age.astype(np.int64)).astype(">i8")),
+        int4_array(interests + 1, counts),
+    ]
+
+def orders(vocab, rng, rows, first_row, options):
+    return [vocab.products.take(zipf_choice(rng, len(PRODUCT_NAMES), rows, options['zipf']))]
+
+# Table -> (column list for COPY, chunk generator)
+TABLES = {
+    'library_books': (["title", "author", "description", "published_date", "available_time"], library_books),
+    'students': (["full_name", "skills"], students),
+    'products': (["details"], products),
+    'sample_table': (["name", "age", "description", "birthdate", "last_login", "interests"], sample_table),
+    'orders': (["product"], orders),
+}
+
+_vocab = None
+
+def _init_worker():
+    global _vocab
+    _vocab = Vocabularies()
+
+def write_shard(table, shard, rows, first_row, path, options):
+    """Generate rows of table into one COPY binary file; returns (path, rows, bytes, seconds)."""
+    if _vocab is None:
+        _init_worker()
+    started = time.perf_counter()
+    rng = np.random.default_rng([options['seed'], list(TABLES).index(table), shard])
+    generate = TABLES[table][1]
+
+    with open(path, "wb") as f:
+        f.write(COPY_HEADER)
+        for offset in range(0, rows, options['chunk_rows']):
+            count = min(options['chunk_rows'], rows - offset)
+            f.write(encode_tuples(generate(_vocab, rng, count, first_row + offset, options)))
+        f.write(COPY_TRAILER)
+    return path, rows, os.path.getsize(path), time.perf_counter() - started
+
+def shard_plan(rows, shards):
+    """(shard, rows, first_row) for rows split as evenly as possible."""
+    sizes = [rows // shards + (1 if shard < rows % shards else 0) for shard in range(shards)]
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    return [(shard, size, int(start)) for shard, (size, start) in enumerate(zip(sizes, starts)) if size]
+
+def generate(tables, rows, output_dir, shards, workers, seed=42, zipf=1.1, chunk_rows=CHUNK_ROWS):
+    """Write every table's shards and manifest.json; returns the manifest."""
+    os.makedirs(output_dir, exist_ok=True)
+    options = {
+        'seed': seed,
+        'zipf': zipf,
+        'chunk_rows': chunk_rows,
+        'total_rows': rows,
+        'now': source_date_epoch() or int(time.time()),
+    }
+    manifest = {'seed': seed, 'zipf': zipf, 'rows': rows, 'tables': {}}
+    for table in tables:
+        manifest['tables'][table] = {'columns': TABLES[table][0], 'files': [], 'rows': rows, 'bytes': 0}
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = []
+        for table in tables:
+            for shard, size, first_row in shard_plan(rows, shards):
+                path = os.path.join(output_dir, f"{table}.part{shard:03d}.copy")
+                futures.append((table, pool.submit(write_shard, table, shard, size, first_row, path, options)))
+
+        for table, future in futures:
+            path, count, size, seconds = future.result()
+            entry = manifest['tables'][table]
+            entry['files'].append(os.path.basename(path))
+            entry['bytes'] += size
+            print(f"  ✓ {os.path.basename(path)}: {count:,} rows, {size / 1e6:.1f} MB in {seconds:.2f}s")
+
+    manifest['seconds'] = round(time.perf_counter() - started, 3)
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def ensure_generated(tables, rows, output_dir, workers, seed=42):
+    """generate() into output_dir unless its manifest already covers tables, rows and seed."""
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest['rows'] == rows and manifest['seed'] == seed and all(table in manifest['tables'] for table in tables):
+            return manifest
+    return generate(tables, rows, output_dir, workers, workers, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic course-table data as COPY binary files.")
+    parser.add_argument("--scale", type=float, default=100, help=f"multiple of {BASE_ROWS:,} rows per table (default 100)")
+    parser.add_argument("--rows", type=int, default=None, help="rows per table, overrides --scale")
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES), default=list(TABLES), help="tables to generate")
+    parser.add_argument("--output-dir", default="synthetic_data", help="directory for the part files (default synthetic_data)")
+    parser.add_argument("--shards", type=int, default=None, help="part files per table (default: --workers)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="generator processes")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (default 42)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent for words, tags and skills (default 1.1)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows encoded per NumPy pass")
+    args = parser.parse_args()
+
+    rows = args.rows if args.rows is not None else int(BASE_ROWS * args.scale)
+    shards = args.shards or args.workers
+    print(f"Generating {rows:,} rows for {len(args.tables)} table(s) in {shards} shard(s) each...")
+    print("-" * 60)
+    manifest = generate(args.tables, rows, args.output_dir, shards, args.workers,
+                        args.seed, args.zipf, args.chunk_rows)
+    print("-" * 60)
+
+    total_rows = sum(entry['rows'] for entry in manifest['tables'].values())
+    total_bytes = sum(entry['bytes'] for entry in manifest['tables'].values())
+    print(f"\n✓ {total_rows:,} rows, {total_bytes / 1e6:.1f} MB in {manifest['seconds']:.2f}s "
+          f"({total_rows / manifest['seconds']:,.0f} rows/s)")
+    print(f"  Manifest: {os.path.join(args.output_dir, 'manifest.json')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Roll out table privileges to schemas with tens of thousands of tables by
+applying only the difference between the desired and the actual grants.
+
+Question 2b grants on every table and then sets ALTER DEFAULT PRIVILEGES for
+future ones. Repeating that statement by statement over 20k tables is slow,
+and rewrites ACLs that are already right. This tool:
+  1. reads the desired state from --rule options such as
+     "SELECT,INSERT,UPDATE,DELETE ON public TO dev_team"
+  2. reads the actual table ACLs and default ACLs from the catalog with
+     aclexplode()
+  3. plans only the missing GRANTs, and with --revoke-extra the REVOKEs of
+     privileges the grantees hold beyond the rules. Tables needing the same
+     change share one statement (--tables-per-statement). Every table's
+     changes go into a single batch of --batch-tables tables, so concurrent
+     batches never update the same catalog row.
+  4. with --apply, runs one transaction per batch over --workers
+     connections. lock_timeout is set, and a batch that times out is retried.
+
+While applying, activity_sampler.py samples pg_stat_activity in the
+background, filtered to the rollout's own connections by application_name.
+Their waits on heavyweight locks are reported as lock-wait seconds, along with statements/s and grants/s. The diff is then taken again
+to confirm nothing is left. Without --apply the plan is printed (or written
+with --sql-out) and nothing changes.
+
+--setup-tables N (re)creates --database with N tables in every rule's schema,
+creates missing grantee roles and grants a random --pre-granted share of
+the privileges, so the rollout can be rehearsed locally.
+
+Usage:
+    python grant_rollout.py --database app --rule "SELECT,INSERT,UPDATE,DELETE ON public TO dev_team" \\
+        --default-privileges --sql-out rollout.sql
+    python grant_rollout.py --setup-tables 20000 --rule "SELECT ON public TO dev_team" --apply --workers 4
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg
+from psycopg import sql
+
+from pg_local import add_connection_arguments, connect, create_database, drop_database, print_table
+from activity_sampler import ActivitySampler
+
+APPLICATION_NAME = "grant_rollout"
+
+TABLE_PRIVILEGES = ["SELECT", "INSERT", "UPDATE", "DELETE", "TRUNCATE", "REFERENCES", "TRIGGER"]
+
+RULE_RE = re.compile(r"^\s*([A-Za-z, ]+?)\s+ON\s+(\S+)\s+TO\s+(\S+)\s*$", re.IGNORECASE)
+
+TABLES_SQL = """
+SELECT n.nspname, c.relname
+FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = ANY(%s) AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+"""
+
+TABLE_ACL_SQL = """
+SELECT n.nspname, c.relname, g.rolname, a.privilege_type
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+CROSS JOIN LATERAL aclexplode(c.relacl) AS a
+JOIN pg_roles g ON g.oid = a.grantee
+WHERE n.nspname = ANY(%s) AND c.relkind IN ('r', 'p', 'v', 'm', 'f') AND g.rolname = ANY(%s)
+"""
+
+DEFAULT_ACL_SQL = """
+SELECT r.rolname, n.nspname, g.rolname, a.privilege_type
+FROM pg_default_acl d
+JOIN pg_namespace n ON n.oid = d.defaclnamespace
+JOIN pg_roles r ON r.oid = d.defaclrole
+CROSS JOIN LATERAL aclexplode(d.defaclacl) AS a
+JOIN pg_roles g ON g.oid = a.grantee
+WHERE d.defaclobjtype = 'r' AND n.nspname = ANY(%s) AND g.rolname = ANY(%s)
+"""
+
+Rule = namedtuple("Rule", "privileges schema grantee")
+Change = namedtuple("Change", "action schema table grantee privileges")
+Applied = namedtuple("Applied", "statements grants seconds retries")
+
+def parse_rule(text):
+    """'SELECT,INSERT ON public TO dev_team' -> Rule; ALL expands to every table privilege."""
+    match = RULE_RE.match(text)
+    if not match:
+        raise ValueError(f"expected 'PRIVILEGES ON schema TO role', got {text!r}")
+    privileges = {privilege.strip().upper() for privilege in match.group(1).split(",")}
+    if "ALL" in privileges:
+        privileges = set(TABLE_PRIVILEGES)
+    unknown = privileges - set(TABLE_PRIVILEGES)
+    if unknown:
+        raise ValueError(f"unknown table privilege(s): {', '.join(sorted(unknown))}")
+    return Rule(frozenset(privileges), match.group(2), match.group(3))
+
+def desired_privileges(rules):
+    """{(schema, grantee): privileges} with the rules for the same pair merged."""
+    desired = defaultdict(set)
+    for rule in rules:
+        desired[(rule.schema, rule.grantee)] |= rule.privileges
+    return desired
+
+def actual_table_privileges(conn, schemas, grantees):
+    """(every (schema, table), {(schema, table, grantee): privileges}) from the catalog."""
+    tables = [tuple(row) for row in conn.execute(TABLES_SQL, [schemas]).fetchall()]
+    actual = defaultdict(set)
+    for schema, table, grantee, privilege in conn.execute(TABLE_ACL_SQL, [schemas, grantees]):
+        actual[(schema, table, grantee)].add(privilege)
+    return sorted(tables), actual
+
+def actual_default_privileges(conn, schemas, grantees):
+    actual = defaultdict(set)
+    for owner, schema, grantee, privilege in conn.execute(DEFAULT_ACL_SQL, [schemas, grantees]):
+        actual[(owner, schema, grantee)].add(privilege)
+    return actual
+
+def diff_tables(desired, tables, actual, revoke_extra):
+    """Changes that bring every table's ACL to the desired state."""
+    changes = []
+    for schema, table in tables:
+        for (rule_schema, grantee), wanted in desired.items():
+            if rule_schema != schema:
+                continue
+            held = actual.get((schema, table, grantee), set())
+            if wanted - held:
+                changes.append(Change("GRANT", schema, table, grantee, tuple(sorted(wanted - held))))
+            if revoke_extra and held - wanted:
+                changes.append(Change("REVOKE", schema, table, grantee, tuple(sorted(held - wanted))))
+    return changes
+
+def default_privilege_statements(desired, owners, actual, revoke_extra):
+    """ALTER DEFAULT PRIVILEGES statements for tables the owners create later."""
+    statements = []
+    for owner in owners:
+        for (schema, grantee), wanted in desired.items():
+            held = actual.get((owner, schema, grantee), set())
+            for action, privileges, preposition in [("GRANT", wanted - held, "TO"),
+                                                    ("REVOKE", held - wanted if revoke_extra else set(), "FROM")]:
+                if privileges:
+                    statements.append(sql.SQL("ALTER DEFAULT PRIVILEGES FOR ROLE {} IN SCHEMA {} {} {} ON TABLES {} {}").format(
+                        sql.Identifier(owner), sql.Identifier(schema), sql.SQL(action),
+                        sql.SQL(", ").join(map(sql.SQL, sorted(privileges))), sql.SQL(preposition),
+                        sql.Identifier(grantee)))
+    return statements
+
+def change_statement(action, grantee, privileges, tables):
+    """One GRANT/REVOKE of privileges on a list of (schema, table)."""
+    return sql.SQL("{} {} ON TABLE {} {} {}").format(
+        sql.SQL(action), sql.SQL(", ").join(map(sql.SQL, privileges)),
+        sql.SQL(", ").join(sql.Identifier(schema, table) for schema, table in tables),
+        sql.SQL("TO" if action == "GRANT" else "FROM"), sql.Identifier(grantee))
+
+def plan_batches(changes, batch_tables, tables_per_statement):
+    """[(statements, grants)] per batch; all changes to a table stay in one batch."""
+    by_table = defaultdict(list)
+    for change in changes:
+        by_table[(change.schema, change.table)].append(change)
+    table_keys = list(by_table)
+
+    batches = []
+    for start in range(0, len(table_keys), batch_tables):
+        groups = defaultdict(list)
+        grants = 0
+        for key in table_keys[start:start + batch_tables]:
+            for change in by_table[key]:
+                groups[(change.action, change.grantee, change.privileges)].append(key)
+                grants += len(change.privileges)
+        statements = []
+        for (action, grantee, privileges), keys in groups.items():
+            for offset in range(0, len(keys), tables_per_statement):
+                statements.append(change_statement(action, grantee, privileges, keys[offset:offset + tables_per_statement]))
+        batches.append((statements, grants))
+    return batches
+
+class _WorkerState(threading.local):
+    conn = None
+
+class Rollout:
+    """Applies batches as one transaction each over a small pool of connections."""
+
+    def __init__(self, dsn, dbname, workers=4, lock_timeout="5s", retries=3):
+        self.dsn = dsn
+        self.dbname = dbname
+        self.workers = workers
+        self.lock_timeout = lock_timeout
+        self.retries = retries
+        self._state = _WorkerState()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _init_worker(self):
+        conn = connect(self.dsn, dbname=self.dbname)
+        conn.execute(sql.SQL("SET application_name = {}").format(sql.Literal(APPLICATION_NAME)))
+        conn.execute(sql.SQL("SET lock_timeout = {}").format(sql.Literal(self.lock_timeout)))
+        self._state.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+
+    def _apply(self, batch):
+        statements, grants = batch
+        conn = self._state.conn
+        retries = 0
+        started = time.perf_counter()
+        while True:
+            try:
+                with conn.transaction():
+                    for statement in statements:
+                        conn.execute(statement)
+                break
+            except psycopg.errors.LockNotAvailable:
+                if retries >= self.retries:
+                    raise
+                retries += 1
+                time.sleep(0.1 * 2 ** retries)
+        return Applied(len(statements), grants, time.perf_counter() - started, retries)
+
+    def run(self, batches):
+        """Apply every batch; returns ([Applied], seconds)."""
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, initializer=self._init_worker) as pool:
+                started = time.perf_counter()
+                applied = list(pool.map(self._apply, batches))
+                return applied, time.perf_counter() - started
+        finally:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+def setup_bench(dsn, dbname, rules, tables, pre_granted, seed):
+    """Fresh database with tables in every rule's schema, some of the privileges already granted."""
+    with connect(dsn) as admin:
+        drop_database(admin, dbname)
+        create_database(admin, dbname)
+        for grantee in sorted({rule.grantee for rule in rules}):
+            if not admin.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", [grantee]).fetchone():
+                admin.execute(sql.SQL("CREATE ROLE {}").format(sql.Identifier(grantee)))
+
+    rng = random.Random(seed)
+    with connect(dsn, dbname=dbname) as conn:
+        for schema in sorted({rule.schema for rule in rules}):
+            conn.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(schema)))
+            # One transaction per 1000 tables keeps within max_locks_per_transaction
+            for start in range(0, tables, 1000):
+                conn.execute(sql.SQL(
+                    "DO $$ BEGIN FOR i IN {}..{} LOOP "
+                    "EXECUTE format('CREATE TABLE %I.%I (id integer PRIMARY KEY, payload text)', {}, 't' || i); "
+                    "END LOOP; END $$").format(sql.Literal(start + 1), sql.Literal(min(start + 1000, tables)),
+                                                sql.Literal(schema)))
+
+        pre = []
+        for rule in rules:
+            for index in range(1, tables + 1):
+                privileges = [privilege for privilege in sorted(rule.privileges) if rng.random() < pre_granted]
+                if privileges:
+                    pre.append(change_statement("GRANT", rule.grantee, privileges, [(rule.schema, f"t{index}")]))
+        for start in range(0, len(pre), 1000):
+            with conn.transaction():
+                for statement in pre[start:start + 1000]:
+                    conn.execute(statement)
+
+def plan(conn, rules, owners, revoke_extra):
+    """(table changes, default-privilege statements, tables examined) for the rules."""
+    desired = desired_privileges(rules)
+    schemas = sorted({rule.schema for rule in rules})
+    grantees = sorted({rule.grantee for rule in rules})
+    tables, actual = actual_table_privileges(conn, schemas, grantees)
+    changes = diff_tables(desired, tables, actual, revoke_extra)
+    defaults = []
+    if owners:
+        defaults = default_privilege_statements(desired, owners, actual_default_privileges(conn, schemas, grantees),
+                                                revoke_extra)
+    return changes, defaults, tables
+
+def lock_wait_seconds(sampler):
+    """Session-seconds the sampled sessions spent waiting on heavyweight locks while the sampler ran."""
+    waits = sum(count for wait, count in sampler.totals['wait'].items() if wait.startswith("Lock:"))
+    return waits * sampler.seconds / sampler.ticks if sampler.ticks else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply only the missing table privileges, in batches.")
+    add_connection_arguments(parser)
+    parser.add_argument("--database", default=None, help="database to roll out to (default: the --dsn database)")
+    parser.add_argument("--rule", action="append", type=parse_rule, required=True, dest="rules",
+                        help="'PRIVILEGES ON schema TO role'; repeat for more rules")
+    parser.add_argument("--default-privileges", action="store_true",
+                        help="also set ALTER DEFAULT PRIVILEGES for tables created later")
+    parser.add_argument("--owners", nargs="+", default=None,
+                        help="roles whose future tables get the default privileges (default: current user)")
+    parser.add_argument("--revoke-extra", action="store_true", help="revoke privileges the rules do not list")
+    parser.add_argument("--apply", action="store_true", help="run the statements (default: only plan)")
+    parser.add_argument("--workers", type=int, default=4, help="connections applying batches (default 4)")
+    parser.add_argument("--batch-tables", type=int, default=500, help="tables per transaction (default 500)")
+    parser.add_argument("--tables-per-statement", type=int, default=100,
+                        help="tables named in one GRANT/REVOKE; 1 gives per-table statements (default 100)")
+    parser.add_argument("--lock-timeout", default="5s", help="lock_timeout for each batch (default 5s)")
+    parser.add_argument("--retries", type=int, default=3, help="retries of a batch that hit lock_timeout")
+    parser.add_argument("--sample-hz", type=float, default=50, help="pg_stat_activity samples/s while applying")
+    parser.add_argument("--setup-tables", type=int, default=0, metavar="N",
+                        help="recreate --database with N tables per schema for a rehearsal")
+    parser.add_argument("--pre-granted", type=float, default=0.5, help="share of privileges already granted by setup")
+    parser.add_argument("--sql-out", default=None, help="write the planned statements to this path")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.setup_tables:
+        args.database = args.database or "grant_rollout_bench"
+        print(f"Creating {args.setup_tables:,} tables per schema in {args.database}...")
+        setup_bench(args.dsn, args.database, args.rules, args.setup_tables, args.pre_granted, args.seed)
+
+    with connect(args.dsn, dbname=args.database) as conn:
+        missing = [rule.grantee for rule in args.rules
+                   if not conn.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", [rule.grantee]).fetchone()]
+        if missing:
+            print(f"✗ Unknown role(s): {', '.join(sorted(set(missing)))}")
+            return 1
+        owners = (args.owners or [conn.info.parameter_status("session_authorization")]) if args.default_privileges else []
+
+        started = time.perf_counter()
+        changes, defaults, tables = plan(conn, args.rules, owners, args.revoke_extra)
+        batches = plan_batches(changes, args.batch_tables, args.tables_per_statement)
+        diff_seconds = time.perf_counter() - started
+
+        statements = sum(len(batch[0]) for batch in batches) + len(defaults)
+        grants = sum(batch[1] for batch in batches)
+        print(f"✓ Diffed {len(tables):,} tables in {diff_seconds:.2f}s: {len(changes):,} table changes "
+              f"({grants:,} privileges), {len(defaults)} default-privilege changes")
+        print(f"  {statements:,} statements in {len(batches)} batches of up to {args.batch_tables} tables")
+
+        if args.sql_out:
+            with open(args.sql_out, "w") as f:
+                for statement in defaults + [statement for batch in batches for statement in batch[0]]:
+                    f.write(statement.as_string(conn) + ";\n")
+            print(f"✓ Statements: {args.sql_out}")
+        if not args.apply:
+            return 0
+
+        for statement in defaults:
+            conn.execute(statement)
+
+    # Only the rollout's own workers, not whatever else runs on the cluster
+    sampler = ActivitySampler(args.dsn, hz=args.sample_hz, application_name=APPLICATION_NAME)
+    sampling = sampler.start()
+    try:
+        applied, elapsed = Rollout(args.dsn, args.database, args.workers, args.lock_timeout, args.retries).run(batches)
+    finally:
+        # Wait out the poll in progress before reading the aggregates
+        sampler.stop()
+        sampling.join()
+        sampler.close()
+
+    with connect(args.dsn, dbname=args.database) as conn:
+        remaining, remaining_defaults, _ = plan(conn, args.rules, owners, args.revoke_extra)
+
+    result = {
+        'tables': len(tables),
+        'statements': sum(item.statements for item in applied) + len(defaults),
+        'grants': sum(item.grants for item in applied),
+        'batches': len(applied),
+        'seconds': elapsed,
+        'statements_per_second': sum(item.statements for item in applied) / elapsed if elapsed else 0.0,
+        'grants_per_second': sum(item.grants for item in applied) / elapsed if elapsed else 0.0,
+        'slowest_batch_seconds': max((item.seconds for item in applied), default=0.0),
+        'retries': sum(item.retries for item in applied),
+        'lock_wait_seconds': lock_wait_seconds(sampler),
+        'remaining_changes': len(remaining) + len(remaining_defaults),
+    }
+    print_table(["Statements", "Privileges", "Batches", "Seconds", "Statements/s", "Privileges/s",
+                 "Slowest batch s", "Retries", "Lock wait s"],
+                [(result['statements'], result['grants'], result['batches'], f"{elapsed:.2f}",
+                  f"{result['statements_per_second']:,.0f}", f"{result['grants_per_second']:,.0f}",
+                  f"{result['slowest_batch_seconds']:.3f}", result['retries'], f"{result['lock_wait_seconds']:.2f}")])
+    mark = "✓" if not result['remaining_changes'] else "✗"
+    print(f"{mark} {result['remaining_changes']} differences remain after the rollout")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0 if not result['remaining_changes'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
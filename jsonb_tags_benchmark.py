@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Benchmark the products tag filter from assignment2solution,
+
+    SELECT * FROM products WHERE details->'tags' ? 'electronics';
+
+on millions of generated product documents, under each way of indexing it:
+  • unindexed
+  • jsonb_ops       - CREATE INDEX ... USING GIN (details)
+  • jsonb_path_ops  - CREATE INDEX ... USING GIN (details jsonb_path_ops)
+  • expression      - CREATE INDEX ... USING GIN ((details->'tags'))
+
+The GIN indexes on the whole document cannot serve `details->'tags' ? tag`.
+The query is therefore also measured rewritten as containment,
+
+    details @> '{"tags": ["electronics"]}'
+
+which both opclasses support. The two-tag forms (`?&` and @> with both
+tags) are measured the same way. For each setup and query form, the report
+shows median latency for common, middling and rare tags, and whether the
+plan used the index. Counts are checked against the unindexed run.
+
+Write amplification is measured by inserting --write-rows copies of
+existing documents and appending a tag to as many rows, inside a
+transaction that is rolled back. The WAL this generates includes flushing
+the GIN pending list. It is reported per row and relative to the unindexed
+table.
+
+The documents come from generate_synthetic_data.py (Zipfian tags) and are
+loaded with bulk_load.py.
+
+Usage:
+    python jsonb_tags_benchmark.py --rows 2000000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+from psycopg.types.json import Jsonb
+
+from pg_local import add_connection_arguments, connect, create_database, drop_database, print_table
+from generate_synthetic_data import ensure_generated
+from bulk_load import BulkLoader, manifest_chunks
+
+INDEX_NAME = "products_details_gin"
+
+SETUPS = {
+    'unindexed': None,
+    'jsonb_ops': f"CREATE INDEX {INDEX_NAME} ON products USING GIN (details)",
+    'jsonb_path_ops': f"CREATE INDEX {INDEX_NAME} ON products USING GIN (details jsonb_path_ops)",
+    'expression': f"CREATE INDEX {INDEX_NAME} ON products USING GIN ((details->'tags'))",
+}
+
+# Query form -> (SQL, builds the parameter from a list of tags)
+QUERY_FORMS = {
+    'exists': ("SELECT count(*) FROM products WHERE details->'tags' ? %s", lambda tags: tags[0]),
+    'contains': ("SELECT count(*) FROM products WHERE details @> %s", lambda tags: Jsonb({'tags': tags[:1]})),
+    'exists_all': ("SELECT count(*) FROM products WHERE details->'tags' ?& %s", lambda tags: tags),
+    'contains_all': ("SELECT count(*) FROM products WHERE details @> %s", lambda tags: Jsonb({'tags': tags})),
+}
+
+# The same filter in each form; exists_all/contains_all use two tags
+EQUIVALENT = {'contains': 'exists', 'contains_all': 'exists_all'}
+
+# Tags are drawn with Zipfian frequency, so TAGS[0] is the most common
+TAG_GROUPS = {
+    'common': [["electronics"], ["electronics", "gadgets"]],
+    'middling': [["toys"], ["toys", "books"]],
+    'rare': [["fitness"], ["garden", "fitness"]],
+}
+
+WRITE_SQL = [
+    "INSERT INTO products (details) SELECT details FROM products ORDER BY product_id LIMIT %(rows)s",
+    "UPDATE products SET details = jsonb_set(details, '{tags}', (details->'tags') || '[\"clearance\"]') "
+    "WHERE product_id <= %(rows)s",
+]
+
+Timing = namedtuple("Timing", "setup form group ms count uses_index")
+
+def load_products(dsn, dbname, data_dir, rows, workers, seed):
+    ensure_generated(["products"], rows, data_dir, workers, seed)
+    with connect(dsn) as admin:
+        drop_database(admin, dbname)
+        create_database(admin, dbname)
+    with connect(dsn, dbname=dbname) as conn:
+        conn.execute("CREATE TABLE products (product_id SERIAL PRIMARY KEY, details JSONB)")
+    BulkLoader(dsn, dbname, workers).run(manifest_chunks(data_dir, ["products"]), [])
+    with connect(dsn, dbname=dbname) as conn:
+        conn.execute("VACUUM ANALYZE products")
+
+def uses_index(conn, statement, param):
+    plan = conn.execute("EXPLAIN (FORMAT JSON) " + statement, [param]).fetchone()[0]
+    return INDEX_NAME in json.dumps(plan)
+
+def time_forms(conn, setup, runs):
+    """Median latency of every query form for every tag group."""
+    timings = []
+    for form, (statement, make_param) in QUERY_FORMS.items():
+        tag_count = 2 if form.endswith("_all") else 1
+        for group, tag_lists in TAG_GROUPS.items():
+            tags = next(tag_list for tag_list in tag_lists if len(tag_list) == tag_count)
+            param = make_param(tags)
+            samples = []
+            count = None
+            for _ in range(runs + 1):
+                started = time.perf_counter()
+                count = conn.execute(statement, [param]).fetchone()[0]
+                samples.append((time.perf_counter() - started) * 1000)
+            timings.append(Timing(setup, form, group, statistics.median(samples[1:]), count,
+                                  uses_index(conn, statement, param)))
+    return timings
+
+def write_cost(conn, write_rows):
+    """(WAL bytes, seconds) for the insert/update batch plus pending-list flush, rolled back.
+
+    The insert position is used: WAL of a rolled-back transaction may never be flushed.
+    """
+    conn.execute("CHECKPOINT")
+    start = conn.execute("SELECT pg_current_wal_insert_lsn()").fetchone()[0]
+    started = time.perf_counter()
+    with conn.transaction(force_rollback=True):
+        for statement in WRITE_SQL:
+            conn.execute(statement, {'rows': write_rows})
+        if conn.execute("SELECT to_regclass(%s)", [INDEX_NAME]).fetchone()[0]:
+            conn.execute("SELECT gin_clean_pending_list(%s::regclass)", [INDEX_NAME])
+    seconds = time.perf_counter() - started
+    wal = conn.execute("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), %s)", [start]).fetchone()[0]
+    return int(wal), seconds
+
+def run_setup(conn, setup, runs, write_rows):
+    """Build one setup, time its queries and writes, then drop it."""
+    result = {'setup': setup, 'build_seconds': 0.0, 'index_bytes': 0}
+    if SETUPS[setup]:
+        started = time.perf_counter()
+        conn.execute(SETUPS[setup])
+        result['build_seconds'] = time.perf_counter() - started
+        result['index_bytes'] = conn.execute("SELECT pg_relation_size(%s::regclass)", [INDEX_NAME]).fetchone()[0]
+        conn.execute("ANALYZE products")
+
+    timings = time_forms(conn, setup, runs)
+    result['wal_bytes'], result['write_seconds'] = write_cost(conn, write_rows)
+
+    conn.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+    conn.execute("VACUUM products")
+    return result, timings
+
+def check_counts(timings):
+    """Counts must agree across setups, and between equivalent query forms."""
+    expected = {}
+    problems = []
+    for timing in timings:
+        key = (EQUIVALENT.get(timing.form, timing.form), timing.group)
+        if expected.setdefault(key, timing.count) != timing.count:
+            problems.append(f"{timing.setup}/{timing.form}/{timing.group}: {timing.count} rows, expected {expected[key]}")
+    return problems
+
+def report(results, timings, write_rows):
+    base = next((result for result in results if result['setup'] == "unindexed"), None)
+    per_row = 2 * write_rows
+    print_table(
+        ["Setup", "Build s", "Index MB", "Write WAL B/row", "Write amplification", "Write ms/1k rows"],
+        [(result['setup'], f"{result['build_seconds']:.1f}", f"{result['index_bytes'] / 1e6:.1f}",
+          f"{result['wal_bytes'] / per_row:,.0f}",
+          f"{result['wal_bytes'] / base['wal_bytes']:.2f}x" if base else "-",
+          f"{result['write_seconds'] * 1000 / per_row * 1000:.1f}")
+         for result in results],
+    )
+
+    groups = list(TAG_GROUPS)
+    rows = []
+    for result in results:
+        for form in QUERY_FORMS:
+            cells = {timing.group: timing for timing in timings if timing.setup == result['setup'] and timing.form == form}
+            rows.append([result['setup'], form] + [f"{cells[group].ms:.2f}" for group in groups] +
+                        ["yes" if any(cell.uses_index for cell in cells.values()) else "no"])
+    print("\nMedian latency (ms) by tag frequency")
+    print_table(["Setup", "Query form"] + groups + ["Index used"], rows)
+
+    print()
+    for group in groups:
+        single = [timing for timing in timings if timing.group == group and timing.form in ("exists", "contains")]
+        best = min(single, key=lambda timing: timing.ms)
+        print(f"✓ Fastest single-tag filter for a {group} tag: {best.setup} + {best.form} ({best.ms:.2f} ms)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSONB tag filters on products under different GIN indexes.")
+    add_connection_arguments(parser)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="product documents (default 1,000,000)")
+    parser.add_argument("--setups", nargs="+", choices=list(SETUPS), default=list(SETUPS))
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per query; the median is kept")
+    parser.add_argument("--write-rows", type=int, default=10_000, help="rows inserted and updated for the WAL test")
+    parser.add_argument("--workers", type=int, default=4, help="processes/connections for generating and loading")
+    parser.add_argument("--data-dir", default=os.path.join("bench_work", "products"), help="synthetic data cache")
+    parser.add_argument("--reuse-db", action="store_true", help="reuse an existing jsonb_bench database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    dbname = "jsonb_bench"
+    if not args.reuse_db:
+        print(f"Loading {args.rows:,} product documents into {dbname}...")
+        load_products(args.dsn, dbname, args.data_dir, args.rows, args.workers, args.seed)
+
+    results = []
+    timings = []
+    with connect(args.dsn, dbname=dbname) as conn:
+        for setup in ["unindexed"] + [setup for setup in args.setups if setup != "unindexed"]:
+            print(f"Running {setup}...")
+            result, setup_timings = run_setup(conn, setup, args.runs, args.write_rows)
+            results.append(result)
+            timings.extend(setup_timings)
+
+    for problem in check_counts(timings):
+        print(f"✗ {problem}")
+    report(results, timings, args.write_rows)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'setups': results, 'timings': [timing._asdict() for timing in timings]}, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
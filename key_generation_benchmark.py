@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Compare primary-key generation strategies under concurrent inserts.
+
+Question 3a relies on SERIAL and Question 3g creates a sequence by hand.
+This benchmark inserts --rows rows into a fresh table for each key strategy,
+split across --clients connections (1-64):
+  • serial        - id SERIAL PRIMARY KEY (a sequence with CACHE 1)
+  • seq_cache<N>  - bigint DEFAULT nextval() from a sequence with CACHE N,
+                    for every N in --caches
+  • identity      - bigint GENERATED ALWAYS AS IDENTITY
+  • uuid4         - uuid DEFAULT gen_random_uuid()
+  • uuid7         - time-ordered UUIDv7 generated by the client (RFC 9562);
+                    PostgreSQL 16 has no server-side generator
+
+Every client commits --batch rows per transaction. For each strategy and
+client count the report shows:
+  • rows/s and WAL bytes per row, which includes the full-page images that
+    random keys cause
+  • primary-key index size and page splits. An insert-only B-tree grows
+    only by splitting, so splits are the index's blocks minus the metapage
+    and the first root.
+  • leaf fill: the size of the same index built in one pass, relative to
+    the size it reached through inserts
+
+Usage:
+    python key_generation_benchmark.py --rows 200000 --clients 1 8 64
+    python key_generation_benchmark.py --strategies serial uuid4 uuid7 --caches 1 100 --batch 1
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from pg_local import add_connection_arguments, connect, scratch_database, print_table
+
+DBNAME = "keygen_bench"
+STRATEGIES = ["serial", "seq_cache", "identity", "uuid4", "uuid7"]
+
+def uuid7():
+    """A UUIDv7: 48-bit Unix milliseconds, version 7, then 74 random bits."""
+    millis = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (millis & (2 ** 48 - 1)) << 80
+    value |= 0x7 << 76 | ((rand >> 62) & 0xFFF) << 64
+    value |= 0b10 << 62 | (rand & (2 ** 62 - 1))
+    return uuid.UUID(int=value)
+
+def table_sql(strategy, cache=None):
+    """DDL for the benchmark table under one key strategy."""
+    if strategy == "serial":
+        key = "id SERIAL PRIMARY KEY"
+    elif strategy == "seq_cache":
+        return (f"CREATE SEQUENCE keygen_seq CACHE {cache};\n"
+                "CREATE TABLE keygen (id BIGINT PRIMARY KEY DEFAULT nextval('keygen_seq'), "
+                "payload TEXT, created_at TIMESTAMPTZ DEFAULT now())")
+    elif strategy == "identity":
+        key = "id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY"
+    elif strategy == "uuid4":
+        key = "id UUID PRIMARY KEY DEFAULT gen_random_uuid()"
+    else:
+        key = "id UUID PRIMARY KEY"
+    return f"CREATE TABLE keygen ({key}, payload TEXT, created_at TIMESTAMPTZ DEFAULT now())"
+
+def variants(strategies, caches):
+    """(label, strategy, cache) for every table to benchmark."""
+    result = []
+    for strategy in strategies:
+        if strategy == "seq_cache":
+            result += [(f"seq_cache{cache}", strategy, cache) for cache in caches]
+        else:
+            result.append((strategy, strategy, None))
+    return result
+
+class _ClientState(threading.local):
+    conn = None
+
+def insert_rows(dsn, strategy, rows, clients, batch):
+    """Insert rows over clients connections, batch rows per transaction; returns seconds."""
+    state = _ClientState()
+    connections = []
+    lock = threading.Lock()
+    client_side = strategy == "uuid7"
+    statement = ("INSERT INTO keygen (id, payload) VALUES (%s, %s)" if client_side
+                 else "INSERT INTO keygen (payload) VALUES (%s)")
+
+    def init_client():
+        state.conn = connect(dsn, dbname=DBNAME)
+        with lock:
+            connections.append(state.conn)
+
+    def run(count):
+        conn = state.conn
+        cursor = conn.cursor()
+        for start in range(0, count, batch):
+            size = min(batch, count - start)
+            params = [(uuid7(), "payload") if client_side else ("payload",) for _ in range(size)]
+            with conn.transaction():
+                cursor.executemany(statement, params)
+
+    shares = [rows // clients + (1 if index < rows % clients else 0) for index in range(clients)]
+    # Each task blocks at the barrier until all are running, so every worker starts and connects before the clock
+    warmed_up = threading.Barrier(clients)
+    try:
+        with ThreadPoolExecutor(max_workers=clients, initializer=init_client) as pool:
+            list(pool.map(lambda _: warmed_up.wait(), range(clients)))
+            started = time.perf_counter()
+            list(pool.map(run, shares))
+            return time.perf_counter() - started
+    finally:
+        for conn in connections:
+            conn.close()
+
+def index_stats(conn):
+    """(bytes, page splits, bytes of the same index built in one pass) for the primary key."""
+    size = conn.execute("SELECT pg_relation_size('keygen_pkey')").fetchone()[0]
+    conn.execute("CREATE UNIQUE INDEX keygen_compact ON keygen (id)")
+    compact = conn.execute("SELECT pg_relation_size('keygen_compact')").fetchone()[0]
+    conn.execute("DROP INDEX keygen_compact")
+    return size, max(0, size // 8192 - 2), compact
+
+def run_variant(dsn, label, strategy, cache, rows, clients, batch):
+    with connect(dsn, dbname=DBNAME) as conn:
+        conn.execute("DROP TABLE IF EXISTS keygen; DROP SEQUENCE IF EXISTS keygen_seq")
+        conn.execute(table_sql(strategy, cache))
+        conn.execute("CHECKPOINT")
+        wal_start = conn.execute("SELECT pg_current_wal_lsn()").fetchone()[0]
+
+        seconds = insert_rows(dsn, strategy, rows, clients, batch)
+
+        wal = conn.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", [wal_start]).fetchone()[0]
+        count = conn.execute("SELECT count(*) FROM keygen").fetchone()[0]
+        size, splits, compact = index_stats(conn)
+    return {
+        'strategy': label,
+        'clients': clients,
+        'rows': count,
+        'seconds': seconds,
+        'rows_per_second': count / seconds,
+        'wal_bytes_per_row': int(wal) / count,
+        'index_bytes': size,
+        'page_splits': splits,
+        'compact_index_bytes': compact,
+        'leaf_fill': compact / size if size else None,
+    }
+
+def report(results):
+    print_table(
+        ["Strategy", "Clients", "Rows/s", "WAL B/row", "Index MB", "Page splits", "One-pass MB", "Fill vs one-pass"],
+        [(result['strategy'], result['clients'], f"{result['rows_per_second']:,.0f}",
+          f"{result['wal_bytes_per_row']:,.0f}", f"{result['index_bytes'] / 1e6:.1f}", f"{result['page_splits']:,}",
+          f"{result['compact_index_bytes'] / 1e6:.1f}", f"{result['leaf_fill'] * 100:.0f}%")
+         for result in results],
+    )
+    for clients in sorted({result['clients'] for result in results}):
+        group = [result for result in results if result['clients'] == clients]
+        fastest = max(group, key=lambda result: result['rows_per_second'])
+        smallest = min(group, key=lambda result: result['index_bytes'])
+        print(f"✓ {clients} client(s): fastest {fastest['strategy']} ({fastest['rows_per_second']:,.0f} rows/s), "
+              f"smallest index {smallest['strategy']} ({smallest['index_bytes'] / 1e6:.1f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Insert throughput and index shape for key generation strategies.")
+    add_connection_arguments(parser)
+    parser.add_argument("--rows", type=int, default=200_000, help="rows per run (default 200,000)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64], help="client counts (default 1 8 64)")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--caches", type=int, nargs="+", default=[32, 1000], help="CACHE sizes for seq_cache")
+    parser.add_argument("--batch", type=int, default=10, help="rows per transaction (default 10)")
+    parser.add_argument("--keep", action="store_true", help=f"keep the {DBNAME} database afterwards")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    results = []
+    with scratch_database(args.dsn, DBNAME, keep=args.keep):
+        for clients in args.clients:
+            for label, strategy, cache in variants(args.strategies, args.caches):
+                print(f"Running {label} with {clients} client(s)...")
+                results.append(run_variant(args.dsn, label, strategy, cache, args.rows, clients, args.batch))
+
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,23 +4,27 @@ Merge all Advanced Database course slides into one PDF.
 """
 
 from PyPDF2 import PdfMerger
+import argparse
 import os
 
-def merge_pdf_slides():
-    """Merge all course slides in logical order."""
+from profiling import profileable, add_profile_argument
+
+# Slide files in the desired order
+SLIDE_FILES = [
+    "Ch01_The Basics.pdf",
+    "Ch02_Database Administration (1).pdf",
+    "Ch03_psql.pdf",
+    "Ch04_pgadmin.pdf",
+    "Ch05_Data Types.pdf",
+    "Ch05_Full Text Search.pdf"
+]
 
-    # Define slide files in the desired order
-    slide_files = [
-        "Ch01_The Basics.pdf",
-        "Ch02_Database Administration (1).pdf",
-        "Ch03_psql.pdf",
-        "Ch04_pgadmin.pdf",
-        "Ch05_Data Types.pdf",
-        "Ch05_Full Text Search.pdf"
-    ]
+@profileable("output_file")
+def merge_pdf_slides(slide_files=None, output_file="adv_db_merged_slides.pdf"):
+    """Merge all course slides in logical order."""
 
-    # Output file
-    output_file = "adv_db_merged_slides.pdf"
+    if slide_files is None:
+        slide_files = SLIDE_FILES
 
     # Create PDF merger
     merger = PdfMerger()
@@ -59,4 +63,6 @@ def merge_pdf_slides():
     return output_file, total_pages
 
 if __name__ == "__main__":
-    merge_pdf_slides()
+    parser = add_profile_argument(argparse.ArgumentParser(description="Merge the course slides into one PDF."))
+    args = parser.parse_args()
+    merge_pdf_slides(profile=args.profile)
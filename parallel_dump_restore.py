@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Parallel pg_dump/pg_restore with a job count chosen from the catalog and an
+explicit largest-first restore schedule.
+
+Section 4 shows `pg_dump -F d` and `pg_restore -j 4`, with 4 as a guess. This
+orchestrator reads the table sizes of the database first. A table's data is
+dumped and restored by one worker, so no job count can finish sooner than
+the largest table. The jobs picked are the fewest that still reach that
+bound: total / largest, capped by the CPUs, the number of tables, and
+--min-mb-per-job of data per worker. --jobs overrides it.
+
+Dump: `pg_dump -F d -j N -v`. pg_dump already hands out table data
+largest-first, and its progress lines give per-table timings.
+
+Restore, in three phases:
+  1. pre-data   - `pg_restore --section=pre-data`: tables without indexes
+  2. data       - one `pg_restore -L` per TABLE DATA entry, largest first on
+                  a pool of N workers, then every other data-section entry
+                  (sequence values, large objects) in one more run
+  3. post-data  - `pg_restore --section=post-data -j N`: indexes,
+                  constraints and triggers are built in parallel on loaded
+                  tables
+
+For comparison it also runs a serial dump and restore (-j 1) and a plain
+`pg_restore -j N`. Row counts of every restored table are checked against
+the source. The report gives per-table dump and restore times and the
+overall speedup.
+
+Without --database a course database is built at --scale with course_schema.py.
+
+Usage:
+    python parallel_dump_restore.py --scale 50
+    python parallel_dump_restore.py --database mydb --jobs 8 --skip-serial
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg import sql
+
+from pg_local import (add_connection_arguments, connect, conninfo, create_database, drop_database, pg_binary,
+                      run_command, print_table)
+from course_schema import build_course_database
+
+TableSize = namedtuple("TableSize", "schema name bytes")
+TocEntry = namedtuple("TocEntry", "line kind schema name")
+Step = namedtuple("Step", "label seconds")
+
+SIZES_SQL = """
+SELECT n.nspname, c.relname, pg_table_size(c.oid)
+FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p', 'm') AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+  AND n.nspname NOT LIKE 'pg_toast%'
+ORDER BY 3 DESC
+"""
+
+# The owner is empty for some entries (BLOBS)
+TOC_RE = re.compile(r"^\d+; \d+ \d+ (TABLE DATA|SEQUENCE SET|[A-Z ]+?) (\S+) (.+) (\S*)$")
+DUMP_START_RE = re.compile(r'dumping contents of table "([^"]+)\.([^"]+)"')
+DUMP_FINISH_RE = re.compile(r"finished item \d+ TABLE DATA (.+)$")
+
+def table_sizes(conn):
+    return [TableSize(*row) for row in conn.execute(SIZES_SQL).fetchall()]
+
+def choose_jobs(sizes, cpus, min_bytes_per_job):
+    """Fewest jobs that reach the largest-table bound, capped by CPUs, tables and data per job."""
+    total = sum(size.bytes for size in sizes)
+    largest = max((size.bytes for size in sizes), default=0)
+    if not total:
+        return 1
+    return max(1, min(cpus, len(sizes), math.ceil(total / largest), total // max(1, min_bytes_per_job)))
+
+def toc_entries(pg_restore, archive, section=None):
+    """TOC lines of an archive, or of one --section of it, as TocEntry (kind TABLE DATA, SEQUENCE SET, ...).
+
+    A line the pattern does not recognise is kept with kind None, so no entry is lost.
+    """
+    args = [pg_restore, "-l", archive] + ([f"--section={section}"] if section else [])
+    listing = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+    entries = []
+    for line in listing.splitlines():
+        if not line.strip() or line.startswith(";"):
+            continue
+        match = TOC_RE.match(line)
+        entries.append(TocEntry(line, *match.group(1, 2, 3)) if match else TocEntry(line, None, None, None))
+    return entries
+
+def dump_table_seconds(lines):
+    """Per-table seconds from pg_dump -v output; a table ends at its 'finished' line, or the next line."""
+    started = {}
+    seconds = {}
+    for index, (at, line) in enumerate(lines):
+        match = DUMP_START_RE.search(line)
+        if match:
+            started[match.group(2)] = (match.group(1), at, index)
+            continue
+        match = DUMP_FINISH_RE.search(line)
+        if match and match.group(1) in started:
+            schema, begin, _ = started[match.group(1)]
+            seconds[(schema, match.group(1))] = at - begin
+    for name, (schema, begin, index) in started.items():
+        if (schema, name) not in seconds:
+            following = lines[index + 1][0] if index + 1 < len(lines) else lines[-1][0]
+            seconds[(schema, name)] = following - begin
+    return seconds
+
+def check(result, what):
+    if result.returncode != 0:
+        errors = "\n".join(line for _, line in result.lines[-10:])
+        raise RuntimeError(f"{what} failed with exit code {result.returncode}:\n{errors}")
+    return result
+
+def dump(pg_dump, dsn, database, directory, jobs, verbose=False):
+    shutil.rmtree(directory, ignore_errors=True)
+    args = [pg_dump, "-F", "d", "-j", str(jobs), "-f", directory, "-d", conninfo(dsn, database)]
+    return check(run_command(args + (["-v"] if verbose else [])), f"pg_dump -j {jobs}")
+
+def fresh_database(dsn, name):
+    with connect(dsn) as admin:
+        drop_database(admin, name)
+        create_database(admin, name)
+
+def plain_restore(pg_restore, dsn, target, archive, jobs):
+    fresh_database(dsn, target)
+    args = [pg_restore, "-j", str(jobs), "-d", conninfo(dsn, target), archive]
+    return check(run_command(args), f"pg_restore -j {jobs}").seconds
+
+def scheduled_restore(pg_restore, dsn, target, archive, jobs, sizes):
+    """Three-phase restore; returns (start time, [Step] per phase, {(schema, table): seconds}).
+
+    The clock starts after the target database is created, as it does for plain_restore.
+    """
+    fresh_database(dsn, target)
+    started = time.perf_counter()
+    target_info = conninfo(dsn, target)
+    steps = []
+
+    check(run_command([pg_restore, "--section=pre-data", "-d", target_info, archive]), "pre-data restore")
+    steps.append(Step("pre-data", time.perf_counter()))
+
+    entries = toc_entries(pg_restore, archive, "data")
+    by_size = {(size.schema, size.name): size.bytes for size in sizes}
+    tables = sorted((entry for entry in entries if entry.kind == "TABLE DATA"),
+                    key=lambda entry: by_size.get((entry.schema, entry.name), 0), reverse=True)
+    rest = [entry for entry in entries if entry.kind != "TABLE DATA"]
+    workdir = tempfile.mkdtemp(prefix="restore_lists_")
+
+    def restore_entries(label, chosen):
+        path = os.path.join(workdir, f"{label}.list")
+        with open(path, "w") as f:
+            f.write("\n".join(entry.line for entry in chosen) + "\n")
+        return check(run_command([pg_restore, "-L", path, "-d", target_info, archive]), f"restore of {label}").seconds
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            table_seconds = dict(zip([(entry.schema, entry.name) for entry in tables],
+                                     pool.map(lambda item: restore_entries(f"table_{item[0]}", [item[1]]),
+                                              enumerate(tables))))
+        if rest:
+            restore_entries("other_data", rest)
+        steps.append(Step("data", time.perf_counter()))
+
+        check(run_command([pg_restore, "--section=post-data", "-j", str(jobs), "-d", target_info, archive]),
+              "post-data restore")
+        steps.append(Step("post-data", time.perf_counter()))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return started, steps, table_seconds
+
+def row_counts(dsn, database, sizes):
+    """Rows per table, and the total bytes of the large objects under ('pg_catalog', 'pg_largeobject').
+
+    The large objects themselves are created in pre-data; only their contents come with the data section.
+    """
+    with connect(dsn, dbname=database) as conn:
+        counts = {(size.schema, size.name): conn.execute(
+                      sql.SQL("SELECT count(*) FROM {}").format(sql.Identifier(size.schema, size.name))).fetchone()[0]
+                  for size in sizes}
+        counts[("pg_catalog", "pg_largeobject")] = conn.execute(
+            "SELECT coalesce(sum(length(lo_get(oid))), 0) FROM pg_largeobject_metadata").fetchone()[0]
+        return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Size-aware parallel pg_dump/pg_restore with per-table timings.")
+    add_connection_arguments(parser)
+    parser.add_argument("--database", default=None, help="database to dump (default: build a course database)")
+    parser.add_argument("--scale", type=float, default=20, help="course_schema scale when building (default 20)")
+    parser.add_argument("--jobs", type=int, default=None, help="override the chosen job count")
+    parser.add_argument("--min-mb-per-job", type=float, default=64, help="data per worker at least (default 64 MB)")
+    parser.add_argument("--skip-serial", action="store_true", help="skip the -j 1 dump and restore")
+    parser.add_argument("--work-dir", default=os.path.join("bench_work", "dumps"), help="where dumps are written")
+    parser.add_argument("--bin-dir", default=None, help="directory of pg_dump/pg_restore")
+    parser.add_argument("--keep", action="store_true", help="keep the dumps and restored databases")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    pg_dump = pg_binary("pg_dump", args.bin_dir)
+    pg_restore = pg_binary("pg_restore", args.bin_dir)
+
+    source = args.database
+    if source is None:
+        source = f"dump_source_s{args.scale:g}".replace(".", "_")
+        print(f"Building {source} at scale {args.scale:g}...")
+        build_course_database(args.dsn, source, args.scale, verbose=False)
+
+    with connect(args.dsn, dbname=source) as conn:
+        sizes = table_sizes(conn)
+    total = sum(size.bytes for size in sizes)
+    jobs = args.jobs or choose_jobs(sizes, os.cpu_count() or 1, int(args.min_mb_per_job * 1e6))
+    if total:
+        largest = sizes[0]
+        print(f"✓ {len(sizes)} tables, {total / 1e6:,.0f} MB; largest {largest.name} ({largest.bytes / 1e6:,.0f} MB) "
+              f"bounds the speedup at {total / largest.bytes:.1f}x -> {jobs} job(s)")
+    else:
+        print(f"✓ {len(sizes)} tables, no table data -> {jobs} job(s)")
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    parallel_dir = os.path.join(args.work_dir, f"{source}.parallel")
+    serial_dir = os.path.join(args.work_dir, f"{source}.serial")
+    restored = f"{source}_restored"
+    result = {'database': source, 'tables': len(sizes), 'bytes': total, 'jobs': jobs}
+
+    print(f"Dumping with {jobs} job(s)...")
+    parallel = dump(pg_dump, args.dsn, source, parallel_dir, jobs, verbose=True)
+    result['dump_seconds'] = parallel.seconds
+    dump_seconds = dump_table_seconds(parallel.lines)
+
+    print("Restoring largest-first...")
+    started, steps, restore_seconds = scheduled_restore(pg_restore, args.dsn, restored, parallel_dir, jobs, sizes)
+    result['restore_seconds'] = steps[-1].seconds - started
+    result['phases'] = {step.label: step.seconds - previous
+                        for step, previous in zip(steps, [started] + [step.seconds for step in steps[:-1]])}
+
+    expected = row_counts(args.dsn, source, sizes)
+    actual = row_counts(args.dsn, restored, sizes)
+    mismatched = [f"{schema}.{name}" for (schema, name), count in expected.items() if actual[(schema, name)] != count]
+
+    print(f"Restoring with pg_restore -j {jobs}...")
+    result['pg_restore_jobs_seconds'] = plain_restore(pg_restore, args.dsn, restored, parallel_dir, jobs)
+    if not args.skip_serial:
+        print("Dumping and restoring serially...")
+        result['serial_dump_seconds'] = dump(pg_dump, args.dsn, source, serial_dir, 1).seconds
+        result['serial_restore_seconds'] = plain_restore(pg_restore, args.dsn, restored, serial_dir, 1)
+
+    print_table(["Table", "MB", "Dump s", "Restore s"],
+                [(f"{size.schema}.{size.name}", f"{size.bytes / 1e6:,.1f}",
+                  f"{dump_seconds.get((size.schema, size.name), 0):.2f}",
+                  f"{restore_seconds.get((size.schema, size.name), 0):.2f}") for size in sizes])
+    rows = [("dump", f"-j {jobs}", f"{result['dump_seconds']:.2f}", result.get('serial_dump_seconds')),
+            ("restore", f"largest-first, {jobs} jobs", f"{result['restore_seconds']:.2f}",
+             result.get('serial_restore_seconds')),
+            ("restore", f"pg_restore -j {jobs}", f"{result['pg_restore_jobs_seconds']:.2f}",
+             result.get('serial_restore_seconds'))]
+    print_table(["Step", "How", "Seconds", "Speedup vs serial"],
+                [(step, how, seconds, f"{serial / float(seconds):.2f}x" if serial else "-")
+                 for step, how, seconds, serial in rows])
+    print("Phases: " + ", ".join(f"{label} {seconds:.2f}s" for label, seconds in result['phases'].items()))
+    if mismatched:
+        print(f"✗ Row counts differ after restore: {', '.join(mismatched)}")
+    else:
+        print(f"✓ Row counts match for all {len(sizes)} tables and the large objects")
+
+    if not args.keep:
+        shutil.rmtree(parallel_dir, ignore_errors=True)
+        shutil.rmtree(serial_dir, ignore_errors=True)
+        with connect(args.dsn) as admin:
+            drop_database(admin, restored)
+    result['tables_detail'] = [{'table': f"{size.schema}.{size.name}", 'bytes': size.bytes,
+                                'dump_seconds': dump_seconds.get((size.schema, size.name)),
+                                'restore_seconds': restore_seconds.get((size.schema, size.name))} for size in sizes]
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 1 if mismatched else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
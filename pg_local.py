@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the tools that run against a local PostgreSQL instance.
+
+Connections use psycopg 3 (`pip install "psycopg[binary]"`). Every tool takes
+a --dsn libpq connection string; when it is empty the usual libpq variables
+(PGHOST, PGPORT, PGUSER, PGPASSWORD, PGDATABASE) apply, so
+
+    PGHOST=localhost PGUSER=postgres python validate_sql_snippets.py
+
+talks to a local server as postgres. The tools create and drop their own
+scratch databases and need a role allowed to do that.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import psycopg
+from psycopg import sql
+from psycopg.conninfo import make_conninfo
+
+DEFAULT_DSN = os.environ.get("ADV_DB_DSN", "")
+
+# A finished client program: exit code, wall and CPU seconds, peak RSS and timestamped stderr lines
+Command = namedtuple("Command", "returncode seconds user_cpu system_cpu max_rss_kb lines")
+
+def add_connection_arguments(parser):
+    """The --dsn option shared by every PostgreSQL tool."""
+    parser.add_argument("--dsn", default=DEFAULT_DSN,
+                        help="libpq connection string for the server (default: $ADV_DB_DSN or libpq PG* variables)")
+    return parser
+
+def connect(dsn=DEFAULT_DSN, dbname=None, autocommit=True, **kwargs):
+    """Open a psycopg connection, optionally to a different database than dsn names."""
+    if dbname is not None:
+        kwargs['dbname'] = dbname
+    return psycopg.connect(dsn, autocommit=autocommit, **kwargs)
+
+async def connect_async(dsn=DEFAULT_DSN, dbname=None, autocommit=True, **kwargs):
+    """connect() for asyncio clients."""
+    if dbname is not None:
+        kwargs['dbname'] = dbname
+    return await psycopg.AsyncConnection.connect(dsn, autocommit=autocommit, **kwargs)
+
+def create_database(admin, name, template=None, strategy=None):
+    """CREATE DATABASE name [TEMPLATE template] [STRATEGY strategy] on an autocommit connection.
+
+    strategy FILE_COPY clones a large template by copying files instead of writing it all to WAL.
+    """
+    query = sql.SQL("CREATE DATABASE {}").format(sql.Identifier(name))
+    if template:
+        query += sql.SQL(" TEMPLATE {}").format(sql.Identifier(template))
+    if strategy:
+        query += sql.SQL(" STRATEGY {}").format(sql.SQL(strategy))
+    admin.execute(query)
+
+def drop_database(admin, name):
+    """Drop a database, terminating any sessions still connected to it."""
+    admin.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(name)))
+
+@contextmanager
+def scratch_database(dsn, name, template=None, keep=False, strategy=None):
+    """Create a database for the duration of the block, then drop it."""
+    with connect(dsn) as admin:
+        drop_database(admin, name)
+        create_database(admin, name, template, strategy)
+    try:
+        yield name
+    finally:
+        if not keep:
+            with connect(dsn) as admin:
+                drop_database(admin, name)
+
+def conninfo(dsn=DEFAULT_DSN, dbname=None):
+    """dsn as a libpq connection string for client programs (pg_dump -d ...), optionally for another database."""
+    return make_conninfo(dsn, dbname=dbname) if dbname is not None else make_conninfo(dsn)
+
+def pg_binary(name, bin_dir=None):
+    """Path of a PostgreSQL client program: from bin_dir, then PATH, then `pg_config --bindir`."""
+    for directory in [bin_dir, None]:
+        path = shutil.which(name, path=directory)
+        if path:
+            return path
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        bindir = subprocess.run([pg_config, "--bindir"], capture_output=True, text=True).stdout.strip()
+        path = shutil.which(name, path=bindir)
+        if path:
+            return path
+    raise FileNotFoundError(f"{name} not found; pass --bin-dir or put the PostgreSQL bin directory on PATH")
+
+def _tree_memory_kb(pid):
+    """(summed VmRSS, largest VmHWM) in kB over pid and its descendants, from /proc."""
+    total = peak = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                    elif line.startswith("VmHWM:"):
+                        peak = max(peak, int(line.split()[1]))
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending += [int(child) for child in f.read().split()]
+        except (OSError, ValueError):
+            continue
+    return total, peak
+
+def run_command(args, poll=0.02):
+    """Run a client program to completion and return a Command.
+
+    stderr lines are timestamped as they arrive (pg_dump -v reports progress there). CPU time comes
+    from os.wait4 and covers any workers the program forked. ru_maxrss would also count this
+    Python process, which the child was forked from, so peak memory is polled from /proc instead:
+    the most the process tree held at once, or its largest single process.
+    """
+    started = time.perf_counter()
+    proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    peak = [0]
+    done = threading.Event()
+
+    def watch():
+        while not done.wait(poll):
+            peak[0] = max(peak[0], *_tree_memory_kb(proc.pid))
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    lines = [(time.perf_counter() - started, line.rstrip("\n")) for line in proc.stderr]
+    _, status, usage = os.wait4(proc.pid, 0)
+    done.set()
+    watcher.join()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    proc.stderr.close()
+    return Command(proc.returncode, time.perf_counter() - started, usage.ru_utime, usage.ru_stime,
+                   peak[0], lines)
+
+class LocalCluster:
+    """A PostgreSQL instance of its own: initdb once, then started and stopped with per-run settings.
+
+    initdb and postgres refuse to run as root; run_as names the OS user they run as then.
+    """
+
+    def __init__(self, data_dir, port=55432, bin_dir=None, run_as=None):
+        self.data_dir = os.path.abspath(data_dir)
+        self.port = port
+        self.bin_dir = bin_dir
+        self.run_as = run_as
+        self.log_path = self.data_dir + ".log"
+
+    @property
+    def dsn(self):
+        return make_conninfo(host="localhost", port=str(self.port), user="postgres", dbname="postgres")
+
+    def _run(self, name, *args):
+        command = [pg_binary(name, self.bin_dir), *args]
+        if self.run_as:
+            command = ["runuser", "-u", self.run_as, "--"] + command
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            log = ""
+            if os.path.exists(self.log_path):
+                with open(self.log_path) as f:
+                    log = "".join(f.readlines()[-10:])
+            raise RuntimeError(f"{name} failed with exit code {result.returncode}:\n{result.stderr}{log}")
+        return result
+
+    def init(self):
+        """initdb the data directory unless it already holds a cluster."""
+        if os.path.exists(os.path.join(self.data_dir, "PG_VERSION")):
+            return
+        os.makedirs(self.data_dir, exist_ok=True)
+        if self.run_as:
+            shutil.chown(self.data_dir, self.run_as)
+            open(self.log_path, "a").close()
+            shutil.chown(self.log_path, self.run_as)
+        self._run("initdb", "-D", self.data_dir, "-U", "postgres", "-A", "trust", "-E", "UTF8", "--no-instructions")
+
+    def start(self, settings=None):
+        """Start the server with settings ({'shared_buffers': '1GB', ...}) given as -c options."""
+        options = [f"-p {self.port}", "-c listen_addresses=localhost", f"-k {self.data_dir}"]
+        options += [f"-c {name}={value}" for name, value in (settings or {}).items()]
+        self._run("pg_ctl", "-D", self.data_dir, "-l", self.log_path, "-w", "-t", "120", "-o", " ".join(options),
+                  "start")
+
+    def stop(self):
+        if os.path.exists(os.path.join(self.data_dir, "postmaster.pid")):
+            self._run("pg_ctl", "-D", self.data_dir, "-m", "fast", "-w", "stop")
+
+    def __enter__(self):
+        self.init()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def server_version(conn):
+    """Server version as an integer, e.g. 160002."""
+    return conn.info.server_version
+
+def print_table(headers, rows):
+    """Print rows as a fixed-width table in the scripts' usual style."""
+    rows = [["" if value is None else str(value) for value in row] for row in rows]
+    widths = [max([len(str(header))] + [len(row[i]) for row in rows]) for i, header in enumerate(headers)]
+    rule = "-" * max(60, sum(widths) + 2 * (len(widths) - 1))
+
+    print(rule)
+    print("  ".join(str(header).ljust(width) for header, width in zip(headers, widths)))
+    print(rule)
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+    print(rule)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Run the assignment SQL scripts in libpq pipeline mode and compare against
+statement-at-a-time execution.
+
+psql -f sends a statement and waits for its result before sending the next,
+so every statement costs a network round trip. This runner splits a script
+with sql_snippets.split_statements(), which handles dollar quoting and psql
+meta-commands. Runs of ordinary statements are queued in pipeline mode and
+synced once, at the end of the run or every --max-batch statements. Only
+these break a run:
+  • BEGIN starts a new run and COMMIT or ROLLBACK ends one, so that a run
+    is one explicit transaction block or statements outside any
+  • statements that cannot run in a transaction block (CREATE DATABASE,
+    VACUUM, ...) and COPY, which run on their own outside the pipeline
+  • psql meta-commands: \\c switches the database, the rest are skipped
+
+The statements of one sync form a single implicit transaction, so a failure
+rolls back the whole run. The runner then queues the statements before the
+failed one again, reruns the failed one on its own and pipelines the rest.
+Every statement ends up committed or failed as it would be under psql, and
+the error is reported at its source line.
+
+--benchmark runs every script both ways in a fresh database per run,
+through a local TCP proxy that adds --rtt-ms of round-trip latency (half in
+each direction). It reports the median seconds, the round trips, the
+speedup, and whether both modes gave the same per-statement results.
+
+Usage:
+    python pipeline_runner.py assignment2solution --database course
+    python pipeline_runner.py --benchmark --rtt-ms 0 1 5 20 --repeat 5
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import statistics
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import psycopg
+from psycopg import pq
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
+
+from pg_local import add_connection_arguments, connect, scratch_database, print_table
+from sql_snippets import ROOT, SQL_SCRIPTS, first_keyword, is_transactional, split_statements
+from validate_sql_snippets import error_line
+
+RUN_DB = "pipeline_run"
+
+TRANSACTION_START = {"BEGIN", "START"}
+TRANSACTION_END = {"COMMIT", "END", "ROLLBACK", "ABORT"}
+
+Outcome = namedtuple("Outcome", "line status rows message")  # status: ok, failed, skipped
+
+def pipelinable(statement):
+    return statement.kind == "sql" and is_transactional(statement.sql) and first_keyword(statement.sql) != "COPY"
+
+def segments(statements, max_batch):
+    """Split statements into ('pipeline', [...]) runs and ('single', [statement]) steps.
+
+    A run also starts at BEGIN and ends after COMMIT or ROLLBACK, so it is either one explicit
+    transaction block or statements outside any.
+    """
+    result = []
+    run = []
+    for statement in statements:
+        if pipelinable(statement):
+            keyword = first_keyword(statement.sql)
+            if keyword in TRANSACTION_START and run:
+                result.append(("pipeline", run))
+                run = []
+            run.append(statement)
+            if len(run) >= max_batch or keyword in TRANSACTION_END:
+                result.append(("pipeline", run))
+                run = []
+            continue
+        if run:
+            result.append(("pipeline", run))
+            run = []
+        result.append(("single", [statement]))
+    if run:
+        result.append(("pipeline", run))
+    return result
+
+def _outcome(statement, cursor):
+    rows = len(cursor.fetchall()) if cursor.description is not None else cursor.rowcount
+    return Outcome(statement.line, "ok", rows, None)
+
+def _failure(statement, exc):
+    message = (exc.diag.message_primary or str(exc)).strip()
+    return Outcome(error_line(statement, exc), "failed", None, message)
+
+class ScriptRunner:
+    """Runs split statements on one connection, pipelined or one at a time, counting round trips."""
+
+    def __init__(self, conninfo, pipeline=True, max_batch=1000, stop_on_error=False):
+        self.conninfo = conninfo
+        self.pipeline = pipeline
+        self.max_batch = max_batch
+        self.stop_on_error = stop_on_error
+        self.round_trips = 0
+        self.replayed = 0
+        self.conn = None
+
+    def connect(self, dbname=None):
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = connect(self.conninfo, dbname=dbname)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def run_one(self, statement):
+        """Execute one statement and wait for it, as psql does."""
+        if statement.kind == "meta":
+            return self.meta(statement)
+        self.round_trips += 1
+        try:
+            return _outcome(statement, self.conn.execute(statement.sql))
+        except psycopg.Error as exc:
+            return _failure(statement, exc)
+
+    def meta(self, statement):
+        words = statement.sql.split()
+        if words[0] in ("\\c", "\\connect") and len(words) > 1:
+            self.connect(words[1])
+            self.round_trips += 1
+            return Outcome(statement.line, "ok", None, None)
+        return Outcome(statement.line, "skipped", None, f"psql meta-command {words[0]}")
+
+    def run_pipelined(self, statements):
+        """Queue statements and sync once.
+
+        Outside a transaction block, a failure makes the sync roll back every statement of the run,
+        including any BEGIN among them. Those before the failed one are queued again, the failed
+        one is rerun on its own so it fails in the same state it would under psql, and the rest
+        continue in a new run. Inside a transaction block nothing is rolled back: the earlier
+        statements keep their results, as they would under psql, and the rest continue.
+        """
+        if not statements:
+            return []
+        in_transaction = self.conn.info.transaction_status != pq.TransactionStatus.IDLE
+        self.round_trips += 1
+        cursors = []
+        try:
+            # Leaving the block sends the one Sync and waits for every result
+            with self.conn.pipeline():
+                for statement in statements:
+                    cursors.append(self.conn.execute(statement.sql))
+            return [_outcome(statement, cursor) for statement, cursor in zip(statements, cursors)]
+        except psycopg.Error as exc:
+            error = exc
+
+        failed = next((index for index, cursor in enumerate(cursors) if cursor.pgresult is None), None)
+        if in_transaction and failed is not None:
+            outcomes = [_outcome(statement, cursor) for statement, cursor in zip(statements, cursors[:failed])]
+            outcomes.append(_failure(statements[failed], error))
+        else:
+            if self.conn.info.transaction_status == pq.TransactionStatus.INERROR:
+                self.conn.execute("ROLLBACK")
+                self.round_trips += 1
+            if failed is None:
+                # The error came at the sync itself (a deferred constraint at COMMIT, ...)
+                self.replayed += len(statements)
+                outcomes = []
+                for statement in statements:
+                    outcomes.append(self.run_one(statement))
+                    if self.stop_on_error and outcomes[-1].status == "failed":
+                        break
+                return outcomes
+            self.replayed += failed + 1
+            outcomes = self.run_pipelined(statements[:failed])
+            outcomes.append(self.run_one(statements[failed]))
+        if self.stop_on_error and any(outcome.status == "failed" for outcome in outcomes):
+            return outcomes
+        return outcomes + self.run_pipelined(statements[failed + 1:])
+
+    def run(self, statements, dbname=None):
+        """Outcomes of every statement executed, stopping at the first error with stop_on_error.
+
+        Connects to dbname unless a connection is already open.
+        """
+        if self.conn is None:
+            self.connect(dbname)
+        outcomes = []
+        steps = segments(statements, self.max_batch) if self.pipeline else [("single", [s]) for s in statements]
+        for kind, chosen in steps:
+            outcomes += self.run_pipelined(chosen) if kind == "pipeline" else [self.run_one(chosen[0])]
+            if self.stop_on_error and any(outcome.status == "failed" for outcome in outcomes):
+                break
+        return outcomes
+
+def server_address(dsn):
+    """(family, address) of the server dsn points at, for the latency proxy."""
+    params = conninfo_to_dict(make_conninfo(dsn))
+    host = params.get("hostaddr") or params.get("host") or os.environ.get("PGHOST") or "localhost"
+    port = int(params.get("port") or os.environ.get("PGPORT") or 5432)
+    host = host.split(",")[0]
+    if host.startswith("/"):
+        return socket.AF_UNIX, os.path.join(host, f".s.PGSQL.{port}")
+    return socket.AF_INET, (host, port)
+
+class LatencyProxy:
+    """A TCP proxy in front of the server that delays every packet by half of rtt_ms in each direction."""
+
+    def __init__(self, dsn, rtt_ms):
+        self.family, self.address = server_address(dsn)
+        self.delay = rtt_ms / 2000.0
+        self.port = None
+        self._listener = None
+        self._sockets = []
+        self._lock = threading.Lock()
+
+    def conninfo(self, dsn):
+        return make_conninfo(dsn, host="127.0.0.1", hostaddr="127.0.0.1", port=str(self.port))
+
+    def _forward(self, source, target):
+        pending = queue.Queue()
+
+        def send():
+            while True:
+                due, data = pending.get()
+                if data is None:
+                    break
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    target.sendall(data)
+                except OSError:
+                    break
+            try:
+                target.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+        threading.Thread(target=send, daemon=True).start()
+        while True:
+            try:
+                data = source.recv(65536)
+            except OSError:
+                data = b""
+            pending.put((time.perf_counter() + self.delay, data or None))
+            if not data:
+                break
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                break
+            server = socket.socket(self.family, socket.SOCK_STREAM)
+            server.connect(self.address)
+            for sock in (client, server):
+                if sock.family == socket.AF_INET:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._sockets += [client, server]
+            threading.Thread(target=self._forward, args=(client, server), daemon=True).start()
+            threading.Thread(target=self._forward, args=(server, client), daemon=True).start()
+
+    def __enter__(self):
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._listener.close()
+        with self._lock:
+            for sock in self._sockets:
+                sock.close()
+
+def load_script(path):
+    with open(path, encoding="utf-8") as f:
+        return split_statements(f.read())
+
+def benchmark(args, scripts):
+    results = []
+    for rtt in args.rtt_ms:
+        with LatencyProxy(args.dsn, rtt) as proxy:
+            target = proxy.conninfo(args.dsn)
+            for name, statements in scripts:
+                for mode in ("sequential", "pipeline"):
+                    print(f"Running {name} {mode} at {rtt:g} ms RTT...")
+                    times = []
+                    for _ in range(args.repeat):
+                        runner = ScriptRunner(target, pipeline=mode == "pipeline", max_batch=args.max_batch)
+                        with scratch_database(args.dsn, RUN_DB):
+                            runner.connect(RUN_DB)
+                            started = time.perf_counter()
+                            outcomes = runner.run(statements, dbname=RUN_DB)
+                            times.append(time.perf_counter() - started)
+                            runner.close()
+                    results.append({
+                        'script': name, 'rtt_ms': rtt, 'mode': mode, 'statements': len(statements),
+                        'seconds': statistics.median(times), 'round_trips': runner.round_trips,
+                        'replayed': runner.replayed, 'outcomes': [outcome._asdict() for outcome in outcomes],
+                    })
+    return results
+
+def report_benchmark(results):
+    rows = []
+    mismatched = []
+    for result in results:
+        if result['mode'] != "pipeline":
+            continue
+        baseline = next(other for other in results if other['mode'] == "sequential"
+                        and other['script'] == result['script'] and other['rtt_ms'] == result['rtt_ms'])
+        same = [(outcome['status'], outcome['rows']) for outcome in baseline['outcomes']] == \
+               [(outcome['status'], outcome['rows']) for outcome in result['outcomes']]
+        if not same:
+            mismatched.append(f"{result['script']} at {result['rtt_ms']:g} ms")
+        rows.append((result['script'], f"{result['rtt_ms']:g}", result['statements'],
+                     f"{baseline['seconds'] * 1000:,.1f}", baseline['round_trips'], f"{result['seconds'] * 1000:,.1f}",
+                     result['round_trips'], result['replayed'], f"{baseline['seconds'] / result['seconds']:.1f}x",
+                     "✓" if same else "✗"))
+    print_table(["Script", "RTT ms", "Statements", "Sequential ms", "Trips", "Pipeline ms", "Trips", "Replayed",
+                 "Speedup", "Same results"], rows)
+    if mismatched:
+        print(f"✗ Pipeline results differ from sequential for: {', '.join(mismatched)}")
+    else:
+        print("✓ Pipeline and sequential runs gave the same per-statement results")
+    return not mismatched
+
+def main():
+    parser = argparse.ArgumentParser(description="Run SQL scripts in libpq pipeline mode; benchmark against psql-style.")
+    add_connection_arguments(parser)
+    parser.add_argument("scripts", nargs="*", default=[os.path.join(ROOT, name) for name in SQL_SCRIPTS],
+                        help="SQL files (default: the assignment solutions)")
+    parser.add_argument("--database", default=None, help="run in this database (default: a scratch one per script)")
+    parser.add_argument("--max-batch", type=int, default=1000, help="statements per sync at most (default 1000)")
+    parser.add_argument("--sequential", action="store_true", help="one statement per round trip, as psql does")
+    parser.add_argument("--stop-on-error", action="store_true", help="stop at the first failed statement")
+    parser.add_argument("--benchmark", action="store_true", help="compare pipeline and sequential under latency")
+    parser.add_argument("--rtt-ms", type=float, nargs="+", default=[0, 1, 5, 20], help="simulated round trips")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark cell; the median is kept")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    # A failed run is handled by replaying it; psycopg's warning about the aborted pipeline is noise
+    logging.getLogger("psycopg").setLevel(logging.ERROR)
+    scripts = [(os.path.basename(path), load_script(path)) for path in args.scripts]
+    if args.benchmark:
+        results = benchmark(args, scripts)
+        same = report_benchmark(results)
+    else:
+        results = []
+        for name, statements in scripts:
+            runner = ScriptRunner(args.dsn, pipeline=not args.sequential, max_batch=args.max_batch,
+                                  stop_on_error=args.stop_on_error)
+            started = time.perf_counter()
+            if args.database:
+                outcomes = runner.run(statements, dbname=args.database)
+            else:
+                with scratch_database(args.dsn, RUN_DB):
+                    outcomes = runner.run(statements, dbname=RUN_DB)
+            runner.close()
+            seconds = time.perf_counter() - started
+            for outcome in outcomes:
+                if outcome.status != "ok":
+                    print(f"{name}:{outcome.line}: {outcome.status.upper()}: {outcome.message}")
+            failed = sum(1 for outcome in outcomes if outcome.status == "failed")
+            print(f"{'✗' if failed else '✓'} {name}: {len(outcomes)} statements, {failed} failed, "
+                  f"{runner.round_trips} round trips, {seconds * 1000:,.1f} ms")
+            results.append({'script': name, 'seconds': seconds, 'round_trips': runner.round_trips,
+                            'outcomes': [outcome._asdict() for outcome in outcomes]})
+        same = not any(outcome['status'] == "failed" for result in results for outcome in result['outcomes'])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0 if same else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Opt-in cProfile and tracemalloc hooks for the generator entry points.
+
+Decorate an entry point with @profileable("<output parameter>") to give it a
+`profile=False` keyword. With profile=True the call is run under cProfile and
+tracemalloc, and three files are written next to its output:
+
+    <output stem>.prof          cProfile stats (snakeviz, pstats, gprof2dot)
+    <output stem>.tracemalloc   tracemalloc snapshot (tracemalloc.Snapshot.load)
+    <output stem>.profile.txt   top functions and allocation sites as text
+
+With profile=False the wrapper calls straight through, so profiling costs
+nothing when it is off.
+"""
+
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+
+TRACEMALLOC_FRAMES = 25
+TOP_ENTRIES = 25
+
+def profile_paths(output_path):
+    """Paths of the stats files written for a given stage output."""
+    stem = os.path.splitext(output_path)[0]
+    return {
+        'stats': f"{stem}.prof",
+        'snapshot': f"{stem}.tracemalloc",
+        'report': f"{stem}.profile.txt",
+    }
+
+@contextmanager
+def profile_stage(name, output_path):
+    """Profile the enclosed block and write its stats next to output_path."""
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        _write_profile(name, output_path, profiler, snapshot, peak)
+
+def _write_profile(name, output_path, profiler, snapshot, peak):
+    paths = profile_paths(output_path)
+
+    profiler.dump_stats(paths['stats'])
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    snapshot.dump(paths['snapshot'])
+
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_ENTRIES)
+
+    with open(paths['report'], "w") as f:
+        f.write(f"Profile of {name}\n")
+        f.write("=" * 80 + "\n")
+        f.write(f"Peak traced memory: {peak / 2**20:.1f} MB\n\n")
+        f.write(f"Top {TOP_ENTRIES} allocation sites (by size):\n")
+        for stat in snapshot.statistics("lineno")[:TOP_ENTRIES]:
+            f.write(f"  {stat}\n")
+        f.write("\n")
+        f.write(buffer.getvalue())
+
+    print(f"✓ Profile written: {paths['stats']}, {paths['snapshot']}, {paths['report']}")
+
+def profileable(output_param):
+    """Add a `profile` keyword to an entry point whose output is output_param."""
+
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, profile=False, **kwargs):
+            if not profile:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            with profile_stage(func.__name__, bound.arguments[output_param]):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+def add_profile_argument(parser):
+    """The --profile flag shared by every generator script."""
+    parser.add_argument("--profile", action="store_true",
+                        help="write cProfile and tracemalloc stats next to the output")
+    return parser
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Reproducible-build helpers shared by the generator scripts.
+
+Setting SOURCE_DATE_EPOCH (seconds since 1970-01-01 UTC, see
+https://reproducible-builds.org/specs/source-date-epoch/) switches every
+generator into reproducible mode: PDF timestamps and document IDs, PPTX core
+properties and zip member times are pinned to that value, so identical
+inputs produce byte-identical files.
+
+    SOURCE_DATE_EPOCH=$(git log -1 --format=%ct) python generate_midterm_solutions.py
+"""
+
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+
+# Earliest timestamp a zip member can carry
+ZIP_EPOCH = 315532800  # 1980-01-01T00:00:00Z
+
+def source_date_epoch():
+    """Return SOURCE_DATE_EPOCH as an int, or None when it is not set."""
+    value = os.environ.get("SOURCE_DATE_EPOCH", "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"SOURCE_DATE_EPOCH must be an integer, got {value!r}")
+
+def is_reproducible():
+    """True when the generators should pin timestamps and IDs."""
+    return source_date_epoch() is not None
+
+def pdf_invariant():
+    """Value for ReportLab's `invariant` document option.
+
+    ReportLab reads SOURCE_DATE_EPOCH for its timestamps by itself; invariant
+    mode additionally derives the document ID from the content only.
+    """
+    return 1 if is_reproducible() else None
+
+def pin_presentation(prs):
+    """Pin the core-property dates of a python-pptx presentation."""
+    epoch = source_date_epoch()
+    if epoch is None:
+        return prs
+
+    pinned = datetime.fromtimestamp(epoch, tz=timezone.utc).replace(tzinfo=None)
+    props = prs.core_properties
+    props.created = pinned
+    props.modified = pinned
+    props.revision = 1
+    return prs
+
+def normalize_zip(path):
+    """Rewrite a zip-based document (pptx, docx) with pinned member metadata."""
+    epoch = source_date_epoch()
+    if epoch is None:
+        return path
+
+    date_time = datetime.fromtimestamp(max(epoch, ZIP_EPOCH), tz=timezone.utc).timetuple()[:6]
+    directory = os.path.dirname(os.path.abspath(path))
+
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".zip", delete=False) as tmp:
+        tmp_path = tmp.name
+    try:
+        with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, "w") as dst:
+            for info in src.infolist():
+                member = zipfile.ZipInfo(info.filename, date_time=date_time)
+                member.compress_type = info.compress_type
+                member.external_attr = info.external_attr
+                member.create_system = 3
+                dst.writestr(member, src.read(info.filename))
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return path
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark privilege checks through deep and wide role-inheritance graphs.
+
+Section 2 grants a dev_team role WITH INHERIT to dev_user and new_developer.
+This harness builds much larger graphs of the same shape. A login role
+(rgb_login) sits under --depth levels of --width group roles, and every
+role is granted --fanout roles of the level above. Privileges are granted
+to one role at a chosen level (--grant-levels):
+  • login   - directly to rgb_login
+  • middle  - a role halfway up the graph
+  • top     - a role at the top level
+Both SELECT on a table and CONNECT on the database are granted there (CONNECT
+is revoked from PUBLIC), so both logging in and querying have to resolve the
+graph.
+
+For every depth, fan-out and grant level the report shows:
+  • connect time for rgb_login (median of --connects)
+  • has_table_privilege() per call, uncached and cached. A backend caches
+    the membership list of one role, so alternating the check between
+    rgb_login and a role with no memberships rebuilds it on every call.
+  • planning and execution time of a primary-key SELECT run as rgb_login
+The roles the login role can reach are counted from the generated graph. The
+report ends by naming the first graph at which each measure exceeds
+--hurt-ratio times the smallest graph's value.
+
+Roles are cluster-wide; every one this tool creates is named rgb_* and is
+dropped again at the end.
+
+Usage:
+    python role_graph_benchmark.py --depths 1 4 16 64 --fanouts 1 4 16 --width 32
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from psycopg import sql
+
+from pg_local import add_connection_arguments, connect, drop_database, create_database, print_table
+
+DBNAME = "role_graph_bench"
+LOGIN = "rgb_login"
+FLAT = "rgb_flat"
+GRANT_LEVELS = ["login", "middle", "top"]
+
+TABLE_SQL = """
+CREATE TABLE rgb_table (id INTEGER PRIMARY KEY, payload TEXT);
+INSERT INTO rgb_table SELECT i, md5(i::text) FROM generate_series(1, 10000) AS i;
+ANALYZE rgb_table;
+"""
+
+CHECK_SQL = """
+SELECT count(*) FILTER (WHERE has_table_privilege(CASE WHEN i %% 2 = 0 THEN %(first)s ELSE %(second)s END,
+                                                  'rgb_table', 'SELECT'))
+FROM generate_series(1, %(calls)s) AS i
+"""
+
+PROBE_SQL = "EXPLAIN (ANALYZE, FORMAT JSON) SELECT * FROM rgb_table WHERE id = 42"
+
+def role_name(level, index):
+    return LOGIN if level == 0 else f"rgb_l{level}_{index}"
+
+def build_graph(depth, width, fanout, seed=42):
+    """{member: [roles granted to it]} for the layered graph; level 0 is the login role."""
+    rng = random.Random(seed)
+    graph = {}
+    for level in range(depth):
+        members = [role_name(level, index) for index in range(1 if level == 0 else width)]
+        for member in members:
+            graph[member] = [role_name(level + 1, index) for index in sorted(rng.sample(range(width), fanout))]
+    return graph
+
+def reachable(graph, role):
+    """Every role whose privileges role inherits, including itself."""
+    seen = {role}
+    pending = [role]
+    while pending:
+        for parent in graph.get(pending.pop(), []):
+            if parent not in seen:
+                seen.add(parent)
+                pending.append(parent)
+    return seen
+
+def grant_target(graph, depth, grant_level):
+    """A role reachable from the login role at the requested level."""
+    level = {'login': 0, 'middle': max(1, depth // 2), 'top': depth}[grant_level]
+    if level == 0:
+        return LOGIN
+    prefix = f"rgb_l{level}_"
+    return min((role for role in reachable(graph, LOGIN) if role.startswith(prefix)),
+               key=lambda role: int(role[len(prefix):]))
+
+def drop_roles(admin):
+    roles = [row[0] for row in admin.execute(r"SELECT rolname FROM pg_roles WHERE rolname LIKE 'rgb\_%'").fetchall()]
+    if roles:
+        admin.execute(sql.SQL("DROP ROLE {}").format(sql.SQL(", ").join(map(sql.Identifier, roles))))
+
+def create_graph(admin, graph, depth, width):
+    """Create every role and membership, in as few round trips as the server allows."""
+    roles = [LOGIN] + [role_name(level, index) for level in range(1, depth + 1) for index in range(width)]
+    statements = [sql.SQL("CREATE ROLE {}" + (" LOGIN" if role == LOGIN else "")).format(sql.Identifier(role))
+                  for role in roles]
+    statements.append(sql.SQL("CREATE ROLE {} LOGIN").format(sql.Identifier(FLAT)))
+    statements += [sql.SQL("GRANT {} TO {}").format(sql.SQL(", ").join(map(sql.Identifier, parents)),
+                                                    sql.Identifier(member))
+                   for member, parents in graph.items()]
+    with admin.transaction():
+        for start in range(0, len(statements), 500):
+            admin.execute(sql.SQL(";\n").join(statements[start:start + 500]))
+    return len(roles) + 1
+
+def grant(conn, target, revoke=False):
+    query = ("REVOKE CONNECT ON DATABASE {database} FROM {target}; REVOKE SELECT ON rgb_table FROM {target}" if revoke
+             else "GRANT CONNECT ON DATABASE {database} TO {target}; GRANT SELECT ON rgb_table TO {target}")
+    conn.execute(sql.SQL(query).format(database=sql.Identifier(DBNAME), target=sql.Identifier(target)))
+
+def connect_ms(dsn, connects):
+    timings = []
+    for _ in range(connects):
+        started = time.perf_counter()
+        conn = connect(dsn, dbname=DBNAME, user=LOGIN)
+        timings.append((time.perf_counter() - started) * 1000)
+        conn.close()
+    return statistics.median(timings)
+
+def check_us(conn, first, second, calls, runs):
+    """Median microseconds per has_table_privilege() call, alternating between first and second."""
+    timings = []
+    for _ in range(runs + 1):
+        started = time.perf_counter()
+        granted = conn.execute(CHECK_SQL, {'first': first, 'second': second, 'calls': calls}).fetchone()[0]
+        timings.append((time.perf_counter() - started) * 1e6 / calls)
+    if first == second and granted != calls:
+        raise RuntimeError(f"{first} should have SELECT on rgb_table through the graph")
+    return statistics.median(timings[1:])
+
+def probe_ms(dsn, runs):
+    """Median (planning, execution) ms of a primary-key lookup run as the login role."""
+    planning = []
+    execution = []
+    with connect(dsn, dbname=DBNAME, user=LOGIN) as conn:
+        for _ in range(runs + 1):
+            plan = conn.execute(PROBE_SQL).fetchone()[0][0]
+            planning.append(plan['Planning Time'])
+            execution.append(plan['Execution Time'])
+    return statistics.median(planning[1:]), statistics.median(execution[1:])
+
+def run_graph(args, depth, fanout):
+    """Build one graph and measure every grant level; returns a result per level."""
+    graph = build_graph(depth, args.width, fanout, args.seed)
+    results = []
+    with connect(args.dsn) as admin:
+        drop_database(admin, DBNAME)
+        drop_roles(admin)
+        create_database(admin, DBNAME)
+        roles = create_graph(admin, graph, depth, args.width)
+
+    try:
+        with connect(args.dsn, dbname=DBNAME) as conn:
+            conn.execute(TABLE_SQL)
+            conn.execute(sql.SQL("REVOKE CONNECT ON DATABASE {database} FROM PUBLIC; "
+                                 "GRANT CONNECT ON DATABASE {database} TO {flat}").format(
+                database=sql.Identifier(DBNAME), flat=sql.Identifier(FLAT)))
+            for grant_level in args.grant_levels:
+                target = grant_target(graph, depth, grant_level)
+                grant(conn, target)
+                results.append({
+                    'depth': depth,
+                    'fanout': fanout,
+                    'roles': roles,
+                    'memberships': sum(len(parents) for parents in graph.values()),
+                    'reachable': len(reachable(graph, LOGIN)),
+                    'grant_level': grant_level,
+                    'grantee': target,
+                    'connect_ms': connect_ms(args.dsn, args.connects),
+                    'uncached_check_us': check_us(conn, LOGIN, FLAT, args.calls, args.runs),
+                    'cached_check_us': check_us(conn, LOGIN, LOGIN, args.calls, args.runs),
+                })
+                results[-1]['planning_ms'], results[-1]['execution_ms'] = probe_ms(args.dsn, args.runs)
+                grant(conn, target, revoke=True)
+    finally:
+        with connect(args.dsn) as admin:
+            drop_database(admin, DBNAME)
+            drop_roles(admin)
+    return results
+
+def report(results, hurt_ratio):
+    print_table(
+        ["Depth", "Fan-out", "Roles", "Reachable", "Granted at", "Connect ms", "Check µs uncached",
+         "Check µs cached", "Plan ms", "Exec ms"],
+        [(result['depth'], result['fanout'], result['roles'], result['reachable'], result['grant_level'],
+          f"{result['connect_ms']:.2f}", f"{result['uncached_check_us']:.1f}", f"{result['cached_check_us']:.2f}",
+          f"{result['planning_ms']:.3f}", f"{result['execution_ms']:.3f}")
+         for result in results],
+    )
+
+    ordered = sorted(results, key=lambda result: (result['reachable'], result['depth']))
+    for metric, label in [('uncached_check_us', "uncached has_table_privilege"), ('connect_ms', "connect time"),
+                          ('planning_ms', "planning time"), ('execution_ms', "execution time")]:
+        baseline = ordered[0][metric]
+        hurt = next((result for result in ordered if result[metric] > hurt_ratio * baseline), None)
+        if hurt:
+            print(f"✗ {label} passes {hurt_ratio:g}x the smallest graph at depth {hurt['depth']}, "
+                  f"fan-out {hurt['fanout']} ({hurt['reachable']} reachable roles): "
+                  f"{hurt[metric]:.2f} vs {baseline:.2f}")
+        else:
+            print(f"✓ {label} stays within {hurt_ratio:g}x of the smallest graph")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure privilege checks through nested role memberships.")
+    add_connection_arguments(parser)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 4, 16, 64], help="levels of group roles")
+    parser.add_argument("--fanouts", type=int, nargs="+", default=[1, 4, 16], help="roles granted to each member")
+    parser.add_argument("--width", type=int, default=32, help="group roles per level (default 32)")
+    parser.add_argument("--grant-levels", nargs="+", choices=GRANT_LEVELS, default=GRANT_LEVELS)
+    parser.add_argument("--connects", type=int, default=20, help="connections timed per configuration")
+    parser.add_argument("--calls", type=int, default=2000, help="has_table_privilege calls per timing")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs; the median is kept")
+    parser.add_argument("--hurt-ratio", type=float, default=2.0, help="slowdown reported as hurting (default 2)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    if max(args.fanouts) > args.width:
+        parser.error("--width must be at least the largest fan-out")
+
+    results = []
+    for depth in args.depths:
+        for fanout in args.fanouts:
+            print(f"Running depth {depth}, fan-out {fanout}...")
+            results.extend(run_graph(args, depth, fanout))
+
+    report(results, args.hurt_ratio)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
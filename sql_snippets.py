@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Find the SQL shipped with the course material and split it into statements.
+
+Two kinds of source are scanned:
+  • the code snippets embedded in generate_midterm_solutions.py and
+    create_midterm_powerpoint.py (every `code = \"\"\"...\"\"\"` assignment and
+    the code argument of add_qa_slide/add_code_slide), grouped by the
+    "Section N" / "Quick Reference" heading they appear under
+  • the assignment solution scripts (assignment2solution,
+    assignment3solutionFTS), each taken as one script
+
+split_statements() understands quotes, E'' strings, quoted identifiers,
+nested block comments, dollar quoting and psql backslash meta-commands, and
+records the source line each statement starts on.
+
+Usage:
+    python sql_snippets.py            # list every snippet and statement count
+"""
+
+import ast
+import os
+import re
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+PYTHON_SOURCES = ["generate_midterm_solutions.py", "create_midterm_powerpoint.py"]
+SQL_SCRIPTS = ["assignment2solution", "assignment3solutionFTS"]
+
+# Call name -> index of the positional argument that holds code
+CODE_ARGUMENTS = {"add_qa_slide": 3, "add_code_slide": 2}
+
+SECTION_RE = re.compile(r"^(Section \d+|Quick Reference)\b")
+DOLLAR_TAG_RE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+SHELL_COMMANDS = {"pg_dump", "pg_restore", "pg_dumpall", "psql", "createdb", "dropdb", "gunzip", "gzip"}
+
+# Statements PostgreSQL refuses to run inside a transaction block
+NON_TRANSACTIONAL_RE = re.compile(
+    r"^\s*((CREATE|DROP)\s+(DATABASE|TABLESPACE)|VACUUM|ALTER\s+SYSTEM|"
+    r"(CREATE|DROP)\s+INDEX\s+CONCURRENTLY|REINDEX\b.*\bCONCURRENTLY)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+
+Statement = namedtuple("Statement", "sql line kind")  # kind: 'sql' or 'meta'
+Snippet = namedtuple("Snippet", "source line group text language kind")  # kind: 'snippet' or 'script'
+
+def split_statements(text, first_line=1):
+    """Split SQL text into Statements, tracking the line each one starts on.
+
+    Leading comments are dropped from each statement; the trailing semicolon
+    is not included. A final statement without a semicolon is still returned,
+    as psql would send it at end of input.
+    """
+
+    statements = []
+    buf = []
+    has_sql = False
+    start_line = None
+    line = first_line
+    i = 0
+    n = len(text)
+
+    def flush():
+        nonlocal buf, has_sql, start_line
+        sql = "".join(buf).strip()
+        if has_sql and sql:
+            statements.append(Statement(sql, start_line, "sql"))
+        buf = []
+        has_sql = False
+        start_line = None
+
+    def take(chunk):
+        nonlocal has_sql, start_line
+        if not has_sql:
+            has_sql = True
+            start_line = line
+        buf.append(chunk)
+
+    while i < n:
+        c = text[i]
+
+        if c == "\n":
+            if has_sql:
+                buf.append(c)
+            line += 1
+            i += 1
+
+        elif text.startswith("--", i):
+            end = text.find("\n", i)
+            end = n if end < 0 else end
+            if has_sql:
+                buf.append(text[i:end])
+            i = end
+
+        elif text.startswith("/*", i):
+            depth = 0
+            j = i
+            while j < n:
+                if text.startswith("/*", j):
+                    depth += 1
+                    j += 2
+                elif text.startswith("*/", j):
+                    depth -= 1
+                    j += 2
+                    if depth == 0:
+                        break
+                else:
+                    j += 1
+            if has_sql:
+                buf.append(text[i:j])
+            line += text.count("\n", i, j)
+            i = j
+
+        elif c == "'":
+            tail = " " + "".join(buf[-2:])[-2:]
+            backslash_escapes = tail[-1] in ("E", "e") and not re.match(r"\w", tail[-2])
+            j = i + 1
+            while j < n:
+                if backslash_escapes and text[j] == "\\":
+                    j += 2
+                elif text[j] == "'":
+                    if text.startswith("''", j):
+                        j += 2
+                    else:
+                        j += 1
+                        break
+                else:
+                    j += 1
+            take(text[i:j])
+            line += text.count("\n", i, j)
+            i = j
+
+        elif c == '"':
+            j = i + 1
+            while j < n:
+                if text.startswith('""', j):
+                    j += 2
+                elif text[j] == '"':
+                    j += 1
+                    break
+                else:
+                    j += 1
+            take(text[i:j])
+            line += text.count("\n", i, j)
+            i = j
+
+        elif c == "$" and not (buf and re.match(r"\w", buf[-1][-1:] or " ")):
+            match = DOLLAR_TAG_RE.match(text, i)
+            if match:
+                tag = match.group(0)
+                end = text.find(tag, match.end())
+                end = n if end < 0 else end + len(tag)
+                take(text[i:end])
+                line += text.count("\n", i, end)
+                i = end
+            else:
+                take(c)
+                i += 1
+
+        elif c == "\\":
+            end = text.find("\n", i)
+            end = n if end < 0 else end
+            command = text[i:end].strip()
+            if command.startswith("\\g") and has_sql:
+                flush()
+            statements.append(Statement(command, line, "meta"))
+            i = end
+
+        elif c == ";":
+            flush()
+            i += 1
+
+        elif c.isspace():
+            if has_sql:
+                buf.append(c)
+            i += 1
+
+        else:
+            take(c)
+            i += 1
+
+    flush()
+    return statements
+
+def first_keyword(sql):
+    """Upper-cased first word of a statement ('SELECT', 'CREATE', ...)."""
+    match = re.match(r"\s*\(*\s*([A-Za-z]+)", sql)
+    return match.group(1).upper() if match else ""
+
+def is_transactional(sql):
+    """False for statements that cannot run inside BEGIN ... COMMIT."""
+    return not NON_TRANSACTIONAL_RE.match(sql)
+
+def is_shell_snippet(text):
+    """True for snippets that are shell commands (pg_dump etc.), not SQL."""
+    for raw in text.splitlines():
+        stripped = raw.strip()
+        if not stripped:
+            continue
+        return stripped.startswith("#") or stripped.split()[0] in SHELL_COMMANDS
+    return False
+
+def python_snippets(path):
+    """Code snippets embedded in a generator script, in source order."""
+
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    events = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign):
+            targets = [target.id for target in node.targets if isinstance(target, ast.Name)]
+            if "code" in targets and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+                events.append((node.value.lineno, node.value.col_offset, "snippet", node.value.value))
+
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in CODE_ARGUMENTS:
+            index = CODE_ARGUMENTS[node.func.id]
+            if len(node.args) > index:
+                arg = node.args[index]
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str) and arg.value:
+                    events.append((arg.lineno, arg.col_offset, "snippet", arg.value))
+
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            match = SECTION_RE.match(node.value)
+            if match:
+                events.append((node.lineno, node.col_offset, "section", match.group(1)))
+
+    snippets = []
+    group = None
+    source = os.path.relpath(path, ROOT)
+    for line, _, kind, value in sorted(events, key=lambda event: event[:2]):
+        if kind == "section":
+            group = value
+        else:
+            language = "shell" if is_shell_snippet(value) else "sql"
+            snippets.append(Snippet(source, line, group, value, language, "snippet"))
+    return snippets
+
+def script_snippet(path):
+    """A whole SQL script file as one Snippet."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return Snippet(os.path.relpath(path, ROOT), 1, None, text, "sql", "script")
+
+def collect_snippets(root=ROOT, include_shell=False):
+    """Every snippet and script in the course material."""
+    snippets = []
+    for name in PYTHON_SOURCES:
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            snippets.extend(python_snippets(path))
+    for name in SQL_SCRIPTS:
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            snippets.append(script_snippet(path))
+
+    if not include_shell:
+        snippets = [snippet for snippet in snippets if snippet.language == "sql"]
+    return snippets
+
+def snippet_statements(snippet):
+    """Statements of a snippet, with line numbers in its source file."""
+    return split_statements(snippet.text, first_line=snippet.line)
+
+if __name__ == "__main__":
+    found = collect_snippets(include_shell=True)
+    print(f"Found {len(found)} snippets")
+    print("-" * 60)
+    for snippet in found:
+        statements = snippet_statements(snippet)
+        print(f"{snippet.source}:{snippet.line} [{snippet.group or snippet.kind}] "
+              f"{snippet.language}, {len(statements)} statement(s)")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Compare ways of applying the LPAD and TRIM transforms of Questions 3c and 3d
+to a large sample_table.
+
+The solutions run
+
+    UPDATE sample_table SET name = LPAD(name, 20, '*');
+    UPDATE sample_table SET description = TRIM(description);
+
+which rewrite every row in place, leaving one dead tuple per row, a bloated
+name index and WAL the size of the table. This benchmark applies both
+transforms to --rows rows with each approach:
+  • single_update     - one UPDATE setting both columns
+  • batched_update    - keyset UPDATEs of --batch-rows id ranges that skip
+                        rows already transformed, each committed, with
+                        VACUUM every --vacuum-every batches
+  • ctas_swap         - INSERT ... SELECT the transformed rows into a new
+                        table, build its indexes, then swap the names in one
+                        short transaction. Writes made during the copy are
+                        lost, so the table has to be frozen for writes.
+  • generated_columns - stored generated columns name_padded and
+                        description_trimmed; the originals stay as they are
+  • expression_index  - no data change: CREATE INDEX CONCURRENTLY on
+                        LPAD(name, 20, '*'), and TRIM applied when reading
+
+Each approach runs in its own FILE_COPY clone of a base database. The table
+has the index on name that makes the LPAD update expensive, and autovacuum is
+off, so dead tuples are still there when they are counted. Reported:
+  • elapsed time, and how long ACCESS EXCLUSIVE was held
+  • dead tuples left behind (pg_stat_user_tables) and WAL bytes
+  • table size, and index size before and after a REINDEX (index bloat)
+  • rows still not transformed, for the approaches that change the data
+
+Usage:
+    python string_transform_benchmark.py --rows 10000000
+    python string_transform_benchmark.py --rows 1000000 --approaches single_update batched_update --batch-rows 50000
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from pg_local import add_connection_arguments, connect, create_database, drop_database, scratch_database, print_table
+from alter_table_harness import FILL_SQL, TABLE_SQL
+
+BASE_DB = "transform_base"
+RUN_DB = "transform_run"
+
+PADDED = "LPAD(name, 20, '*')"
+TRIMMED = "TRIM(description)"
+
+UPDATE_SQL = f"UPDATE sample_table SET name = {PADDED}, description = {TRIMMED}"
+PENDING = f"(name IS DISTINCT FROM {PADDED} OR description IS DISTINCT FROM {TRIMMED})"
+
+SWAP_SQL = [
+    "ALTER SEQUENCE sample_table_id_seq OWNED BY sample_table_new.id",
+    "DROP TABLE sample_table",
+    "ALTER TABLE sample_table_new RENAME TO sample_table",
+    "ALTER INDEX sample_table_new_pkey RENAME TO sample_table_pkey",
+    "ALTER INDEX sample_table_new_name_idx RENAME TO sample_table_name_idx",
+]
+
+APPROACHES = ["single_update", "batched_update", "ctas_swap", "generated_columns", "expression_index"]
+
+def build_base(dsn, rows):
+    with connect(dsn) as admin:
+        drop_database(admin, BASE_DB)
+        create_database(admin, BASE_DB)
+    with connect(dsn, dbname=BASE_DB) as conn:
+        # alter_table_harness's table and rows, with autovacuum off so dead tuples stay to be counted
+        conn.execute(TABLE_SQL)
+        conn.execute("ALTER TABLE sample_table SET (autovacuum_enabled = false)")
+        conn.execute(FILL_SQL, {'rows': rows})
+        conn.execute("CREATE INDEX sample_table_name_idx ON sample_table (name)")
+        conn.execute("VACUUM ANALYZE sample_table")
+
+def timed_transaction(conn, statements):
+    """Run statements in one transaction; returns its seconds."""
+    started = time.perf_counter()
+    with conn.transaction():
+        for statement in statements:
+            conn.execute(statement)
+    return time.perf_counter() - started
+
+def single_update(conn, args):
+    conn.execute(UPDATE_SQL)
+    return 0.0
+
+def batched_update(conn, args):
+    high = conn.execute("SELECT max(id) FROM sample_table").fetchone()[0]
+    statement = UPDATE_SQL + f" WHERE id >= %(low)s AND id < %(high)s AND {PENDING}"
+    for number, low in enumerate(range(1, high + 1, args.batch_rows), start=1):
+        conn.execute(statement, {'low': low, 'high': low + args.batch_rows})
+        if args.vacuum_every and number % args.vacuum_every == 0:
+            conn.execute("VACUUM sample_table")
+    return 0.0
+
+def ctas_swap(conn, args):
+    conn.execute("CREATE TABLE sample_table_new (LIKE sample_table INCLUDING DEFAULTS INCLUDING STORAGE) "
+                 "WITH (autovacuum_enabled = false)")
+    conn.execute(f"INSERT INTO sample_table_new (id, name, age, description) "
+                 f"SELECT id, {PADDED}, age, {TRIMMED} FROM sample_table ORDER BY id")
+    conn.execute("ALTER TABLE sample_table_new ADD CONSTRAINT sample_table_new_pkey PRIMARY KEY (id)")
+    conn.execute("CREATE INDEX sample_table_new_name_idx ON sample_table_new (name)")
+    conn.execute("ANALYZE sample_table_new")
+    return timed_transaction(conn, SWAP_SQL)
+
+def generated_columns(conn, args):
+    return timed_transaction(conn, [
+        f"ALTER TABLE sample_table ADD COLUMN name_padded VARCHAR(50) GENERATED ALWAYS AS ({PADDED}) STORED, "
+        f"ADD COLUMN description_trimmed TEXT GENERATED ALWAYS AS ({TRIMMED}) STORED",
+    ])
+
+def expression_index(conn, args):
+    conn.execute(f"CREATE INDEX CONCURRENTLY sample_table_name_padded_idx ON sample_table ({PADDED})")
+    return 0.0
+
+RUNNERS = {
+    'single_update': single_update,
+    'batched_update': batched_update,
+    'ctas_swap': ctas_swap,
+    'generated_columns': generated_columns,
+    'expression_index': expression_index,
+}
+
+def dead_tuples(conn):
+    """n_dead_tup for sample_table, after making this backend flush its statistics."""
+    conn.execute("SELECT pg_stat_force_next_flush()")
+    return conn.execute("SELECT n_dead_tup FROM pg_stat_user_tables WHERE relname = 'sample_table'").fetchone()[0]
+
+def index_bytes(conn):
+    return conn.execute("SELECT coalesce(sum(pg_relation_size(indexrelid)), 0)::bigint FROM pg_index "
+                        "WHERE indrelid = 'sample_table'::regclass").fetchone()[0]
+
+def run_approach(args, name):
+    result = {'approach': name}
+    with scratch_database(args.dsn, RUN_DB, template=BASE_DB, strategy="FILE_COPY"):
+        with connect(args.dsn, dbname=RUN_DB) as conn:
+            conn.execute("CHECKPOINT")
+            lsn = conn.execute("SELECT pg_current_wal_lsn()").fetchone()[0]
+
+            started = time.perf_counter()
+            result['exclusive_seconds'] = RUNNERS[name](conn, args)
+            result['seconds'] = time.perf_counter() - started
+
+            result['wal_bytes'] = int(conn.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)",
+                                                   [lsn]).fetchone()[0])
+            result['dead_tuples'] = dead_tuples(conn)
+            result['table_bytes'] = conn.execute("SELECT pg_table_size('sample_table')").fetchone()[0]
+            result['pending_rows'] = None
+            if name not in ("generated_columns", "expression_index"):
+                result['pending_rows'] = conn.execute(f"SELECT count(*) FROM sample_table WHERE {PENDING}").fetchone()[0]
+
+            result['index_bytes'] = index_bytes(conn)
+            conn.execute("REINDEX TABLE sample_table")
+            result['reindexed_bytes'] = index_bytes(conn)
+    result['index_bloat'] = result['index_bytes'] / result['reindexed_bytes'] - 1 if result['reindexed_bytes'] else 0.0
+    return result
+
+def report(results):
+    print_table(
+        ["Approach", "Seconds", "Exclusive s", "Dead tuples", "WAL MB", "Table MB", "Index MB", "Index bloat",
+         "Not transformed"],
+        [(result['approach'], f"{result['seconds']:.1f}", f"{result['exclusive_seconds']:.2f}",
+          f"{result['dead_tuples']:,}", f"{result['wal_bytes'] / 1e6:,.0f}", f"{result['table_bytes'] / 1e6:,.0f}",
+          f"{result['index_bytes'] / 1e6:,.0f}", f"{result['index_bloat'] * 100:.0f}%",
+          "-" if result['pending_rows'] is None else f"{result['pending_rows']:,}")
+         for result in results],
+    )
+    for result in results:
+        if result['pending_rows']:
+            print(f"✗ {result['approach']} left {result['pending_rows']:,} rows untransformed")
+    rewrites = [result for result in results if result['pending_rows'] is not None]
+    if rewrites:
+        least_wal = min(rewrites, key=lambda result: result['wal_bytes'])
+        fastest = min(rewrites, key=lambda result: result['seconds'])
+        print(f"✓ Rewriting the data: fastest {fastest['approach']} ({fastest['seconds']:.1f}s), "
+              f"least WAL {least_wal['approach']} ({least_wal['wal_bytes'] / 1e6:,.0f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bulk LPAD/TRIM strategies by time, bloat and WAL.")
+    add_connection_arguments(parser)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="rows in sample_table (default 10,000,000)")
+    parser.add_argument("--approaches", nargs="+", choices=APPROACHES, default=APPROACHES)
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="rows per batched UPDATE (default 100,000)")
+    parser.add_argument("--vacuum-every", type=int, default=10, help="VACUUM after this many batches; 0 never")
+    parser.add_argument("--reuse-base", action="store_true", help=f"reuse an existing {BASE_DB} database")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    if not args.reuse_base:
+        print(f"Building {BASE_DB} with {args.rows:,} rows...")
+        build_base(args.dsn, args.rows)
+
+    results = []
+    for name in args.approaches:
+        print(f"Running {name}...")
+        results.append(run_approach(args, name))
+
+    report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
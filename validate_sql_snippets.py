@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Execute every SQL snippet of the course material against a local PostgreSQL.
+
+Snippets come from sql_snippets.collect_snippets(): the code shown in the
+solutions PDF and the study-guide deck, plus the assignment solution
+scripts. A prepared template database holds the fixtures the material
+assumes (employee_data). Each worker clones its own template from it once.
+Every snippet then runs in a fresh database cloned from the worker's
+template (CREATE DATABASE ... TEMPLATE), inside one transaction that is
+rolled back, so role creation does not leak between snippets.
+
+Snippets are meant to be run in order, so a snippet is preceded by the
+earlier snippets of the same file and section (their errors are not
+reported twice). Each statement runs under its own savepoint. psql
+meta-commands and statements that cannot run in a transaction block
+(CREATE DATABASE, VACUUM, ...) are reported as skipped.
+
+Usage:
+    python validate_sql_snippets.py --dsn "host=localhost user=postgres" --workers 8
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import psycopg
+
+from pg_local import add_connection_arguments, connect, create_database, drop_database
+from sql_snippets import Statement, collect_snippets, snippet_statements, is_transactional
+
+# Objects the material uses but never creates
+FIXTURE_SQL = """
+CREATE TABLE employee_data (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100),
+    email VARCHAR(100),
+    department VARCHAR(50)
+);
+
+INSERT INTO employee_data (name, email, department) VALUES
+('Alice Smith', 'alice@example.com', 'Engineering'),
+('Bob Jones', 'bob@example.com', 'Finance');
+"""
+
+# Undo a SET ROLE left behind by the setup snippets
+RESET_ROLE = Statement("RESET ROLE", 0, "sql")
+
+Job = namedtuple("Job", "snippet setup")
+Outcome = namedtuple("Outcome", "source line status message sql")  # status: ok, failed, skipped
+
+class _WorkerState(threading.local):
+    admin = None
+    template = None
+    index = None
+
+def build_jobs(snippets):
+    """Pair each snippet with the earlier snippets of its file and section."""
+    jobs = []
+    previous = {}
+    for snippet in snippets:
+        if snippet.kind == "script":
+            jobs.append(Job(snippet, []))
+            continue
+        key = (snippet.source, snippet.group)
+        setup = previous.setdefault(key, [])
+        jobs.append(Job(snippet, list(setup)))
+        setup.append(snippet)
+    return jobs
+
+def error_line(statement, exc):
+    """Source line of the error position PostgreSQL reported, if any."""
+    position = getattr(exc.diag, "statement_position", None)
+    if position and position.isdigit():
+        return statement.line + statement.sql[:int(position) - 1].count("\n")
+    return statement.line
+
+def run_statement(conn, statement):
+    """Run one statement under a savepoint; returns (status, message)."""
+    if statement.kind == "meta":
+        return "skipped", "psql meta-command"
+    if not is_transactional(statement.sql):
+        return "skipped", "cannot run inside a transaction block"
+
+    try:
+        with conn.transaction():
+            conn.execute(statement.sql)
+    except psycopg.Error as exc:
+        message = (exc.diag.message_primary or str(exc)).strip()
+        return "failed", (message, error_line(statement, exc))
+    return "ok", None
+
+class SnippetValidator:
+    """Runs jobs on a thread pool, each worker cloning from its own template."""
+
+    def __init__(self, dsn, workers=8, statement_timeout="30s"):
+        self.dsn = dsn
+        self.workers = workers
+        self.statement_timeout = statement_timeout
+        self.prefix = f"snipval_{os.getpid()}"
+        self.master = f"{self.prefix}_tpl"
+        self._state = _WorkerState()
+        self._counter = itertools.count()
+        self._sequence = itertools.count()
+        self._states = []
+        self._lock = threading.Lock()
+
+    def prepare_master(self):
+        """Create the fixture template every worker template is cloned from."""
+        with connect(self.dsn) as admin:
+            drop_database(admin, self.master)
+            create_database(admin, self.master)
+        with connect(self.dsn, dbname=self.master) as conn:
+            conn.execute(FIXTURE_SQL)
+
+    def _init_worker(self):
+        state = self._state
+        state.index = next(self._counter)
+        state.admin = connect(self.dsn)
+        state.template = f"{self.prefix}_tpl_w{state.index}"
+        drop_database(state.admin, state.template)
+        create_database(state.admin, state.template, self.master)
+        with self._lock:
+            self._states.append((state.admin, state.template))
+
+    def run_job(self, job):
+        """Validate one snippet in a fresh clone; returns (job, outcomes, seconds)."""
+        state = self._state
+        started = time.perf_counter()
+        dbname = f"{self.prefix}_w{state.index}_{next(self._sequence)}"
+        create_database(state.admin, dbname, state.template)
+
+        outcomes = []
+        try:
+            with connect(self.dsn, dbname=dbname, autocommit=False) as conn:
+                conn.execute("SELECT set_config('statement_timeout', %s, false)", [self.statement_timeout])
+                conn.commit()
+                with conn.transaction(force_rollback=True):
+                    for earlier in job.setup:
+                        for statement in snippet_statements(earlier):
+                            run_statement(conn, statement)
+                    run_statement(conn, RESET_ROLE)
+
+                    for statement in snippet_statements(job.snippet):
+                        status, detail = run_statement(conn, statement)
+                        line = statement.line
+                        message = detail
+                        if status == "failed":
+                            message, line = detail
+                        outcomes.append(Outcome(job.snippet.source, line, status, message, statement.sql))
+        finally:
+            drop_database(state.admin, dbname)
+
+        return job, outcomes, time.perf_counter() - started
+
+    def run(self, jobs):
+        """Validate every job; returns a list of (job, outcomes, seconds)."""
+        self.prepare_master()
+        results = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, initializer=self._init_worker) as pool:
+                futures = [pool.submit(self.run_job, job) for job in jobs]
+                for future in as_completed(futures):
+                    results.append(future.result())
+        finally:
+            for admin, template in self._states:
+                drop_database(admin, template)
+                admin.close()
+            with connect(self.dsn) as admin:
+                drop_database(admin, self.master)
+        results.sort(key=lambda result: (result[0].snippet.source, result[0].snippet.line))
+        return results
+
+def report(results, elapsed):
+    """Print failures with their source location and a summary; returns failure count."""
+    outcomes = [outcome for _, job_outcomes, _ in results for outcome in job_outcomes]
+    failed = [outcome for outcome in outcomes if outcome.status == "failed"]
+    skipped = [outcome for outcome in outcomes if outcome.status == "skipped"]
+
+    print("-" * 60)
+    for outcome in failed:
+        first_line = outcome.sql.splitlines()[0]
+        print(f"✗ {outcome.source}:{outcome.line}: {outcome.message}")
+        print(f"    {first_line}")
+    if failed:
+        print("-" * 60)
+
+    snippets_failed = sum(1 for _, job_outcomes, _ in results
+                          if any(outcome.status == "failed" for outcome in job_outcomes))
+    print(f"\nSnippets validated: {len(results)} ({snippets_failed} with failures)")
+    print(f"  Statements: {len(outcomes)} run, "
+          f"{len(outcomes) - len(failed) - len(skipped)} ok, {len(failed)} failed, {len(skipped)} skipped")
+    if elapsed:
+        print(f"  Wall time: {elapsed:.2f}s ({len(results) / elapsed:.1f} snippets/s)")
+    return len(failed)
+
+def write_json_report(results, path):
+    data = [
+        {
+            'source': job.snippet.source,
+            'line': job.snippet.line,
+            'group': job.snippet.group,
+            'seconds': round(seconds, 4),
+            'statements': [outcome._asdict() for outcome in outcomes],
+        }
+        for job, outcomes, seconds in results
+    ]
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every course SQL snippet against a local PostgreSQL.")
+    add_connection_arguments(parser)
+    parser.add_argument("--workers", type=int, default=8, help="parallel workers (default 8)")
+    parser.add_argument("--statement-timeout", default="30s", help="per-statement timeout (default 30s)")
+    parser.add_argument("--only", default=None, help="validate only sources whose path contains this text")
+    parser.add_argument("--json", default=None, help="also write a JSON report to this path")
+    args = parser.parse_args()
+
+    snippets = collect_snippets()
+    if args.only:
+        snippets = [snippet for snippet in snippets if args.only in snippet.source]
+    jobs = build_jobs(snippets)
+
+    print(f"Validating {len(jobs)} SQL snippets with {args.workers} workers...")
+    started = time.perf_counter()
+    results = SnippetValidator(args.dsn, args.workers, args.statement_timeout).run(jobs)
+    failures = report(results, time.perf_counter() - started)
+
+    if args.json:
+        write_json_report(results, args.json)
+        print(f"✓ JSON report: {args.json}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
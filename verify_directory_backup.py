@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Verify `pg_dump -F d` backups without restoring them.
+
+A corrupt directory-format dump usually shows up only when pg_restore fails
+on it. This verifier reads toc.dat to find the data file of every TABLE DATA
+and large-object entry. When toc.dat cannot be parsed it falls back to the
+*.dat* files in the directory. Each file is streamed once through a worker
+pool in --chunk-kb reads, which bounds the memory of a worker whatever the
+file size. Each read is:
+  • hashed (--algorithm, default sha256) as it is on disk
+  • decompressed by the method its suffix names (.gz, .lz4 or .zst). The
+    stream has to decode to the end, and gzip checks its CRC on the way.
+  • for table data, checked to end with the COPY terminator `\\.`, which a
+    truncated file is missing
+
+The hashes, sizes and modification times go into a JSON manifest (default
+<dump>.manifest.json). Later runs re-read only the files whose size or
+mtime changed, or every file with --full. A re-read file whose hash differs
+from the manifest is reported as modified, since a finished backup should
+never change. --accept records the new hash instead and forgets files that are gone.
+
+lz4 and zstd need the `lz4` and `zstandard` packages; without them those
+files are only hashed.
+
+Usage:
+    python verify_directory_backup.py bench_work/dumps/course.dir
+    python verify_directory_backup.py /backups/prod.dir --workers 16 --full
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from pg_local import print_table
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TocItem = namedtuple("TocItem", "dump_id desc namespace tag filename")
+DataFile = namedtuple("DataFile", "name label copy_data")
+Checked = namedtuple("Checked", "name label status bytes digest uncompressed_bytes seconds message")
+
+SUFFIXES = ["", ".gz", ".lz4", ".zst"]
+COPY_TERMINATOR = b"\\."
+
+class TocError(Exception):
+    """toc.dat could not be parsed."""
+
+class _TocReader:
+    """pg_backup_archiver's ReadInt/ReadStr over the bytes of a toc.dat."""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.int_size = 4
+
+    def byte(self):
+        if self.pos >= len(self.data):
+            raise TocError("toc.dat ends early")
+        self.pos += 1
+        return self.data[self.pos - 1]
+
+    def int(self):
+        negative = self.byte()
+        value = 0
+        for shift in range(self.int_size):
+            value |= self.byte() << (8 * shift)
+        return -value if negative else value
+
+    def str(self):
+        length = self.int()
+        if length < 0:
+            return None
+        if self.pos + length > len(self.data):
+            raise TocError("toc.dat ends early")
+        self.pos += length
+        return self.data[self.pos - length:self.pos].decode("utf-8", "replace")
+
+def read_toc(path):
+    """Header fields and TocItem entries of a directory-format toc.dat (archive versions 1.12-1.16)."""
+    with open(path, "rb") as f:
+        reader = _TocReader(f.read())
+    if reader.data[:5] != b"PGDMP":
+        raise TocError("not a pg_dump archive")
+    reader.pos = 5
+    version = (reader.byte(), reader.byte(), reader.byte())
+    if not (1, 12, 0) <= version < (1, 17, 0):
+        raise TocError(f"unsupported archive version {version[0]}.{version[1]}")
+    reader.int_size = reader.byte()
+    reader.byte()  # offset size
+    if reader.byte() != 3:
+        raise TocError("not a directory-format archive")
+    compression = reader.byte() if version >= (1, 15, 0) else reader.int()
+    created = [reader.int() for _ in range(7)]
+    header = {
+        'version': ".".join(map(str, version)),
+        'compression': compression,
+        'created': "%04d-%02d-%02d %02d:%02d:%02d" % (created[5] + 1900, created[4] + 1, created[3], *created[2::-1]),
+        'database': reader.str(),
+        'server_version': reader.str(),
+        'pg_dump_version': reader.str(),
+    }
+
+    entries = []
+    for _ in range(reader.int()):
+        dump_id = reader.int()
+        reader.int()  # had a data dumper
+        reader.str(), reader.str()  # table oid, oid
+        tag = reader.str()
+        desc = reader.str()
+        reader.int()  # section
+        reader.str(), reader.str(), reader.str()  # definition, drop statement, COPY statement
+        namespace = reader.str()
+        reader.str()  # tablespace
+        if version >= (1, 14, 0):
+            reader.str()  # table access method
+        if version >= (1, 16, 0):
+            reader.int()  # relkind
+        reader.str(), reader.str()  # owner, WITH OIDS
+        while reader.str() is not None:  # dependencies
+            pass
+        filename = reader.str()
+        entries.append(TocItem(dump_id, desc, namespace, tag, filename or None))
+    return header, entries
+
+def on_disk(directory, name):
+    """name with the compression suffix it has on disk, or None when no such file exists."""
+    for suffix in SUFFIXES:
+        if os.path.isfile(os.path.join(directory, name + suffix)):
+            return name + suffix
+    return None
+
+def _stem(name):
+    """name without its compression suffix."""
+    for suffix in SUFFIXES[1:]:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def data_files(directory):
+    """(DataFile list, missing names, TOC header or None) for a dump directory."""
+    try:
+        header, entries = read_toc(os.path.join(directory, "toc.dat"))
+    except (OSError, TocError) as error:
+        print(f"✗ Could not read toc.dat ({error}); checking the *.dat* files found instead")
+        names = sorted(name for name in os.listdir(directory) if ".dat" in name and name != "toc.dat")
+        files = [DataFile(name, name, not name.startswith("blob")) for name in names]
+        if os.path.isfile(os.path.join(directory, "toc.dat")):
+            files.insert(0, DataFile("toc.dat", "TOC", False))
+        return files, [], None
+
+    files = [DataFile("toc.dat", "TOC", False)]
+    missing = []
+    for entry in entries:
+        if not entry.filename:
+            continue
+        name_part = f"{entry.namespace}.{entry.tag}" if entry.namespace else entry.tag
+        label = entry.desc if name_part == entry.desc else f"{entry.desc} {name_part}"
+        name = on_disk(directory, entry.filename)
+        if name is None:
+            missing.append(entry.filename)
+            continue
+        if entry.filename.startswith("blobs"):
+            files.append(DataFile(name, label, False))
+            with open(os.path.join(directory, name), "rb") as f:
+                listing = gzip.decompress(f.read()) if name.endswith(".gz") else f.read()
+            for line in listing.decode().splitlines():
+                blob = on_disk(directory, line.split()[1])
+                if blob is None:
+                    missing.append(line.split()[1])
+                else:
+                    files.append(DataFile(blob, f"large object {line.split()[0]}", False))
+        else:
+            files.append(DataFile(name, label, True))
+    return files, missing, header
+
+class _HashingReader:
+    """A read-only file object that hashes every byte read through it."""
+
+    def __init__(self, f, algorithm):
+        self.f = f
+        self.hash = hashlib.new(algorithm)
+        self.bytes = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.hash.update(data)
+        self.bytes += len(data)
+        return data
+
+    def readable(self):
+        return True
+
+def _decompressor(name, raw):
+    """A stream decompressing raw by the suffix of name, raw itself, or None when the module is missing."""
+    if name.endswith(".gz"):
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    if name.endswith(".lz4"):
+        return lz4.frame.LZ4FrameFile(raw, mode="rb") if lz4 else None
+    if name.endswith(".zst"):
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True) if zstandard else None
+    return raw
+
+def verify_file(directory, data_file, algorithm, chunk):
+    """Hash and decode one file in chunk-sized reads; returns a Checked."""
+    started = time.perf_counter()
+    uncompressed = 0
+    tail = b""
+    message = ""
+    with open(os.path.join(directory, data_file.name), "rb") as f:
+        raw = _HashingReader(f, algorithm)
+        try:
+            stream = _decompressor(data_file.name, raw)
+            if stream is None:
+                message = "no module to decompress it; hashed only"
+                stream = raw
+                data_file = data_file._replace(copy_data=False)
+            while True:
+                data = stream.read(chunk)
+                if not data:
+                    break
+                uncompressed += len(data)
+                tail = (tail + data)[-16:]
+            while raw.read(chunk):
+                pass
+        except (OSError, EOFError, ValueError, RuntimeError) as error:
+            while raw.read(chunk):
+                pass
+            return Checked(data_file.name, data_file.label, "corrupt", raw.bytes, raw.hash.hexdigest(), uncompressed,
+                           time.perf_counter() - started, f"{type(error).__name__}: {error}")
+    status = "ok"
+    if data_file.copy_data and not tail.rstrip(b"\n").endswith(COPY_TERMINATOR):
+        status, message = "corrupt", "COPY data does not end with \\. (truncated)"
+    return Checked(data_file.name, data_file.label, status, raw.bytes, raw.hash.hexdigest(), uncompressed,
+                   time.perf_counter() - started, message)
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def verify(directory, manifest, workers, algorithm, chunk, full=False, accept=False):
+    """Check the files of a dump against manifest, which is updated in place; returns (checked, counts)."""
+    files, missing, header = data_files(directory)
+    known = manifest['files']
+    pending = []
+    counts = {'unchanged': 0}
+    for data_file in files:
+        stat = os.stat(os.path.join(directory, data_file.name))
+        entry = known.get(data_file.name)
+        if (not full and entry and entry['algorithm'] == algorithm and entry['size'] == stat.st_size
+                and entry['mtime_ns'] == stat.st_mtime_ns):
+            counts['unchanged'] += 1
+        else:
+            pending.append((data_file, stat))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        checked = list(pool.map(lambda item: verify_file(directory, item[0], algorithm, chunk), pending))
+
+    for index, (result, (_, stat)) in enumerate(zip(checked, pending)):
+        entry = known.get(result.name)
+        if result.status == "ok" and entry and entry['algorithm'] == algorithm and entry['digest'] != result.digest:
+            result = checked[index] = result._replace(status="modified", message="hash differs from the manifest")
+        if result.status == "ok" or (result.status == "modified" and accept):
+            known[result.name] = {'label': result.label, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                  'algorithm': algorithm, 'digest': result.digest,
+                                  'uncompressed_bytes': result.uncompressed_bytes}
+
+    listed = {data_file.name for data_file in files}
+    checked += [Checked(name, "in TOC", "missing", 0, None, 0, 0.0, "listed in toc.dat but not on disk")
+                for name in missing]
+    gone = sorted(name for name in set(known) - listed if _stem(name) not in missing)
+    checked += [Checked(name, "manifest", "missing", 0, None, 0, 0.0, "in the manifest but no longer listed")
+                for name in gone]
+    if accept:
+        for name in gone:
+            del known[name]
+    if header is not None:
+        manifest['archive'] = header
+    for result in checked:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return checked, counts
+
+def report(checked, counts, seconds, show_all=False):
+    failed = [result for result in checked if result.status != "ok"]
+    shown = checked if show_all else failed
+    if shown:
+        print_table(["File", "Entry", "Status", "MB", "Uncompressed MB", "Seconds", "Detail"],
+                    [(result.name, result.label, result.status, f"{result.bytes / 1e6:,.1f}",
+                      f"{result.uncompressed_bytes / 1e6:,.1f}", f"{result.seconds:.2f}", result.message)
+                     for result in shown])
+    read = sum(result.bytes for result in checked)
+    print(f"Read {read / 1e6:,.1f} MB in {seconds:.2f}s ({read / 1e6 / seconds if seconds else 0:,.0f} MB/s); "
+          + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+    if failed:
+        print(f"✗ {len(failed)} file(s) failed verification")
+    else:
+        print("✓ Backup verified")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream-verify a pg_dump directory-format backup against a manifest.")
+    parser.add_argument("directory", help="pg_dump -F d output directory")
+    parser.add_argument("--manifest", default=None, help="manifest path (default <directory>.manifest.json)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="files verified at once")
+    parser.add_argument("--chunk-kb", type=int, default=1024, help="read size per step (default 1024 KB)")
+    parser.add_argument("--algorithm", default="sha256", choices=sorted(hashlib.algorithms_guaranteed))
+    parser.add_argument("--full", action="store_true", help="re-read every file, not only changed ones")
+    parser.add_argument("--accept", action="store_true", help="record new hashes and forget files that are gone")
+    parser.add_argument("--all", action="store_true", help="list every file read, not only failures")
+    parser.add_argument("--json", default=None, help="also write the results to this path")
+    args = parser.parse_args()
+
+    directory = args.directory.rstrip(os.sep)
+    manifest_path = args.manifest or directory + ".manifest.json"
+    manifest = load_manifest(manifest_path)
+
+    started = time.perf_counter()
+    checked, counts = verify(directory, manifest, args.workers, args.algorithm, args.chunk_kb * 1024,
+                             args.full, args.accept)
+    seconds = time.perf_counter() - started
+
+    manifest['directory'] = os.path.abspath(directory)
+    manifest['verified_at'] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    report(checked, counts, seconds, args.all)
+    print(f"✓ Manifest: {manifest_path}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'seconds': seconds, 'counts': counts, 'files': [result._asdict() for result in checked]},
+                      f, indent=2)
+        print(f"✓ JSON results: {args.json}")
+    return 1 if any(result.status != "ok" for result in checked) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())